@@ -0,0 +1,266 @@
+# analytics.py
+# Productivity reports over the timetable history: completion rates,
+# pomodoros and logged minutes per slot, per weekday and per week, plus
+# streaks of productive days.
+#
+#   python analytics.py [summary|slots|weekdays|weeks|streaks] [--weeks 12] [--json] [--rebuild]
+#
+# With the SQLite store the numbers come from a `rollups` table in the same
+# database, kept current by triggers on `slots`: every insert, delete or
+# update of a row (from the scheduler, the timer, an import, any process)
+# adjusts its four buckets (slot name, weekday, week, day) in the same
+# transaction, so a report reads a few hundred rollup rows instead of
+# re-scanning years of slots. The table is filled with one GROUP BY per
+# bucket the first time it is needed. The CSV store has no triggers; its
+# rollups are recomputed in memory when store.version() changes.
+#
+# completion_rate = done / answered, where answered = Done + Not Done.
+# A productive day has at least one slot done; streaks count consecutive
+# productive days among days that had slots (days off do not break them).
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import date, timedelta
+
+from timetable_store import SqliteStore, open_store
+
+KINDS = {
+    # bucket -> SQL key expression over a slots row alias
+    "slot": "{r}.SlotName",
+    "weekday": "strftime('%w', {r}.Date)",                         # 0 = Sunday
+    "week": "date({r}.Date, '-6 days', 'weekday 1')",              # Monday of the week
+    "day": "{r}.Date",
+}
+FIELDS = ("slots", "done", "not_done", "pomodoros", "minutes")
+WEEKDAYS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+DONE = "(lower(trim({r}.Status)) = 'done')"
+NOT_DONE = "(lower(trim({r}.Status)) = 'not done')"
+# -----------------------------------
+
+
+def _upserts(r, sign):
+    # one statement per bucket adding (+) or removing (-) row alias r
+    out = []
+    for kind, key in KINDS.items():
+        values = ", ".join([
+            f"{sign}1", f"{sign}{DONE.format(r=r)}", f"{sign}{NOT_DONE.format(r=r)}",
+            f"{sign}{r}.PomodorosCompleted", f"{sign}{r}.LoggedMinutes",
+        ])
+        out.append(
+            f"INSERT INTO rollups (kind, key, {', '.join(FIELDS)}) "
+            f"VALUES ('{kind}', {key.format(r=r)}, {values}) "
+            f"ON CONFLICT(kind, key) DO UPDATE SET "
+            + ", ".join(f"{f} = {f} + excluded.{f}" for f in FIELDS) + ";"
+        )
+    return "\n".join(out)
+
+
+ROLLUP_SCHEMA = f"""
+CREATE TABLE rollups (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    slots INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    not_done INTEGER NOT NULL DEFAULT 0,
+    pomodoros INTEGER NOT NULL DEFAULT 0,
+    minutes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, key)
+);
+CREATE TRIGGER rollups_insert AFTER INSERT ON slots BEGIN
+{_upserts("NEW", "+")}
+END;
+CREATE TRIGGER rollups_delete AFTER DELETE ON slots BEGIN
+{_upserts("OLD", "-")}
+END;
+CREATE TRIGGER rollups_update AFTER UPDATE OF Date, SlotName, Status, PomodorosCompleted, LoggedMinutes ON slots BEGIN
+{_upserts("OLD", "-")}
+{_upserts("NEW", "+")}
+END;
+""" + "\n".join(
+    f"INSERT INTO rollups (kind, key, {', '.join(FIELDS)}) "
+    f"SELECT '{kind}', {key.format(r='s')}, COUNT(*), SUM({DONE.format(r='s')}), SUM({NOT_DONE.format(r='s')}), "
+    f"SUM(s.PomodorosCompleted), SUM(s.LoggedMinutes) FROM slots s GROUP BY 2;"
+    for kind, key in KINDS.items()
+)
+
+DROP_ROLLUPS = """
+DROP TRIGGER IF EXISTS rollups_insert;
+DROP TRIGGER IF EXISTS rollups_delete;
+DROP TRIGGER IF EXISTS rollups_update;
+DROP TABLE IF EXISTS rollups;
+"""
+
+
+def compute_rollups(rows):
+    # the same buckets in Python, for stores without triggers
+    out = {kind: {} for kind in KINDS}
+    for r in rows:
+        try:
+            d = date.fromisoformat(r["Date"])
+        except ValueError:
+            continue
+        status = str(r["Status"]).strip().lower()
+        add = (1, int(status == "done"), int(status == "not done"),
+               int(r["PomodorosCompleted"] or 0), int(r["LoggedMinutes"] or 0))
+        keys = {
+            "slot": r["SlotName"],
+            "weekday": str((d.weekday() + 1) % 7),
+            "week": (d - timedelta(days=d.weekday())).isoformat(),
+            "day": r["Date"],
+        }
+        for kind, key in keys.items():
+            bucket = out[kind].setdefault(key, [0] * len(FIELDS))
+            for i, v in enumerate(add):
+                bucket[i] += v
+    return {kind: {k: dict(zip(FIELDS, v)) for k, v in buckets.items()} for kind, buckets in out.items()}
+
+
+def _with_rates(key_name, key, totals):
+    row = {key_name: key, **totals}
+    answered = totals["done"] + totals["not_done"]
+    row["answered"] = answered
+    row["completion_rate"] = round(totals["done"] / answered, 3) if answered else None
+    return row
+
+
+class Analytics:
+    def __init__(self, store):
+        self.store = store
+        self._version = None
+        self._cache = {}        # kind -> {key: totals}
+        if isinstance(store, SqliteStore):
+            self.ensure_rollups()
+
+    # ---- rollups ----
+    def ensure_rollups(self, rebuild=False):
+        if rebuild:
+            self.store.script(DROP_ROLLUPS)
+            self._version = None
+        exists = self.store.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollups'")
+        if not exists:
+            try:
+                self.store.script(ROLLUP_SCHEMA)
+            except sqlite3.OperationalError as e:
+                # another process created it first; its backfill already counts everything
+                if "already exists" not in str(e):
+                    raise
+
+    def rollup(self, kind):
+        if kind not in KINDS:
+            raise ValueError(f"unknown rollup {kind!r}")
+        # cached until the store reports a change, from any process
+        version = self.store.version()
+        if version != self._version:
+            self._version, self._cache = version, {}
+        if kind not in self._cache:
+            if isinstance(self.store, SqliteStore):
+                rows = self.store.query(f"SELECT key, {', '.join(FIELDS)} FROM rollups WHERE kind = ? AND slots != 0", (kind,))
+                self._cache[kind] = {r.pop("key"): r for r in rows}
+            else:
+                self._cache.update(compute_rollups(self.store.rows()))
+        return self._cache[kind]
+
+    # ---- reports ----
+    def by_slot(self):
+        rows = [_with_rates("slot", k, v) for k, v in self.rollup("slot").items()]
+        return sorted(rows, key=lambda r: (-r["minutes"], r["slot"]))
+
+    def by_weekday(self):
+        rolled = self.rollup("weekday")
+        order = [1, 2, 3, 4, 5, 6, 0]      # Monday first
+        return [_with_rates("weekday", WEEKDAYS[i], rolled[str(i)]) for i in order if str(i) in rolled]
+
+    def by_week(self, weeks=None):
+        rows = [_with_rates("week", k, v) for k, v in sorted(self.rollup("week").items())]
+        return rows[-weeks:] if weeks else rows
+
+    def streaks(self, today=None):
+        today = (today or date.today()).isoformat()
+        days = sorted((k, v) for k, v in self.rollup("day").items() if k <= today)
+        longest = run = 0
+        for day, v in days:
+            if v["done"] > 0:
+                run += 1
+                longest = max(longest, run)
+            elif day != today:      # today still counts as in progress
+                run = 0
+        return {"current": run, "longest": longest, "days_with_slots": len(days)}
+
+    def summary(self, today=None):
+        today = today or date.today()
+        totals = dict.fromkeys(FIELDS, 0)
+        for v in self.rollup("slot").values():
+            for f in FIELDS:
+                totals[f] += v[f]
+        week = (today - timedelta(days=today.weekday())).isoformat()
+        empty = dict.fromkeys(FIELDS, 0)
+        return {
+            "total": _with_rates("range", "all", totals),
+            "today": _with_rates("day", today.isoformat(), self.rollup("day").get(today.isoformat(), empty)),
+            "this_week": _with_rates("week", week, self.rollup("week").get(week, empty)),
+            "streaks": self.streaks(today),
+            "top_slots": self.by_slot()[:5],
+        }
+
+    def report(self, view="summary", weeks=None):
+        if view == "summary":
+            return self.summary()
+        if view == "slots":
+            return self.by_slot()
+        if view == "weekdays":
+            return self.by_weekday()
+        if view == "weeks":
+            return self.by_week(weeks)
+        if view == "streaks":
+            return self.streaks()
+        raise ValueError(f"unknown view {view!r}")
+
+
+def _print_table(rows):
+    if not rows:
+        print("(no data)")
+        return
+    cols = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c] if r[c] is not None else "-").ljust(widths[c]) for c in cols))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Focus timetable analytics")
+    parser.add_argument("view", nargs="?", default="summary", choices=["summary", "slots", "weekdays", "weeks", "streaks"])
+    parser.add_argument("--weeks", type=int, default=12, help="weeks shown by the weeks view (0 = all)")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--rebuild", action="store_true", help="drop and refill the rollup table")
+    args = parser.parse_args(argv)
+
+    store = open_store()
+    engine = Analytics(store)
+    if args.rebuild and isinstance(store, SqliteStore):
+        engine.ensure_rollups(rebuild=True)
+    result = engine.report(args.view, args.weeks or None)
+    store.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.view == "summary":
+        for name in ("total", "today", "this_week"):
+            r = result[name]
+            rate = f"{r['completion_rate']:.0%}" if r["completion_rate"] is not None else "-"
+            print(f"{name:<10} {r['done']}/{r['slots']} done  {rate:>4} of answered  "
+                  f"{r['pomodoros']} pomodoros  {r['minutes']} min")
+        s = result["streaks"]
+        print(f"streak     {s['current']} day(s), longest {s['longest']}")
+        print()
+        _print_table(result["top_slots"])
+    elif args.view == "streaks":
+        print(json.dumps(result))
+    else:
+        _print_table(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,179 +1,256 @@
 # desktop_pet_resized.py - ready-to-run for resized cat gifs
+# Any number of pets in one process: every Pet is a Toplevel on one hidden
+# Tk root, all pets share one SpriteCache and one frame clock.
+#
+#   python desktop_pet.py                          (one pet, as before)
+#   python desktop_pet.py --pets 3
+#   python desktop_pet.py --profile alice --profile bob --buddy
+#   python desktop_pet.py --all-profiles           (one per multi_scheduler profile)
+#
+# A pet with a profile only reacts to bus events for that profile (and to
+# events without one, e.g. verdicts); the break buddy only comes out on
+# breaks.
 import tkinter as tk
-import random
 import os
 import sys
+import time
+import argparse
 
-BASE = os.path.dirname(__file__)
-ASSET_DIR = os.path.join(BASE, "assets", "gifs")
+import event_bus
+from pet_engine import STATES, PetEngine
+from sprites import PET_SKIN, PET_SIZE, SpriteCache, skin_files
 
-FILES = {
-    "idle": os.path.join(ASSET_DIR, "idle.gif"),
-    "idle_to_sleep": os.path.join(ASSET_DIR, "idle_to_sleep.gif"),
-    "sleep": os.path.join(ASSET_DIR, "sleep.gif"),
-    "sleep_to_idle": os.path.join(ASSET_DIR, "sleep_to_idle.gif"),
-    "walk_right": os.path.join(ASSET_DIR, "walk_right.gif"),
-    "walk_left": os.path.join(ASSET_DIR, "walk_left.gif"),
+PET_GAP = 20        # px between pets standing side by side
+SCREEN_CHECK_MS = 1000
+
+# focus events pick the pet's next animation: wake up when work starts or a
+# page gets blocked, stroll around on breaks, settle down after a slot
+REACTIONS = {
+    event_bus.WORK_STARTED: "sleep_to_idle",
+    event_bus.BREAK_STARTED: "walk_right",
+    event_bus.SLOT_COMPLETED: "idle",
 }
-window = tk.Tk()
-window.overrideredirect(True)
-window.attributes('-topmost', True)
-PET_WIDTH = 100
-PET_HEIGHT = 100
-START_X = window.winfo_screenwidth() - PET_WIDTH - 50
-GROUND_Y = window.winfo_screenheight() - PET_HEIGHT - 30
-
-for key, path in FILES.items():
-    if not os.path.isfile(path):
-        raise FileNotFoundError(f"ERROR: Expected file for '{key}' not found: {path}")
-
-def load_gif_frames(path):
-    frames = []
-    i = 0
-    while True:
+# -----------------------------------
+
+
+class Pet:
+    # one window; pet_engine decides, this class only draws
+    def __init__(self, host, x, y, profile=None, buddy=False):
+        self.host = host
+        self.profile = profile
+        self.buddy = buddy
+        self.window = tk.Toplevel(host.root)
+        self.window.overrideredirect(True)
+        self.window.attributes('-topmost', True)
+        self.window.config(highlightbackground='black')
+        self.window.wm_attributes('-transparentcolor', 'black')
+        self.label = tk.Label(self.window, bd=0, bg='black')
+        self.label.pack()
+
+        self.engine = PetEngine(host.durations, x=x, y=y, screen_w=host.screen_w, width=host.width, now=host.clock_ms())
+        self.shown = {"frame": None, "pos": (x, y), "state": None}     # what Tk currently has
+        self.visible = not buddy
+        self.drag = {"x": 0, "y": 0, "start_win_x": None, "start_win_y": None}
+        self.window.geometry(f"{host.width}x{host.height}+{x}+{y}")
+        if buddy:
+            self.window.withdraw()
+
+        self.label.bind("<Button-3>", self.on_right_click)
+        self.label.bind("<Button-1>", self.on_press)
+        self.label.bind("<B1-Motion>", self.on_motion)
+        self.label.bind("<ButtonRelease-1>", self.on_release)
+
+    def render(self, now):
+        # -> ms until this pet next needs the clock
+        engine = self.engine
+        engine.advance(now)
+        if engine.state != self.shown["state"]:
+            self.shown["state"] = engine.state
+            if engine.moving:
+                self.host.refresh_screen()
+            self.host.sprites.trim()
+        frame = self.host.sprites.frames(engine.state)[engine.index]
+        if frame is not self.shown["frame"]:
+            self.label.configure(image=frame)
+            self.shown["frame"] = frame
+        pos = engine.position()
+        if pos != self.shown["pos"] and self.drag["start_win_x"] is None:
+            self.window.geometry(f"+{pos[0]}+{pos[1]}")
+            self.shown["pos"] = pos
+        return engine.next_wake(now)
+
+    def react(self, event_type, state, now):
+        if self.buddy:
+            # out for breaks, back in when work starts or the slot is over
+            if event_type == event_bus.BREAK_STARTED:
+                self.visible = True
+                self.window.deiconify()
+            elif event_type in (event_bus.WORK_STARTED, event_bus.SLOT_COMPLETED):
+                self.visible = False
+                self.window.withdraw()
+                return
+        self.engine.react(state, now)
+
+    def wants(self, event):
+        profile = (event.get("data") or {}).get("profile")
+        return profile is None or self.profile is None or profile == self.profile
+
+    def on_right_click(self, event):
+        self.host.remove(self)
+
+    def on_press(self, event):
+        self.drag["x"] = event.x_root
+        self.drag["y"] = event.y_root
+        geom = self.window.geometry().split('+')
+        if len(geom) >= 3:
+            self.drag["start_win_x"] = int(geom[1])
+            self.drag["start_win_y"] = int(geom[2])
+
+    def on_motion(self, event):
+        if self.drag["start_win_x"] is None:
+            return
+        dx = event.x_root - self.drag["x"]
+        dy = event.y_root - self.drag["y"]
+        new_x = self.drag["start_win_x"] + dx
+        new_y = self.drag["start_win_y"] + dy
+        self.window.geometry(f"+{new_x}+{new_y}")
+        # the pet stays where it is dropped and walks on from there
+        self.engine.move_to(new_x, new_y)
+        self.shown["pos"] = self.engine.position()
+
+    def on_release(self, event):
+        self.drag["start_win_x"] = None
+        self.drag["start_win_y"] = None
+
+
+class PetHost:
+    # the hidden Tk root, the shared sprites and the one frame clock
+    def __init__(self, skin=PET_SKIN, size=PET_SIZE, bus=None):
+        self.root = tk.Tk()
+        self.root.withdraw()
+        # idle is decoded now, the rest on first use (from data/sprite_cache after the first run)
+        self.sprites = SpriteCache(skin_files(STATES, skin), size, master=self.root)
+        self.durations = self.sprites.durations()
+        self.width, self.height = self.sprites.frame_size()
+        self.screen_w = self.root.winfo_screenwidth()
+        self.screen_h = self.root.winfo_screenheight()
+        self.screen_checked = -SCREEN_CHECK_MS
+        self.clock_start = time.monotonic()
+        self.pets = []
+        self.tick_after = None
+        self.ticks = 0
+        self.bus = bus
+
+    def clock_ms(self):
+        return int((time.monotonic() - self.clock_start) * 1000)
+
+    def ground_y(self):
+        return self.screen_h - self.height - 30
+
+    def add(self, profile=None, buddy=False, x=None):
+        if x is None:
+            # side by side from the right-hand corner, wrapping round
+            slot = len(self.pets)
+            x = self.screen_w - (self.width + 50) - slot * (self.width + PET_GAP)
+            x %= max(1, self.screen_w - self.width)
+        pet = Pet(self, int(x), self.ground_y(), profile=profile, buddy=buddy)
+        self.pets.append(pet)
+        return pet
+
+    def remove(self, pet):
+        pet.window.destroy()
+        if pet in self.pets:
+            self.pets.remove(pet)
+        if not self.pets:
+            self.root.quit()
+
+    def refresh_screen(self):
+        # screen metrics are cached; re-read when a pet starts walking (the
+        # only thing that needs them) so a resolution or monitor change is picked up
+        now = self.clock_ms()
+        if now - self.screen_checked < SCREEN_CHECK_MS:
+            return
+        self.screen_checked = now
+        self.screen_w = self.root.winfo_screenwidth()
+        self.screen_h = self.root.winfo_screenheight()
+        for pet in self.pets:
+            pet.engine.screen_w = self.screen_w
+            x, y = pet.engine.position()
+            pet.engine.move_to(min(max(x, -self.width), self.screen_w), min(max(y, 0), self.screen_h - self.height))
+
+    def tick(self):
+        # every pet on the same tick; asleep that is one wakeup per sleep spell
+        now = self.clock_ms()
+        self.ticks += 1
+        wake = 60000
+        for pet in list(self.pets):
+            if pet.visible:
+                try:
+                    wake = min(wake, pet.render(now))
+                except tk.TclError as e:
+                    print("Pet error:", e)
+        self.tick_after = self.root.after(wake, self.tick)
+
+    def react(self, event):
+        # Tk thread: cut the current animations short and redraw now
+        state = REACTIONS.get(event.get("type"))
+        if event.get("type") == event_bus.VERDICT and (event.get("data") or {}).get("action") == "block":
+            state = "sleep_to_idle"
+        if not state:
+            return
+        now = self.clock_ms()
+        for pet in self.pets:
+            if pet.wants(event):
+                pet.react(event["type"], state, now)
+        if self.tick_after is not None:
+            self.root.after_cancel(self.tick_after)
+        self.tick()
+
+    def on_bus_event(self, event):
+        # bus thread; tkinter hands the after() call over to the Tk thread
+        self.root.after(0, self.react, event)
+
+    def run(self):
+        if self.bus is not None:
+            self.bus.subscribe(self.on_bus_event, types=set(REACTIONS) | {event_bus.VERDICT})
+        self.tick()
         try:
-            frm = tk.PhotoImage(file=path, format=f"gif -index {i}")
-            frames.append(frm)
-            i += 1
-        except tk.TclError:
-            break
-    return frames
-
-
-window.config(highlightbackground='black')
-window.wm_attributes('-transparentcolor', 'black')
-label = tk.Label(window, bd=0, bg='black')
-label.pack()
-
-idle = load_gif_frames(FILES["idle"])
-idle_to_sleep = load_gif_frames(FILES["idle_to_sleep"])
-sleep = load_gif_frames(FILES["sleep"])
-sleep_to_idle = load_gif_frames(FILES["sleep_to_idle"])
-walk_right = load_gif_frames(FILES["walk_right"])
-walk_left = load_gif_frames(FILES["walk_left"])
-
-if not (idle and idle_to_sleep and sleep and sleep_to_idle and walk_right and walk_left):
-    print("ERROR: One or more GIFs failed to load (no frames).")
-    sys.exit(1)
-
-cycle = 0
-check = 1
-event_number = random.randrange(1, 19)
-x = START_X
-global_x = x
-
-
-# Heavily weighted toward sleeping
-idle_num = [1,2,3]                      # almost never idle
-idle_to_sleep_num = [ 4, 5, 6 ]    # goes to sleep quickly
-sleep_nums =  [7, 8, 9, 10, 11]  # long sleep cycle
-sleep_to_idle_num = [ 12, 13, 14 ]            # rare wake-up
-walk_left_num = [15, 16]                # very rare walking
-walk_right_num = [17,18]               # very rare walking
-
-
-def gif_work(cycle_local, frames, first_num, last_num):
-    if cycle_local < len(frames) - 1:
-        cycle_local += 1
-    else:
-        cycle_local = 0
-        event = random.randrange(first_num, last_num + 1)
-        return cycle_local, event
-    return cycle_local, None
-
-def update(cycle_local, check_local, event_num_local, x_local):
-    next_event = None
-    if check_local == 0:
-        frame = idle[cycle_local % len(idle)]
-        cycle_local, next_event = gif_work(cycle_local, idle, 1, 9)
-    elif check_local == 1:
-        frame = idle_to_sleep[cycle_local % len(idle_to_sleep)]
-        cycle_local, next_event = gif_work(cycle_local, idle_to_sleep, 10, 10)
-    elif check_local == 2:
-        frame = sleep[cycle_local % len(sleep)]
-        cycle_local, next_event = gif_work(cycle_local, sleep, 10, 15)
-    elif check_local == 3:
-        frame = sleep_to_idle[cycle_local % len(sleep_to_idle)]
-        cycle_local, next_event = gif_work(cycle_local, sleep_to_idle, 1, 1)
-    elif check_local == 4:
-        frame = walk_right[cycle_local % len(walk_right)]
-        cycle_local, next_event = gif_work(cycle_local, walk_right, 1, 9)
-        x_local += 3
-    elif check_local == 5:
-        frame = walk_left[cycle_local% len(walk_left)]
-        cycle_local, next_event = gif_work(cycle_local, walk_left, 1, 9)
-        x_local -= 3
-    else:
-        frame = idle[0]
-        cycle_local, next_event = gif_work(cycle_local, idle, 1, 9)
-
-    screen_w = window.winfo_screenwidth()
-    if x_local < -PET_WIDTH:
-        x_local = screen_w
-    if x_local > screen_w:
-        x_local = -PET_WIDTH
-
-    window.geometry(f"{PET_WIDTH}x{PET_HEIGHT}+{int(x_local)}+{int(GROUND_Y)}")
-    label.configure(image=frame)
-
-    if next_event is not None:
-        event_num_local = next_event
-
-    window.after(1, event, cycle_local, check_local, event_num_local, x_local)
-
-def event(cycle_local, check_local, event_num_local, x_local):
-    if event_num_local in idle_num:
-        check_local = 0
-        window.after(400, update, cycle_local, check_local, event_num_local, x_local)
-    elif event_num_local in idle_to_sleep_num:
-        check_local = 1
-        window.after(100, update, cycle_local, check_local, event_num_local, x_local)
-    elif event_num_local in walk_left_num:
-        check_local = 5
-        window.after(100, update, cycle_local, check_local, event_num_local, x_local)
-    elif event_num_local in walk_right_num:
-        check_local = 4
-        window.after(100, update, cycle_local, check_local, event_num_local, x_local)
-    elif event_num_local in sleep_nums:
-        check_local = 2
-        window.after(10000, update, cycle_local, check_local, event_num_local, x_local)
-    elif event_num_local in sleep_to_idle_num:
-        check_local = 3
-        window.after(100, update, cycle_local, check_local, event_num_local, x_local)
-    else:
-        new_ev = random.randrange(1, 16)
-        window.after(200, update, cycle_local, check_local, new_ev, x_local)
-
-def on_right_click(event):
-    window.destroy()
-
-drag_data = {"x": 0, "y": 0, "start_win_x": None, "start_win_y": None}
-def on_press(event):
-    drag_data["x"] = event.x_root
-    drag_data["y"] = event.y_root
-    geom = window.geometry().split('+')
-    if len(geom) >= 3:
-        drag_data["start_win_x"] = int(geom[1])
-        drag_data["start_win_y"] = int(geom[2])
-
-def on_motion(event):
-    if drag_data["start_win_x"] is None:
-        return
-    dx = event.x_root - drag_data["x"]
-    dy = event.y_root - drag_data["y"]
-    new_x = drag_data["start_win_x"] + dx
-    new_y = drag_data["start_win_y"] + dy
-    window.geometry(f"{PET_WIDTH}x{PET_HEIGHT}+{new_x}+{new_y}")
-
-def on_release(event):
-    drag_data["start_win_x"] = None
-    drag_data["start_win_y"] = None
-
-label.bind("<Button-3>", on_right_click)
-label.bind("<Button-1>", on_press)
-label.bind("<B1-Motion>", on_motion)
-label.bind("<ButtonRelease-1>", on_release)
-
-window.geometry(f"{PET_WIDTH}x{PET_HEIGHT}+{START_X}+{GROUND_Y}")
-window.after(1, update, cycle, check, event_number, x)
-window.mainloop()
+            self.root.mainloop()
+        finally:
+            if self.bus is not None:
+                self.bus.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Desktop pets")
+    parser.add_argument("--pets", type=int, default=0, help="pets that react to everything")
+    parser.add_argument("--profile", action="append", default=[], help="a pet for this multi_scheduler profile, repeatable")
+    parser.add_argument("--all-profiles", action="store_true", help="a pet for every profile in FOCUS_PROFILES_DIR")
+    parser.add_argument("--buddy", action="store_true", help="add a break buddy that only comes out on breaks")
+    args = parser.parse_args(argv)
+
+    profiles = list(args.profile)
+    if args.all_profiles:
+        from timetable_store import list_profiles
+        profiles += [p for p in list_profiles() if p not in profiles]
+    if not profiles and not args.pets and os.getenv("FOCUS_PROFILE"):
+        profiles = [os.getenv("FOCUS_PROFILE")]
+    plain = args.pets or (0 if profiles else 1)
+
+    try:
+        host = PetHost(bus=event_bus.Bus("pet"))
+    except (OSError, ValueError, tk.TclError) as e:
+        print("ERROR: could not load the pet's animations:", e)
+        return 1
+    for _ in range(plain):
+        host.add()
+    for name in profiles:
+        host.add(profile=name)
+    if args.buddy:
+        host.add(buddy=True)
+    host.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
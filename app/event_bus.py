@@ -0,0 +1,299 @@
+# event_bus.py
+# Local pub/sub for the scheduler, the timer, the pet and the servers; it
+# replaces polling data/focus_ui_message.txt. Events are newline-delimited
+# JSON over 127.0.0.1:FOCUS_BUS_PORT:
+#   {"type": "work_started", "source": "scheduler", "ts": ..., "seq": 12,
+#    "data": {"message": "WORK: DSA (1/4)", "slot": "DSA", ...}}
+# data["message"], when present, is the text the timer shows.
+#
+# There is no broker process to start. The first Bus that finds nobody
+# listening binds the port and brokers for everyone; if that process
+# exits, the rest reconnect and one of them takes over.
+#
+# File fallback: while the bus is unreachable (or FOCUS_BUS=0), events that
+# carry a message are written to focus_ui_message.txt as before, and
+# subscribers watch that file instead (FOCUS_MESSAGE_FILE moves it, e.g. for
+# benchmarks and tests that must not touch data/).
+import os
+import json
+import time
+import socket
+import threading
+import itertools
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE, "data")
+
+BUS_HOST = "127.0.0.1"
+BUS_PORT = int(os.getenv("FOCUS_BUS_PORT", "5055"))
+BUS_ENABLED = os.getenv("FOCUS_BUS", "1") == "1"
+MESSAGE_FILE = os.getenv("FOCUS_MESSAGE_FILE", os.path.join(DATA_DIR, "focus_ui_message.txt"))
+RETRY_S = 2.0           # back-off before trying an unreachable bus again
+SEND_TIMEOUT = 1.0      # a subscriber that cannot take an event this fast is dropped
+
+# event types
+WORK_STARTED = "work_started"
+BREAK_STARTED = "break_started"
+SLOT_COMPLETED = "slot_completed"
+VERDICT = "verdict"
+COMMAND = "command"
+MESSAGE = "message"     # plain text, also what the file fallback delivers
+EVENTS = {WORK_STARTED, BREAK_STARTED, SLOT_COMPLETED, VERDICT, COMMAND, MESSAGE}
+# -----------------------------------
+
+
+def _lines(conn, stop):
+    # JSON lines from a socket; tolerates the timeout set for sends
+    buf = b""
+    while not stop.is_set():
+        try:
+            chunk = conn.recv(65536)
+        except socket.timeout:
+            continue
+        except OSError:
+            return
+        if not chunk:
+            return
+        buf += chunk
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            if line.strip():
+                yield line
+
+
+def _alive(conn):
+    # a broker that exited has closed its end; without this check the first
+    # event after that would vanish into the dead socket's send buffer
+    timeout = conn.gettimeout()
+    try:
+        conn.setblocking(False)
+        return conn.recv(1, socket.MSG_PEEK) != b""
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    finally:
+        try:
+            conn.settimeout(timeout)
+        except OSError:
+            pass
+
+
+def _bind(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if os.name == "nt":
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+    else:
+        # only skips TIME_WAIT; a second live listener still fails
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((host, port))
+        sock.listen(64)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class Broker:
+    # fan-out hub living inside whichever process bound the port first
+    def __init__(self, host=BUS_HOST, port=BUS_PORT):
+        self.sock = _bind(host, port)
+        self.lock = threading.Lock()
+        self.subs = {}      # conn -> set of types, or None for everything
+        self.seq = itertools.count(1)
+        self.stop = threading.Event()
+        self.published = 0
+        threading.Thread(target=self._accept, name="bus-broker", daemon=True).start()
+
+    def _accept(self):
+        while not self.stop.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.settimeout(SEND_TIMEOUT)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            for line in _lines(conn, self.stop):
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                if msg.get("op") == "sub":
+                    types = msg.get("types")
+                    with self.lock:
+                        self.subs[conn] = set(types) if types else None
+                elif msg.get("op") == "pub" and isinstance(msg.get("event"), dict):
+                    self._forward(msg["event"])
+        finally:
+            with self.lock:
+                self.subs.pop(conn, None)
+            conn.close()
+
+    def _forward(self, event):
+        with self.lock:
+            event["seq"] = next(self.seq)
+            self.published += 1
+            data = (json.dumps(event) + "\n").encode("utf-8")
+            for conn, types in list(self.subs.items()):
+                if types is not None and event.get("type") not in types:
+                    continue
+                try:
+                    conn.sendall(data)
+                except OSError:
+                    self.subs.pop(conn, None)
+                    conn.close()
+
+    def close(self):
+        self.stop.set()
+        self.sock.close()
+        with self.lock:
+            for conn in self.subs:
+                conn.close()
+            self.subs.clear()
+
+
+class Bus:
+    def __init__(self, source, host=BUS_HOST, port=BUS_PORT, message_file=MESSAGE_FILE, enabled=BUS_ENABLED):
+        self.source = source
+        self.host = host
+        self.port = port
+        self.message_file = message_file
+        self.enabled = enabled
+        self.broker = None
+        self.lock = threading.Lock()        # broker takeover
+        self.pub_lock = threading.Lock()    # the shared publishing connection
+        self.stop = threading.Event()
+        self._pub = None
+        self._retry_at = 0.0
+        self._file_mtime = self._message_mtime()
+        self.sent = 0
+        self.fallbacks = 0
+
+    def _connect(self):
+        if not self.enabled or self.stop.is_set():
+            return None
+        try:
+            return socket.create_connection((self.host, self.port), timeout=0.5)
+        except OSError:
+            pass
+        # nobody is brokering: take over, unless another process just did
+        with self.lock:
+            if self.broker is None:
+                try:
+                    self.broker = Broker(self.host, self.port)
+                except OSError:
+                    pass
+        try:
+            return socket.create_connection((self.host, self.port), timeout=0.5)
+        except OSError:
+            return None
+
+    def publish(self, event_type, **data):
+        # never raises on I/O; returns True when the bus took the event
+        if event_type not in EVENTS:
+            raise ValueError(f"unknown event type {event_type!r}")
+        event = {"type": event_type, "source": self.source, "ts": time.time(), "data": data}
+        line = (json.dumps({"op": "pub", "event": event}) + "\n").encode("utf-8")
+
+        sent = False
+        with self.pub_lock:
+            if self.enabled and time.monotonic() >= self._retry_at:
+                if self._pub is not None and not _alive(self._pub):
+                    self._pub.close()
+                    self._pub = None
+                for _ in range(2):      # one reconnect if the broker moved
+                    if self._pub is None:
+                        self._pub = self._connect()
+                        if self._pub is None:
+                            break
+                    try:
+                        self._pub.sendall(line)
+                        sent = True
+                        break
+                    except OSError:
+                        self._pub.close()
+                        self._pub = None
+                if not sent:
+                    self._retry_at = time.monotonic() + RETRY_S
+            if sent:
+                self.sent += 1
+            elif "message" in data:
+                self._write_file(data["message"])
+        return sent
+
+    def _message_mtime(self):
+        try:
+            return os.stat(self.message_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _write_file(self, message):
+        self.fallbacks += 1
+        try:
+            with open(self.message_file, "w", encoding="utf-8") as f:
+                f.write(str(message))
+        except OSError:
+            pass
+
+    def subscribe(self, callback, types=None):
+        # callback(event) runs on a background thread
+        t = threading.Thread(target=self._listen, args=(callback, types), name="bus-subscriber", daemon=True)
+        t.start()
+        return t
+
+    def _listen(self, callback, types):
+        while not self.stop.is_set():
+            conn = self._connect()
+            if conn is None:
+                self._watch_file(callback, types, RETRY_S)
+                continue
+            try:
+                conn.sendall((json.dumps({"op": "sub", "types": sorted(types) if types else None}) + "\n").encode("utf-8"))
+                conn.settimeout(1.0)
+                for line in _lines(conn, self.stop):
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        print("Bus callback error:", e)
+            except OSError:
+                pass
+            finally:
+                conn.close()
+            # broker went away; the next _connect() finds or becomes the new one
+
+    def _watch_file(self, callback, types, seconds):
+        # fallback: the old message file, read only when its mtime moves
+        if types and MESSAGE not in types:
+            self.stop.wait(seconds)
+            return
+        deadline = time.monotonic() + seconds
+        while not self.stop.is_set() and time.monotonic() < deadline:
+            mtime = self._message_mtime()
+            if mtime is not None and mtime != self._file_mtime:
+                try:
+                    with open(self.message_file, "r", encoding="utf-8") as f:
+                        text = f.read().strip()
+                except OSError:
+                    text = ""
+                if text:
+                    callback({"type": MESSAGE, "source": "file", "ts": time.time(), "data": {"message": text}})
+            self._file_mtime = mtime
+            self.stop.wait(1.0)
+
+    def close(self):
+        self.stop.set()
+        with self.pub_lock:
+            if self._pub is not None:
+                self._pub.close()
+                self._pub = None
+        if self.broker is not None:
+            self.broker.close()
+            self.broker = None
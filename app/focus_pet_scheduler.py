@@ -4,30 +4,51 @@ import sys
 import threading
 import subprocess
 import time
+from bisect import bisect_right
 from datetime import datetime, timedelta
-import pandas as pd
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 
+import event_bus
+from timetable_model import minute_of_day
+from timetable_store import TIMETABLE_CSV, open_store
+
 # --- BASE PATH (IMPORTANT) ---
 BASE = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE, "data")
 
-TIMETABLE = os.path.join(DATA_DIR, "focus_timetable.csv")
-UI_MESSAGE_FILE = os.path.join(DATA_DIR, "focus_ui_message.txt")
+TIMETABLE = TIMETABLE_CSV
 
 PET_SCRIPT = os.path.join(BASE, "desktop_pet.py")
 TIMER_SCRIPT = os.path.join(BASE, "focus_pet_timer.py")
 
 WORK_MIN = 25
 BREAK_MIN = 5
-CHECK_INTERVAL = 15
+TIMETABLE_CHECK = 60    # seconds between timetable change checks while idle
 # -----------------------------------
 
 
-def hm_to_minutes(hm: str):
-    h, m = map(int, hm.split(":"))
-    return h * 60 + m
+class SlotIndex:
+    # One day's slots, parsed once: sorted by start for bisect, plus every
+    # start/end boundary so the loop can sleep until the next one.
+    def __init__(self, slots, date):
+        self.date = date
+        # (start_min, end_min, slot_id), sorted by start then file order
+        self.entries = [(s.start, s.end, s.id) for s in slots if s.timed]
+        self.entries.sort(key=lambda e: (e[0], e[2]))
+        self.starts = [e[0] for e in self.entries]
+        self.bounds = sorted({m for e in self.entries for m in e[:2]})
+
+    def active(self, now_min):
+        # slots containing now_min, in timetable order; only slots starting
+        # at or before now are candidates
+        k = bisect_right(self.starts, now_min)
+        return sorted((e for e in self.entries[:k] if now_min < e[1]), key=lambda e: e[2])
+
+    def next_boundary(self, now_min):
+        # next slot start/end after now_min, or midnight
+        k = bisect_right(self.bounds, now_min)
+        return self.bounds[k] if k < len(self.bounds) else 1440
 
 
 def open_subprocess(script_path):
@@ -45,77 +66,98 @@ def open_subprocess(script_path):
 
 
 class Scheduler:
-    def __init__(self, timetable_path):
+    def __init__(self, timetable_path, store=None, bus=None, profile=None):
+        # timetable_path is the CSV; with the default SQLite backend it only
+        # seeds the database on first run (see timetable_store.py)
         self.timetable_path = timetable_path
-        self.df = None
+        self.profile = profile      # set when multi_scheduler drives several timetables
+        if store is None:
+            if not os.path.isfile(timetable_path):
+                raise FileNotFoundError(f"Timetable not found: {timetable_path}")
+            store = open_store(csv_path=timetable_path)
+        self.store = store
+        self.bus = bus or event_bus.Bus("scheduler")
+        self.slots = {}     # today's Slot records by id
         self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.changed = threading.Event()    # set to make an idle loop re-read the timetable
+        self.index = None
+        self.version = None
+        self.wakeups = 0
         self.load_timetable()
 
     def load_timetable(self):
-        if not os.path.isfile(self.timetable_path):
-            raise FileNotFoundError(f"Timetable not found: {self.timetable_path}")
-
-        self.df = pd.read_csv(self.timetable_path, dtype=str)
-
-        # ensure needed columns exist
-        for col in ["Status", "PomodorosCompleted", "LoggedMinutes", "Comments", "LastUpdated"]:
-            if col not in self.df.columns:
-                self.df[col] = ""
-
-        self.df["PomodorosCompleted"] = self.df["PomodorosCompleted"].fillna(0).astype(int)
-        print("Timetable loaded, rows:", len(self.df))
-
-    def save_timetable(self):
-        self.df.to_csv(self.timetable_path, index=False)
-        print("Timetable saved.")
-
-    def get_todays_slots(self):
-        today = datetime.now().date().isoformat()
-        rows = self.df[self.df["Date"] == today].copy()
-
-        rows["StartMin"] = rows["StartTime"].apply(hm_to_minutes)
-        rows["EndMin"] = rows["EndTime"].apply(hm_to_minutes)
-
-        rows.loc[rows["EndTime"] == "00:00", "EndMin"] = 1440
-        return rows.reset_index()
+        today = datetime.now().date()
+        slots = self.store.slots_for_date(today.isoformat())
+        self.slots = {s.id: s for s in slots}
+        self.version = self.store.version()
+        self.index = SlotIndex(slots, today)
+        print(f"Timetable loaded{f' ({self.profile})' if self.profile else ''}, rows today:", len(slots))
+
+    def update_row(self, row_id, **fields):
+        # one row-level write; the cached row follows so no reload is needed
+        self.store.update(row_id, **fields)
+        self.slots[row_id].apply(fields)
+        self.version = self.store.version()
+
+    def refresh(self):
+        # reload when the timetable changed outside the scheduler, and once per day
+        if self.store.version() != self.version or self.index.date != datetime.now().date():
+            self.load_timetable()
+        return self.index
 
     def find_slot_to_start(self):
-        rows = self.get_todays_slots()
+        index = self.refresh()
         now = datetime.now()
-        now_min = now.hour * 60 + now.minute
-
-        for _, r in rows.iterrows():
-            idx = r["index"]
-            start = int(r["StartMin"])
-            end = int(r["EndMin"])
-            status = str(self.df.at[idx, "Status"]).strip().lower()
-
-            if start <= now_min < end and status != "done":
+        for start, end, idx in index.active(minute_of_day(now)):
+            if not self.slots[idx].done:
                 slot_end = datetime.combine(now.date(), datetime.min.time()) + timedelta(minutes=end)
                 remaining = (slot_end - now).total_seconds() / 60
-                return idx, r, remaining
+                return idx, self.slots[idx], remaining
 
         return None, None, None
 
-    def _sleep_minutes(self, minutes):
-        total = minutes * 60
-        step = 5
-        elapsed = 0
-
-        while elapsed < total:
-            time.sleep(min(step, total - elapsed))
-            elapsed += step
-
-    def _update_logged_minutes(self, row_idx, minutes):
-        prev = int(self.df.at[row_idx, "LoggedMinutes"] or 0)
-        self.df.at[row_idx, "LoggedMinutes"] = prev + int(minutes)
+    def seconds_to_next_boundary(self):
+        index = self.refresh()
+        now = datetime.now()
+        midnight = datetime.combine(now.date(), datetime.min.time())
+        boundary = midnight + timedelta(minutes=index.next_boundary(minute_of_day(now)))
+        return max(0.0, (boundary - now).total_seconds())
+
+    def wait_idle(self, seconds):
+        # sleeps until the next slot boundary; wakes early only to look for
+        # timetable edits (cheap stat) or when someone sets self.changed
+        deadline = time.monotonic() + seconds
+        while not self.stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if self.changed.wait(min(remaining, TIMETABLE_CHECK)):
+                self.changed.clear()
+                break
+            if self.store.version() != self.version:
+                break
+        self.wakeups += 1
 
-    def show_blocking_popup(self, message):
-        try:
-            with open(UI_MESSAGE_FILE, "w", encoding="utf-8") as f:
-                f.write(message)
-        except:
-            pass
+    def _sleep_minutes(self, minutes):
+        # one timed wait per phase instead of a 5 s polling loop;
+        # True when stop() cut it short
+        stopped = self.stop_event.wait(minutes * 60)
+        self.wakeups += 1
+        return stopped
+
+    def _update_logged_minutes(self, row_idx, minutes, pomodoros=0):
+        slot = self.slots[row_idx]
+        fields = {"LoggedMinutes": slot.logged + int(minutes)}
+        if pomodoros:
+            fields["PomodorosCompleted"] = slot.pomodoros + pomodoros
+        self.update_row(row_idx, **fields)
+
+    def notify(self, event_type, message, **data):
+        # to the timer/pet over the bus; falls back to focus_ui_message.txt
+        if self.profile:
+            data["profile"] = self.profile
+        self.bus.publish(event_type, message=message, **data)
 
     def ask_task_completion(self, row_idx):
         res = {"status": "", "comment": ""}
@@ -127,7 +169,7 @@ class Scheduler:
 
             ans = messagebox.askyesno(
                 "Task Complete?",
-                f"Completed: {self.df.at[row_idx, 'SlotName']} ?",
+                f"Completed: {self.slots[row_idx].name} ?",
                 parent=root
             )
 
@@ -149,11 +191,11 @@ class Scheduler:
 
     def run_loop(self):
         print("Scheduler running...")
-        while True:
+        while not self.stop_event.is_set():
             try:
-                idx, row, remaining = self.find_slot_to_start()
+                idx, slot, remaining = self.find_slot_to_start()
                 if idx is None:
-                    time.sleep(CHECK_INTERVAL)
+                    self.wait_idle(self.seconds_to_next_boundary())
                     continue
 
                 with self.lock:
@@ -164,33 +206,55 @@ class Scheduler:
                         pom_count = 1
 
                     if pom_count == 0:
+                        # too short for a pomodoro: nothing to do until the slot ends
+                        self.wait_idle(self.seconds_to_next_boundary())
                         continue
 
                     for i in range(pom_count):
-                        self.show_blocking_popup(
-                            f"WORK: {row['SlotName']} ({i+1}/{pom_count})"
+                        self.notify(
+                            event_bus.WORK_STARTED, f"WORK: {slot.name} ({i+1}/{pom_count})",
+                            slot=slot.name, pomodoro=i + 1, of=pom_count, minutes=WORK_MIN
                         )
-                        self._sleep_minutes(WORK_MIN)
+                        if self._sleep_minutes(WORK_MIN):
+                            return      # shutting down: log nothing for the unfinished phase
 
-                        self._update_logged_minutes(idx, WORK_MIN)
+                        self._update_logged_minutes(idx, WORK_MIN, pomodoros=1)
 
                         if i < pom_count - 1:
-                            self.show_blocking_popup(f"BREAK: {BREAK_MIN} minutes")
-                            self._sleep_minutes(BREAK_MIN)
+                            self.notify(
+                                event_bus.BREAK_STARTED, f"BREAK: {BREAK_MIN} minutes",
+                                slot=slot.name, minutes=BREAK_MIN
+                            )
+                            if self._sleep_minutes(BREAK_MIN):
+                                return
                             self._update_logged_minutes(idx, BREAK_MIN)
 
                     # Ask user to confirm
+                    if self.stop_event.is_set():
+                        return
                     result = self.ask_task_completion(idx)
-                    self.df.at[idx, "Status"] = result["status"]
-                    self.df.at[idx, "Comments"] = result["comment"]
-                    self.df.at[idx, "LastUpdated"] = datetime.now().isoformat()
-
-                    self.save_timetable()
-                    time.sleep(5)
+                    if self.stop_event.is_set():
+                        return      # stopped while the dialog was open
+                    self.update_row(
+                        idx,
+                        Status=result["status"],
+                        Comments=result["comment"],
+                        LastUpdated=datetime.now().isoformat()
+                    )
+                    self.notify(
+                        event_bus.SLOT_COMPLETED, f"{slot.name}: {result['status']}",
+                        slot=slot.name, status=result["status"], comment=result["comment"]
+                    )
+                    self.stop_event.wait(5)
 
             except Exception as e:
                 print("Scheduler error:", e)
-                time.sleep(5)
+                self.stop_event.wait(5)
+
+    def stop(self):
+        self.stop_event.set()
+        self.changed.set()
+        self.bus.close()
 
 
 def main():
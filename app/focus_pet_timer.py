@@ -1,17 +1,22 @@
 # focus_pet_timer.py (improved)
 import tkinter as tk
-import time
-import threading
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 
+import event_bus
+from analytics import Analytics
+from timetable_model import format_hm
+from timetable_store import TIMETABLE_CSV, TIMETABLE_DB, open_store, profile_paths
+
 # --- Define Base Path Correctly ---
 BASE = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE, "data")
 
-CSV_PATH = os.path.join(DATA_DIR, "focus_timetable.csv")
-MSG_FILE = os.path.join(DATA_DIR, "focus_ui_message.txt")
+CSV_PATH = TIMETABLE_CSV
+DB_PATH = TIMETABLE_DB
+PROFILE = os.getenv("FOCUS_PROFILE")   # on shared machines: this person's multi_scheduler profile
+if PROFILE:
+    CSV_PATH, DB_PATH = profile_paths(PROFILE)
 
 class FocusTimerUI:
     def __init__(self):
@@ -48,10 +53,29 @@ class FocusTimerUI:
         self.todo_text.pack(pady=3)
         self.todo_text.configure(state="disabled")
 
-        # threads
-        threading.Thread(target=self.update_clock, daemon=True).start()
-        threading.Thread(target=self.watch_csv_updates, daemon=True).start()
-        threading.Thread(target=self.watch_messages, daemon=True).start()
+        self.stats_label = tk.Label(self.root, text="", font=("Segoe UI", 8), fg="#bbbbbb", bg="#1c1c1c")
+        self.stats_label.pack(pady=(0, 4))
+
+        self.store = open_store(csv_path=CSV_PATH, db_path=DB_PATH)
+        self.analytics = Analytics(self.store)
+
+        # today's slots, parsed once per timetable change
+        self.version = None
+        self.day = None
+        self.slots = []         # today's timed Slot records, in timetable order
+        self.shown = {}         # widget -> last options set, so unchanged text is not redrawn
+        self.msg_after = None
+
+        # scheduler messages arrive over the bus (or its file fallback);
+        # tkinter hands the after() call over to the Tk thread
+        self.bus = event_bus.Bus("timer")
+        self.bus.subscribe(
+            lambda event: self.root.after(0, self.on_event, event),
+            types={event_bus.WORK_STARTED, event_bus.BREAK_STARTED, event_bus.SLOT_COMPLETED, event_bus.MESSAGE}
+        )
+
+        # one tick per second on the Tk thread instead of three polling threads
+        self.tick()
 
     def start_move(self, event):
         self.offset_x = event.x
@@ -62,11 +86,21 @@ class FocusTimerUI:
         y = self.root.winfo_pointery() - self.offset_y
         self.root.geometry(f"+{x}+{y}")
 
-    def update_clock(self):
-        while True:
-            now = datetime.now().strftime("%H:%M:%S")
-            self.time_label.config(text=f"Current Time: {now}")
-            time.sleep(1)
+    def set_text(self, widget, **options):
+        if self.shown.get(widget) != options:
+            widget.config(**options)
+            self.shown[widget] = options
+
+    def tick(self):
+        try:
+            now = datetime.now()
+            self.set_text(self.time_label, text=f"Current Time: {now.strftime('%H:%M:%S')}")
+            self.refresh_timetable(now)
+            self.update_countdown(now)
+        except Exception as e:
+            print("UI error:", e)
+        # wake just after the next second boundary so the countdown never skips
+        self.root.after(1000 - datetime.now().microsecond // 1000 + 5, self.tick)
 
     def format_hms(self, seconds):
         h = int(seconds // 3600)
@@ -81,73 +115,77 @@ class FocusTimerUI:
             return "#ffaa00"
         return "#00ff88"
 
-    def watch_csv_updates(self):
-        last_task = ""
-        while True:
-            try:
-                df = pd.read_csv(CSV_PATH, dtype=str)
-                df = df.fillna("")  # remove NaN
-                today = datetime.now().date().isoformat()
-                rows = df[df["Date"] == today]
-
-                # to-do list
-                todos = []
-                for _, r in rows.iterrows():
-                    todos.append(f"- {r['StartTime']}–{r['EndTime']} | {r['SlotName']} [{r.get('Status','')}]")
-                todo_str = "\n".join(todos)
-                self.todo_text.configure(state="normal")
-                self.todo_text.delete(1.0, tk.END)
-                self.todo_text.insert(tk.END, todo_str)
-                self.todo_text.configure(state="disabled")
-
-                # active task
-                now = datetime.now()
-                active = None
-                for _, r in rows.iterrows():
-                    if not r["StartTime"] or not r["EndTime"]:
-                        continue
-                    start = datetime.strptime(r["StartTime"], "%H:%M").time()
-                    end = datetime.strptime(r["EndTime"], "%H:%M").time()
-                    start_dt = datetime.combine(now.date(), start)
-                    end_dt = datetime.combine(now.date(), end)
-                    if start_dt <= now < end_dt:
-                        active = (r, start_dt, end_dt)
-                        break
-
-                if active:
-                    r, start_dt, end_dt = active
-                    if last_task != r["SlotName"]:
-                        self.task_label.config(text=f"Current: {r['SlotName']}")
-                        last_task = r["SlotName"]
-
-                    remaining = (end_dt - now).total_seconds()
-                    color = self.color_for_time(remaining)
-                    self.timer_label.config(text=self.format_hms(remaining), fg=color)
-                else:
-                    self.task_label.config(text="No active slot")
-                    self.timer_label.config(text="--:--:--", fg="#00ff88")
-
-            except Exception as e:
-                print("UI error:", e)
-            time.sleep(1)
+    def refresh_timetable(self, now):
+        # reload only when the store reports a change, or the day rolls over
+        version = self.store.version()
+        if version == self.version and now.date() == self.day:
+            return
+        self.version = version
+        self.day = now.date()
+        slots = self.store.slots_for_date(self.day.isoformat())
+        self.slots = [slot for slot in slots if slot.timed]
+
+        todo_str = "\n".join(
+            f"- {format_hm(s.start)}–{format_hm(s.end)} | {s.name} [{s.status}]" if s.timed
+            else f"- – | {s.name} [{s.status}]"
+            for s in slots
+        )
+        if self.shown.get(self.todo_text) != todo_str:
+            self.todo_text.configure(state="normal")
+            self.todo_text.delete(1.0, tk.END)
+            self.todo_text.insert(tk.END, todo_str)
+            self.todo_text.configure(state="disabled")
+            self.shown[self.todo_text] = todo_str
+        self.update_stats()
+
+    def update_stats(self):
+        # read from the rollups, so this stays cheap however long the history is
+        try:
+            summary = self.analytics.summary(self.day)
+        except Exception as e:
+            print("Analytics error:", e)
+            return
+        today, streak = summary["today"], summary["streaks"]["current"]
+        self.set_text(self.stats_label, text=f"Today {today['done']}/{today['slots']} done · "
+                                             f"{today['minutes']} min · streak {streak} d")
+
+    def update_countdown(self, now):
+        second = now.hour * 3600 + now.minute * 60 + now.second
+        active = next((s for s in self.slots if s.start * 60 <= second < s.end * 60), None)
+
+        if active:
+            remaining = active.end * 60 - second
+            self.set_text(self.task_label, text=f"Current: {active.name}")
+            self.set_text(self.timer_label, text=self.format_hms(remaining), fg=self.color_for_time(remaining))
+        else:
+            self.set_text(self.task_label, text="No active slot")
+            self.set_text(self.timer_label, text="--:--:--", fg="#00ff88")
 
     def show_message(self, msg, duration=5):
+        # a newer message restarts the timeout instead of being cleared early
+        if self.msg_after is not None:
+            self.root.after_cancel(self.msg_after)
         self.msg_label.config(text=msg)
-        self.root.after(duration * 1000, lambda: self.msg_label.config(text=""))
-
-    def watch_messages(self):
-        last_message = ""
-        while True:
-            if os.path.isfile(MSG_FILE):
-                with open(MSG_FILE, "r", encoding="utf-8") as f:
-                    msg = f.read().strip()
-                if msg and msg != last_message:
-                    self.show_message(msg)
-                    last_message = msg
-            time.sleep(1)
+        self.msg_after = self.root.after(duration * 1000, self.clear_message)
+
+    def clear_message(self):
+        self.msg_after = None
+        self.msg_label.config(text="")
+
+    def on_event(self, event):
+        data = event.get("data") or {}
+        if data.get("profile", PROFILE) != PROFILE:
+            return      # someone else's timetable
+        if event.get("type") == event_bus.SLOT_COMPLETED:
+            self.version = None     # status changed: redraw the to-do list now
+        if data.get("message"):
+            self.show_message(data["message"])
 
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.bus.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,277 @@
+# multi_scheduler.py
+# One process driving many timetables (lab kiosks: one profile per person).
+# Every profile is a focus_pet_scheduler.Scheduler used only for its
+# non-blocking parts (timetable cache, slot lookup, row updates); the
+# pomodoro sequence itself is a small state machine whose steps sit on a
+# single timer heap served by one thread. Completion dialogs run on a
+# worker pool and post their answer back, so one person's open dialog
+# never holds up anyone else's phases.
+#
+#   python multi_scheduler.py [--profiles data/profiles] [--ask dialog|auto]
+#
+# Profiles are <name>.csv files in FOCUS_PROFILES_DIR (data/profiles by
+# default); with the SQLite backend each gets <name>.sqlite3 next to it.
+# Bus events carry data["profile"] so each person's timer can filter on it
+# (FOCUS_PROFILE=<name> python focus_pet_timer.py).
+import os
+import sys
+import time
+import heapq
+import argparse
+import itertools
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import event_bus
+from focus_pet_scheduler import Scheduler, WORK_MIN, BREAK_MIN, TIMETABLE_CHECK
+from timetable_store import PROFILES_DIR, list_profiles, open_profile_store, profile_paths
+
+ASK_WORKERS = int(os.getenv("MULTI_SCHEDULER_ASK_WORKERS", "4"))    # dialogs open at once
+RETRY_S = 5.0
+# -----------------------------------
+
+
+class TimerQueue:
+    # heap of (due, seq, fn, args); run() fires them in order on one thread
+    def __init__(self, clock=time.time, on_error=None):
+        # on_error(fn, args, exc) runs when a callback raises
+        self.clock = clock
+        self.on_error = on_error
+        self.cond = threading.Condition()
+        self.heap = []
+        self.seq = itertools.count()
+        self.stopped = False
+        self.fired = 0
+        self.max_late = 0.0
+
+    def call_at(self, due, fn, *args):
+        with self.cond:
+            heapq.heappush(self.heap, (due, next(self.seq), fn, args))
+            self.cond.notify()
+
+    def call_later(self, delay, fn, *args):
+        self.call_at(self.clock() + max(0.0, delay), fn, *args)
+
+    def post(self, fn, *args):
+        # thread-safe "run this on the scheduler thread now"
+        self.call_at(0.0, fn, *args)
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.stopped:
+                    now = self.clock()
+                    if self.heap and self.heap[0][0] <= now:
+                        due, _, fn, args = heapq.heappop(self.heap)
+                        break
+                    self.cond.wait(self.heap[0][0] - now if self.heap else None)
+                else:
+                    return
+            if due:
+                self.max_late = max(self.max_late, now - due)
+            self.fired += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                print("Scheduler error:", e)
+                if self.on_error is not None:
+                    try:
+                        self.on_error(fn, args, e)
+                    except Exception as e2:
+                        print("Scheduler error handler failed:", e2)
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        with self.cond:
+            return len(self.heap)
+
+
+class Profile:
+    # per-person state: the Scheduler (timetable cache) plus where in the
+    # pomodoro sequence this person is
+    __slots__ = ("name", "scheduler", "phase", "slot_id", "slot", "pomodoro", "count", "transitions")
+
+    def __init__(self, name, scheduler):
+        self.name = name
+        self.scheduler = scheduler
+        self.phase = "idle"     # idle | work | break | asking
+        self.slot_id = None
+        self.slot = None
+        self.pomodoro = 0
+        self.count = 0
+        self.transitions = 0
+
+
+class MultiScheduler:
+    def __init__(self, schedulers, ask=None, work_min=WORK_MIN, break_min=BREAK_MIN, clock=time.time):
+        # schedulers: {profile name: Scheduler}; ask(scheduler, slot_id) -> {"status", "comment"}
+        self.profiles = {name: Profile(name, s) for name, s in schedulers.items()}
+        self.ask = ask or (lambda scheduler, slot_id: scheduler.ask_task_completion(slot_id))
+        self.work_min = work_min
+        self.break_min = break_min
+        self.work_s = work_min * 60
+        self.break_s = break_min * 60
+        self.timers = TimerQueue(clock, on_error=self._step_failed)
+        self.asker = ThreadPoolExecutor(max_workers=ASK_WORKERS, thread_name_prefix="ask")
+        self.thread = None
+
+    # ---- state machine; every step runs on the timer thread ----
+    def check(self, p):
+        s = p.scheduler
+        idx, slot, remaining = s.find_slot_to_start()
+        if idx is None:
+            # until the next slot boundary, waking every TIMETABLE_CHECK
+            # seconds to notice edits (refresh() is a version compare)
+            self.timers.call_later(min(s.seconds_to_next_boundary(), TIMETABLE_CHECK), self.check, p)
+            return
+
+        count = int(remaining // (self.work_min + self.break_min))
+        if count == 0 and remaining >= self.work_min:
+            count = 1
+        if count == 0:
+            self.timers.call_later(s.seconds_to_next_boundary(), self.check, p)
+            return
+        p.slot_id, p.slot, p.count = idx, slot, count
+        self.start_work(p, 0)
+
+    def start_work(self, p, i):
+        p.phase, p.pomodoro = "work", i
+        p.transitions += 1
+        p.scheduler.notify(
+            event_bus.WORK_STARTED, f"WORK: {p.slot.name} ({i+1}/{p.count})",
+            slot=p.slot.name, pomodoro=i + 1, of=p.count, minutes=self.work_min
+        )
+        self.timers.call_later(self.work_s, self.end_work, p, i)
+
+    def end_work(self, p, i):
+        p.scheduler._update_logged_minutes(p.slot_id, self.work_min, pomodoros=1)
+        if i < p.count - 1:
+            p.phase = "break"
+            p.transitions += 1
+            p.scheduler.notify(
+                event_bus.BREAK_STARTED, f"BREAK: {self.break_min:g} minutes",
+                slot=p.slot.name, minutes=self.break_min
+            )
+            self.timers.call_later(self.break_s, self.end_break, p, i)
+        else:
+            p.phase = "asking"
+            self.asker.submit(self._ask, p)
+
+    def end_break(self, p, i):
+        p.scheduler._update_logged_minutes(p.slot_id, self.break_min)
+        self.start_work(p, i + 1)
+
+    def _ask(self, p):
+        # worker thread: may sit in a dialog for as long as the person likes
+        try:
+            result = self.ask(p.scheduler, p.slot_id)
+        except Exception as e:
+            print(f"Completion dialog failed ({p.name}):", e)
+            result = {"status": "", "comment": ""}
+        self.timers.post(self.answered, p, result)
+
+    def answered(self, p, result):
+        p.scheduler.update_row(
+            p.slot_id,
+            Status=result["status"],
+            Comments=result["comment"],
+            LastUpdated=datetime.now().isoformat()
+        )
+        p.scheduler.notify(
+            event_bus.SLOT_COMPLETED, f"{p.slot.name}: {result['status']}",
+            slot=p.slot.name, status=result["status"], comment=result["comment"]
+        )
+        p.phase, p.slot_id, p.slot = "idle", None, None
+        p.transitions += 1
+        self.timers.call_later(RETRY_S, self.check, p)
+
+    def _step_failed(self, fn, args, exc):
+        # a step raised (store locked, timetable unreadable, ...): without a
+        # follow-up timer this profile would stop for good, so drop the slot
+        # and look again after RETRY_S
+        p = args[0] if args and isinstance(args[0], Profile) else None
+        if p is None:
+            return
+        print(f"Profile {p.name}: retrying in {RETRY_S:g} s")
+        p.phase, p.slot_id, p.slot = "idle", None, None
+        self.timers.call_later(RETRY_S, self.check, p)
+
+    # ---- lifecycle ----
+    def start(self):
+        for p in self.profiles.values():
+            self.timers.post(self.check, p)
+        self.thread = threading.Thread(target=self.timers.run, name="multi-scheduler", daemon=True)
+        self.thread.start()
+        print(f"Multi-scheduler running {len(self.profiles)} profile(s)...")
+        return self
+
+    def run_forever(self):
+        self.start()
+        try:
+            while self.thread.is_alive():
+                self.thread.join(1.0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.timers.stop()
+        self.asker.shutdown(wait=False, cancel_futures=True)
+        for p in self.profiles.values():
+            p.scheduler.stop_event.set()
+            p.scheduler.store.close()
+        for bus in {id(p.scheduler.bus): p.scheduler.bus for p in self.profiles.values()}.values():
+            bus.close()
+
+    def stats(self):
+        phases = {}
+        for p in self.profiles.values():
+            phases[p.phase] = phases.get(p.phase, 0) + 1
+        return {
+            "profiles": len(self.profiles),
+            "phases": phases,
+            "timers_pending": len(self.timers),
+            "timers_fired": self.timers.fired,
+            "max_late_ms": round(self.timers.max_late * 1000, 2),
+            "transitions": sum(p.transitions for p in self.profiles.values()),
+        }
+
+
+def load_schedulers(names=None, profiles_dir=PROFILES_DIR, bus=None, backend=None):
+    # one Scheduler per profile, all publishing through one bus connection
+    bus = bus or event_bus.Bus("multi_scheduler")
+    schedulers = {}
+    for name in names or list_profiles(profiles_dir):
+        csv_path, _ = profile_paths(name, profiles_dir)
+        store = open_profile_store(name, profiles_dir=profiles_dir, **({"backend": backend} if backend else {}))
+        schedulers[name] = Scheduler(csv_path, store=store, bus=bus, profile=name)
+    return schedulers
+
+
+def auto_done(scheduler, slot_id):
+    # --ask auto: no dialog, every slot is marked done (unattended kiosks, benchmarks)
+    return {"status": "Done", "comment": "auto"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", default=PROFILES_DIR, help="directory of <name>.csv timetables")
+    parser.add_argument("--ask", choices=["dialog", "auto"], default="dialog")
+    args = parser.parse_args(argv)
+
+    schedulers = load_schedulers(profiles_dir=args.profiles)
+    if not schedulers:
+        print(f"No profiles found in {args.profiles}")
+        return 1
+    MultiScheduler(schedulers, ask=auto_done if args.ask == "auto" else None).run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
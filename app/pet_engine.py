@@ -0,0 +1,152 @@
+# pet_engine.py
+# The pet's behaviour without Tk: which animation plays, which frame is up,
+# where the pet stands, and when the screen next needs touching.
+# desktop_pet.py draws it; pet_sim.py runs it headless on a virtual clock.
+#
+# Times are integer milliseconds from any fixed origin. All wakeups land on
+# one fixed-rate grid (1000 / PET_FPS ms), frames last as long as their GIF
+# says (never less than the state's hold), and a still state (one frame, not
+# moving) rolls its repeats up front so the pet sleeps through them in a
+# single wait instead of waking to redraw the same frame.
+import os
+import random
+
+PET_FPS = int(os.getenv("PET_FPS", "20"))   # the frame clock; also how often a walking pet moves
+CATCH_UP_MS = 2000                          # behind by more than this (suspend, drag): skip ahead
+MAX_REPEATS = 1000
+
+# state -> shortest time a frame stays up (ms) and walking speed (px/s)
+STATES = {
+    "idle": {"hold_ms": 400, "speed": 0},
+    "idle_to_sleep": {"hold_ms": 0, "speed": 0},
+    "sleep": {"hold_ms": 10000, "speed": 0},    # long, slow breaths
+    "sleep_to_idle": {"hold_ms": 0, "speed": 0},
+    "walk_right": {"hold_ms": 0, "speed": 30},
+    "walk_left": {"hold_ms": 0, "speed": -30},
+}
+
+# Heavily weighted toward sleeping: after each loop of a state's GIF the
+# next state is drawn with these weights
+TRANSITIONS = {
+    "idle": {"idle": 3, "idle_to_sleep": 3, "sleep": 3},    # almost never idle
+    "idle_to_sleep": {"sleep": 1},                          # goes to sleep quickly
+    "sleep": {"sleep": 2, "sleep_to_idle": 3, "walk_left": 1},
+    "sleep_to_idle": {"idle": 1},
+    "walk_right": {"idle": 3, "idle_to_sleep": 3, "sleep": 3},
+    "walk_left": {"idle": 3, "idle_to_sleep": 3, "sleep": 3},
+}
+START = {"idle": 3, "idle_to_sleep": 3, "sleep": 5, "sleep_to_idle": 3, "walk_left": 2, "walk_right": 2}
+# -----------------------------------
+
+
+def _table(weights):
+    # (states, cumulative weights) for random.choices
+    states, cum, total = [], [], 0
+    for state, w in weights.items():
+        total += w
+        states.append(state)
+        cum.append(total)
+    return tuple(states), tuple(cum)
+
+
+CHOICES = {state: _table(w) for state, w in TRANSITIONS.items()}
+START_CHOICES = _table(START)
+
+
+class PetEngine:
+    def __init__(self, durations, x=0, y=0, screen_w=1920, width=100, now=0, rng=None, fps=PET_FPS, state=None,
+                 transitions=None):
+        # durations: {state: [GIF frame delay ms, ...]} for every state in STATES;
+        # transitions: weights in the TRANSITIONS layout, to try out other tables
+        self.frame_ms = {
+            s: [max(d, STATES[s]["hold_ms"]) for d in durations[s]] for s in STATES
+        }
+        self.rng = rng or random.Random()
+        self.choices = CHOICES if transitions is None else {s: _table(w) for s, w in {**TRANSITIONS, **transitions}.items()}
+        self.tick_ms = max(1, 1000 // fps)
+        self.x = float(x)
+        self.y = int(y)
+        self.screen_w = screen_w
+        self.width = width
+        self.moved_at = now
+        self.state = None
+        self.index = 0
+        self.due = now
+        self.after = None
+        self.repeats = 1
+        self.loops = 0
+        self._begin(state or self._pick(START_CHOICES), now)
+
+    def _pick(self, choices):
+        states, cum = choices
+        return self.rng.choices(states, cum_weights=cum)[0]
+
+    def still(self, state):
+        return len(self.frame_ms[state]) == 1 and not STATES[state]["speed"]
+
+    @property
+    def moving(self):
+        return STATES[self.state]["speed"] != 0
+
+    def _begin(self, state, at):
+        # start one loop of `state` at time `at` and decide what follows it
+        frames = self.frame_ms[state]
+        self.state, self.index, self.repeats = state, 0, 1
+        self.loops += 1
+        nxt = self._pick(self.choices[state])
+        if self.still(state):
+            # the same still frame again changes nothing on screen
+            while nxt == state and self.repeats < MAX_REPEATS:
+                self.repeats += 1
+                nxt = self._pick(self.choices[state])
+        self.after = nxt
+        self.due = at + frames[0] * self.repeats
+
+    def react(self, state, now):
+        # an outside event (focus bus) cuts the current animation short; the
+        # new loop is timed from the next grid tick so every pet stays on one clock
+        self._move(now)
+        self._begin(state, self._grid(now))
+
+    def _move(self, now):
+        speed = STATES[self.state]["speed"]
+        if speed:
+            self.x += speed * (now - self.moved_at) / 1000.0
+            if self.x < -self.width:
+                self.x = float(self.screen_w)
+            elif self.x > self.screen_w:
+                self.x = float(-self.width)
+        self.moved_at = now
+
+    def advance(self, now):
+        # bring frame, state and position up to `now`
+        if now - self.due > CATCH_UP_MS:
+            self.due = self._grid(now)
+            self.moved_at = now
+        while self.due <= now:
+            at = self.due
+            # movement runs up to each state change, so a walk stops where it ended
+            self._move(at)
+            self.index += 1
+            frames = self.frame_ms[self.state]
+            if self.index < len(frames):
+                self.due = at + frames[self.index]
+            else:
+                self._begin(self.after, at)
+        self._move(now)
+
+    def _grid(self, t):
+        return -(-t // self.tick_ms) * self.tick_ms
+
+    def next_wake(self, now):
+        # ms until the next grid tick on which something visible changes
+        t = self.due
+        if self.moving:
+            t = min(t, now + 1)
+        return max(1, self._grid(t) - now)
+
+    def position(self):
+        return int(self.x), self.y
+
+    def move_to(self, x, y):
+        self.x, self.y = float(x), int(y)
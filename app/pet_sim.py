@@ -0,0 +1,189 @@
+# pet_sim.py
+# The desktop pet without a desktop: the same PetEngine state machine and
+# the same scheduling rule as desktop_pet.PetHost (one clock, every pet
+# rendered per tick, sleep until the earliest pet needs it), run against a
+# virtual clock and a null renderer that only counts what Tk would have
+# been asked to do. Hours of pet behaviour take seconds.
+#
+#   python pet_sim.py [--hours 8] [--pets 1] [--seed 1] [--latency-ms 0]
+#                     [--reactions-per-hour 0] [--weights weights.json] [--json]
+#
+# weights.json uses the pet_engine.TRANSITIONS layout and may cover only
+# some states, e.g. {"sleep": {"sleep": 4, "sleep_to_idle": 1, "walk_left": 1}}.
+#
+# Reported:
+#   occupancy   share of time in each state, and each visit's dwell time
+#   jitter      how late frame boundaries are drawn compared to when they
+#               were due (grid rounding plus --latency-ms, which models a
+#               busy Tk loop firing timers late)
+#   cost        real CPU time per tick spent in the engine and renderer
+import sys
+import json
+import time
+import random
+import argparse
+
+from pet_engine import STATES, PetEngine
+from sprites import gif_durations, skin_files
+
+MAX_WAKE_MS = 60000     # PetHost's wait when nothing is due
+EVENTS = ["sleep_to_idle", "walk_right", "idle"]    # desktop_pet.REACTIONS targets
+# -----------------------------------
+
+
+def percentile(values, p):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+class NullPet:
+    # desktop_pet.Pet.render() with every Tk call replaced by a counter
+    def __init__(self, engine):
+        self.engine = engine
+        self.frame = None
+        self.pos = engine.position()
+        self.state = None
+        self.since = 0
+        self.frames_drawn = 0
+        self.moves = 0
+        self.state_changes = 0
+
+    def render(self, now, stats):
+        engine = self.engine
+        if now >= engine.due:
+            stats["late"].append(now - engine.due)
+        engine.advance(now)
+        if engine.state != self.state:
+            if self.state is not None:
+                stats["dwell"].setdefault(self.state, []).append(now - self.since)
+            self.state, self.since = engine.state, now
+            self.state_changes += 1
+        frame = (engine.state, engine.index)
+        if frame != self.frame:
+            self.frame = frame
+            self.frames_drawn += 1
+        pos = engine.position()
+        if pos != self.pos:
+            self.pos = pos
+            self.moves += 1
+        return engine.next_wake(now)
+
+
+def simulate(hours=8.0, pets=1, seed=1, latency_ms=0, reactions_per_hour=0, transitions=None, durations=None):
+    rng = random.Random(seed)
+    durations = durations or {s: gif_durations(p) for s, p in skin_files(STATES, "").items()}
+    flock = [
+        NullPet(PetEngine(durations, x=1800 - 120 * i, y=950, rng=random.Random(rng.random()), transitions=transitions))
+        for i in range(pets)
+    ]
+    end = int(hours * 3600 * 1000)
+    stats = {"late": [], "dwell": {}}
+    costs = []
+    reactions = 0
+    next_reaction = end + 1
+    if reactions_per_hour:
+        next_reaction = int(rng.expovariate(reactions_per_hour / 3600000.0))
+
+    now = ticks = 0
+    started = time.perf_counter()
+    while now < end:
+        if now >= next_reaction:
+            # a bus event: every pet reacts at once, like PetHost.react()
+            state = rng.choice(EVENTS)
+            for pet in flock:
+                pet.engine.react(state, now)
+            reactions += 1
+            next_reaction = now + max(1, int(rng.expovariate(reactions_per_hour / 3600000.0)))
+        t0 = time.perf_counter_ns()
+        wake = MAX_WAKE_MS
+        for pet in flock:
+            wake = min(wake, pet.render(now, stats))
+        costs.append(time.perf_counter_ns() - t0)
+        ticks += 1
+        now += min(wake + (rng.randint(0, latency_ms) if latency_ms else 0), end - now, max(1, next_reaction - now))
+    wall = time.perf_counter() - started
+
+    occupancy = {s: sum(v) for s, v in stats["dwell"].items()}
+    for pet in flock:       # visits still open at the end
+        occupancy[pet.state] = occupancy.get(pet.state, 0) + end - pet.since
+
+    total = end * pets
+    late = stats["late"]
+    simulated_s = end / 1000.0
+    return {
+        "hours": hours,
+        "pets": pets,
+        "seed": seed,
+        "wall_s": round(wall, 3),
+        "speedup": round(simulated_s / wall) if wall else None,
+        "ticks": ticks,
+        "ticks_per_s": round(ticks / simulated_s, 3),
+        "frames_per_s": round(sum(p.frames_drawn for p in flock) / simulated_s, 3),
+        "moves_per_s": round(sum(p.moves for p in flock) / simulated_s, 3),
+        "reactions": reactions,
+        "occupancy": {s: round(occupancy.get(s, 0) / total, 4) for s in STATES},
+        "dwell_s": {
+            s: {"visits": len(v), "mean": round(sum(v) / len(v) / 1000, 2),
+                "p50": round(percentile(v, 50) / 1000, 2), "p95": round(percentile(v, 95) / 1000, 2),
+                "max": round(max(v) / 1000, 2)}
+            for s, v in sorted(stats["dwell"].items())
+        },
+        "jitter_ms": {
+            "frames": len(late), "mean": round(sum(late) / len(late), 2) if late else 0,
+            "p95": percentile(late, 95), "p99": percentile(late, 99), "max": max(late) if late else 0,
+        },
+        "tick_us": {
+            "mean": round(sum(costs) / len(costs) / 1000, 2) if costs else 0,
+            "p50": round(percentile(costs, 50) / 1000, 2), "p99": round(percentile(costs, 99) / 1000, 2),
+            "per_pet_mean": round(sum(costs) / len(costs) / 1000 / pets, 2) if costs else 0,
+        },
+    }
+
+
+def print_report(r):
+    print(f"{r['pets']} pet(s), {r['hours']:g} h simulated in {r['wall_s']:.2f} s (x{r['speedup']}), seed {r['seed']}")
+    print(f"ticks {r['ticks_per_s']}/s   frames drawn {r['frames_per_s']}/s   window moves {r['moves_per_s']}/s"
+          f"   reactions {r['reactions']}")
+    print()
+    print(f"{'state':<14} {'time':>7} {'visits':>7} {'mean s':>8} {'p50 s':>7} {'p95 s':>7} {'max s':>8}")
+    for s in STATES:
+        d = r["dwell_s"].get(s, {"visits": 0, "mean": 0, "p50": 0, "p95": 0, "max": 0})
+        print(f"{s:<14} {r['occupancy'][s]:>6.1%} {d['visits']:>7} {d['mean']:>8.2f} {d['p50']:>7.2f} {d['p95']:>7.2f} {d['max']:>8.2f}")
+    print()
+    j, c = r["jitter_ms"], r["tick_us"]
+    print(f"jitter  mean {j['mean']} ms  p95 {j['p95']} ms  p99 {j['p99']} ms  max {j['max']} ms  ({j['frames']} frame boundaries)")
+    print(f"cost    {c['mean']} us/tick mean  p50 {c['p50']}  p99 {c['p99']}  ({c['per_pet_mean']} us per pet)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless desktop pet simulation")
+    parser.add_argument("--hours", type=float, default=8.0)
+    parser.add_argument("--pets", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=int, default=0, help="random 0..N ms added to every wakeup")
+    parser.add_argument("--reactions-per-hour", type=float, default=0, help="simulated focus events")
+    parser.add_argument("--weights", help="JSON transition weights to try instead of pet_engine.TRANSITIONS")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    transitions = None
+    if args.weights:
+        with open(args.weights, "r", encoding="utf-8") as f:
+            transitions = json.load(f)
+        unknown = {s for w in transitions.values() for s in w} | set(transitions)
+        unknown -= set(STATES)
+        if unknown:
+            parser.error(f"unknown states in {args.weights}: {', '.join(sorted(unknown))}")
+
+    r = simulate(args.hours, args.pets, args.seed, args.latency_ms, args.reactions_per_hour, transitions)
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print_report(r)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
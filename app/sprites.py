@@ -0,0 +1,316 @@
+# sprites.py
+# Pet animations as cached sprite sheets. Each GIF is decoded once (pure
+# Python, no Tk needed), scaled to the pet's size and written to
+# data/sprite_cache as one RGBA PNG strip plus a small JSON with the frame
+# size and durations, keyed by the GIF's hash and the size. After that a
+# start-up reads one PNG per animation it actually shows instead of
+# re-parsing a GIF once per frame.
+#
+# SpriteCache loads the idle animation eagerly and everything else on first
+# use, and drops cold animations (unused for PET_SPRITE_TTL_S, or least
+# recently used once PET_SPRITE_BUDGET_KB of decoded pixels is reached).
+#
+# Skins: PET_SKIN=<name> uses assets/skins/<name>/<animation>.gif, falling
+# back to the default cat for any animation the skin lacks; PET_SIZE sets
+# the pet's height in pixels, at any size (the width keeps the aspect).
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(BASE, "assets", "gifs")
+SKINS_DIR = os.path.join(BASE, "assets", "skins")
+CACHE_DIR = os.getenv("PET_SPRITE_CACHE", os.path.join(BASE, "data", "sprite_cache"))
+
+PET_SKIN = os.getenv("PET_SKIN", "")
+PET_SIZE = int(os.getenv("PET_SIZE", "100"))
+BUDGET_KB = int(os.getenv("PET_SPRITE_BUDGET_KB", "2048"))     # decoded RGBA pixels kept in Tk
+TTL_S = float(os.getenv("PET_SPRITE_TTL_S", "300"))
+HOT_S = 60.0
+DEFAULT_FRAME_MS = 100      # GIF frames with no usable delay (browsers do the same)
+SHEET_VERSION = 1           # bump when the sheet format changes
+# -----------------------------------
+
+
+def skin_files(names, skin=PET_SKIN):
+    # {animation: gif path} for a skin, the default cat filling any gaps
+    files = {}
+    for name in names:
+        path = os.path.join(SKINS_DIR, skin, f"{name}.gif") if skin else ""
+        if not os.path.isfile(path):
+            path = os.path.join(DEFAULT_DIR, f"{name}.gif")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"ERROR: Expected file for '{name}' not found: {path}")
+        files[name] = path
+    return files
+
+
+# ---- GIF ----
+def _blocks(data, pos):
+    # concatenated data sub-blocks starting at pos -> (bytes, next pos)
+    out = bytearray()
+    while data[pos]:
+        n = data[pos]
+        out += data[pos + 1:pos + 1 + n]
+        pos += n + 1
+    return bytes(out), pos + 1
+
+
+def _lzw(data, min_size, count):
+    # GIF LZW decoder -> list of colour indexes
+    clear, end = 1 << min_size, (1 << min_size) + 1
+    table = [bytes([i]) for i in range(clear)] + [b"", b""]
+    size = min_size + 1
+    out = bytearray()
+    prev = None
+    bits = nbits = 0
+    for byte in data:
+        bits |= byte << nbits
+        nbits += 8
+        while nbits >= size:
+            code = bits & ((1 << size) - 1)
+            bits >>= size
+            nbits -= size
+            if code == clear:
+                table = table[:end + 1]
+                size = min_size + 1
+                prev = None
+                continue
+            if code == end:
+                return out[:count]
+            if prev is None:
+                entry = table[code]
+            elif code < len(table):
+                entry = table[code]
+                table.append(prev + entry[:1])
+            else:
+                entry = prev + prev[:1]
+                table.append(entry)
+            out += entry
+            prev = entry
+            if len(table) == 1 << size and size < 12:
+                size += 1
+    return out[:count]
+
+
+def _palette(data, pos, flags):
+    n = 3 << ((flags & 7) + 1)
+    raw = data[pos:pos + n]
+    return [tuple(raw[i:i + 3]) for i in range(0, n, 3)], pos + n
+
+
+def gif_durations(path, default_ms=DEFAULT_FRAME_MS):
+    # per-frame delays (ms) from the graphic control extensions; a header
+    # scan, no decoding
+    return _read_gif(path, decode=False, default_ms=default_ms)[2]
+
+
+def decode_gif(path, default_ms=DEFAULT_FRAME_MS):
+    # -> (width, height, durations, frames as RGBA bytes), frames composited
+    # the way a browser shows them (disposal methods 1-3)
+    return _read_gif(path, decode=True, default_ms=default_ms)
+
+
+def _read_gif(path, decode=True, default_ms=DEFAULT_FRAME_MS):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:3] != b"GIF":
+        raise ValueError(f"{path}: not a GIF")
+    width, height, flags = struct.unpack_from("<HHB", data, 6)
+    pos = 13
+    global_pal = None
+    if flags & 0x80:
+        global_pal, pos = _palette(data, pos, flags)
+
+    canvas = bytearray(width * height * 4)      # transparent
+    frames, durations = [], []
+    delay, disposal, transparent = None, 0, None
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x21:                       # extension
+            label = data[pos + 1]
+            pos += 2
+            if label == 0xF9 and data[pos] >= 4:
+                packed, delay, index = struct.unpack_from("<BHB", data, pos + 1)
+                disposal = (packed >> 2) & 7
+                transparent = index if packed & 1 else None
+            _, pos = _blocks(data, pos)
+        elif block == 0x2C:                     # image
+            left, top, w, h, iflags = struct.unpack_from("<HHHHB", data, pos + 1)
+            pos += 10
+            pal = global_pal
+            if iflags & 0x80:
+                pal, pos = _palette(data, pos, iflags)
+            min_size = data[pos]
+            raw, pos = _blocks(data, pos + 1)
+            durations.append(delay * 10 if delay and delay > 1 else default_ms)
+            if decode:
+                before = bytes(canvas) if disposal == 3 else None
+                pixels = _lzw(raw, min_size, w * h)
+                rows = list(range(h))
+                if iflags & 0x40:               # interlaced: rows arrive in four passes
+                    rows = list(range(0, h, 8)) + list(range(4, h, 8)) + list(range(2, h, 4)) + list(range(1, h, 2))
+                for src_row, y in enumerate(rows):
+                    if not 0 <= top + y < height:
+                        continue
+                    for x in range(w):
+                        i = src_row * w + x
+                        if i >= len(pixels) or not 0 <= left + x < width:
+                            continue
+                        c = pixels[i]
+                        if c == transparent or pal is None or c >= len(pal):
+                            continue
+                        o = ((top + y) * width + left + x) * 4
+                        canvas[o:o + 4] = bytes((*pal[c], 255))
+                frames.append(bytes(canvas))
+                if disposal == 2:               # restore to background (transparent)
+                    for y in range(max(0, top), min(height, top + h)):
+                        o = (y * width + max(0, left)) * 4
+                        canvas[o:o + (min(width, left + w) - max(0, left)) * 4] = bytes((min(width, left + w) - max(0, left)) * 4)
+                elif disposal == 3:             # restore to previous
+                    canvas[:] = before
+            delay, disposal, transparent = None, 0, None
+        else:                                   # 0x3B trailer, or garbage
+            break
+    return width, height, durations, frames
+
+
+def scale(rgba, w, h, new_w, new_h):
+    # nearest neighbour; pixel-art pets stay crisp
+    if (w, h) == (new_w, new_h):
+        return rgba
+    xs = [(x * w // new_w) * 4 for x in range(new_w)]
+    out = bytearray(new_w * new_h * 4)
+    o = 0
+    for y in range(new_h):
+        row = (y * h // new_h) * w * 4
+        for sx in xs:
+            out[o:o + 4] = rgba[row + sx:row + sx + 4]
+            o += 4
+    return bytes(out)
+
+
+def write_png(path, width, height, rgba):
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+    stride = width * 4
+    raw = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 9)))
+        f.write(chunk(b"IEND", b""))
+
+
+# ---- sheets on disk ----
+def sheet_paths(gif_path, size, cache_dir=CACHE_DIR):
+    with open(gif_path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:16]
+    stem = os.path.join(cache_dir, f"{digest}-{size}-v{SHEET_VERSION}")
+    return stem + ".png", stem + ".json"
+
+
+def build_sheet(gif_path, size=PET_SIZE, cache_dir=CACHE_DIR):
+    # -> meta; decodes only when the sheet for this GIF and size is missing
+    png, meta_path = sheet_paths(gif_path, size, cache_dir)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if os.path.isfile(png):
+            return dict(meta, sheet=png)
+    except (OSError, ValueError):
+        pass
+
+    w, h, durations, frames = decode_gif(gif_path)
+    if not frames:
+        raise ValueError(f"{gif_path}: no frames")
+    fh = size
+    fw = max(1, round(w * size / h))
+    frames = [scale(f, w, h, fw, fh) for f in frames]
+    # one horizontal strip: row y of the sheet is row y of every frame in turn
+    stride = fw * 4
+    sheet = b"".join(f[y * stride:(y + 1) * stride] for y in range(fh) for f in frames)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = {"source": os.path.basename(gif_path), "width": fw, "height": fh,
+            "frames": len(frames), "durations": durations}
+    tmp = png + ".tmp"
+    write_png(tmp, fw * len(frames), fh, sheet)
+    os.replace(tmp, png)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    return dict(meta, sheet=png)
+
+
+class SpriteCache:
+    # Tk frames per animation, loaded from the sheets on demand
+    def __init__(self, files, size=PET_SIZE, master=None, eager=("idle",), budget_kb=BUDGET_KB,
+                 ttl_s=TTL_S, cache_dir=CACHE_DIR, clock=time.monotonic):
+        self.files = files
+        self.size = size
+        self.master = master
+        self.budget = budget_kb * 1024
+        self.ttl_s = ttl_s
+        self.cache_dir = cache_dir
+        self.clock = clock
+        self.pinned = set(eager)
+        self.loaded = {}        # name -> [PhotoImage]
+        self.used = {}          # name -> last use, in clock() time
+        self.meta = {}
+        self.loads = 0
+        self.evictions = 0
+        for name in eager:
+            self.frames(name)
+
+    def durations(self):
+        # {animation: [ms, ...]}; a header scan, nothing is decoded
+        return {name: gif_durations(path) for name, path in self.files.items()}
+
+    def frame_size(self):
+        meta = self._meta(next(iter(self.pinned or self.files)))
+        return meta["width"], meta["height"]
+
+    def _meta(self, name):
+        if name not in self.meta:
+            self.meta[name] = build_sheet(self.files[name], self.size, self.cache_dir)
+        return self.meta[name]
+
+    def frames(self, name):
+        self.used[name] = self.clock()
+        if name not in self.loaded:
+            self.loaded[name] = self._load(self._meta(name))
+            self.loads += 1
+            self.trim(keep=name)
+        return self.loaded[name]
+
+    def _load(self, meta):
+        import tkinter as tk
+        sheet = tk.PhotoImage(master=self.master, file=meta["sheet"])
+        w, h = meta["width"], meta["height"]
+        frames = []
+        for i in range(meta["frames"]):
+            frame = tk.PhotoImage(master=self.master, width=w, height=h)
+            frame.tk.call(frame, "copy", sheet, "-from", i * w, 0, (i + 1) * w, h, "-compositingrule", "set")
+            frames.append(frame)
+        return frames
+
+    def resident_bytes(self):
+        return sum(self.meta[n]["width"] * self.meta[n]["height"] * 4 * len(f) for n, f in self.loaded.items())
+
+    def trim(self, keep=None):
+        # drop animations unused for ttl_s, then the least recently used
+        # until the budget fits; pinned ones, `keep` and anything shown in
+        # the last HOT_S stay, so a big skin cannot thrash between reloads
+        now = self.clock()
+        cold = [n for n in self.loaded if n not in self.pinned and n != keep]
+        cold.sort(key=lambda n: self.used.get(n, 0))
+        for name in cold:
+            idle = now - self.used.get(name, 0)
+            if idle < self.ttl_s and (idle < HOT_S or self.resident_bytes() <= self.budget):
+                break
+            del self.loaded[name]
+            self.evictions += 1
@@ -1,51 +1,255 @@
-# generate_timetable_xlsx.py
-import pandas as pd
-from datetime import datetime, timedelta
+# timetable.py
+# Timetable generator: expands recurrence rules into focus_timetable rows
+# for any date range and streams them straight to CSV, XLSX or Parquet.
+#
+#   python timetable.py                                   (this month, default slots)
+#   python timetable.py --month 2025-11 --weekdays-only --exclude 2025-11-27
+#   python timetable.py --start 2025-11-01 --years 10 -o data/focus_timetable.parquet
+#   python timetable.py --rules rules.json --start 2026-01-01 --end 2026-06-30 --merge
+#   python timetable.py --slot "DSA|15:00|17:00|Mon-Fri" --slot "Gym|18:00|19:00|Sat,Sun" --store
+#
+# rules.json:
+#   {"slots": [{"name": "DSA", "start": "15:00", "end": "17:00", "days": "Mon-Fri"}, ...],
+#    "weekdays_only": false, "exclude": ["2025-12-25"]}
+# "days" is a list or a spec like "Mon-Fri", "Sat,Sun", "weekdays", "all"
+# (the default). End 00:00 means midnight; an end before the start crosses
+# midnight and is written as two rows (start-00:00, then 00:00-end on the
+# next day), so the scheduler never sees a wrapped slot.
+#
+# --merge merges into the output file and --store into timetable_store
+# (what the scheduler reads). Both keep every logged row (status,
+# pomodoros, minutes or a comment) and everything outside the generated
+# range; only untouched rows inside the range that the rules no longer
+# produce are removed, and new rows are added after the existing ones.
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date, timedelta
 
-OUT = "focus_timetable.xlsx"
+from timetable_model import parse_hm, read_rows, write_rows, normalize_row
 
-# Config: month / year and the four daily slots you used in the PDF
-YEAR = 2025
-MONTH = 11
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE, "data")
+OUT = os.path.join(DATA_DIR, "focus_timetable.csv")
 
+# the four daily slots used so far
 SLOTS = [
     {"name": "Applications", "start": "08:00", "end": "12:00"},
     {"name": "DSA", "start": "15:00", "end": "17:00"},
     {"name": "Course Module", "start": "21:30", "end": "22:30"},
-    {"name": "Personal Project", "start": "22:30", "end": "00:00"},  # note: crosses midnight handling below
+    {"name": "Personal Project", "start": "22:30", "end": "00:00"},
 ]
+DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+DAY_SETS = {"all": range(7), "weekdays": range(5), "weekends": range(5, 7)}
+# -----------------------------------
+
+
+def parse_days(spec):
+    # "Mon-Fri", "Sat,Sun", ["Mon", "Wed"], "weekdays", None (every day)
+    if spec is None or spec == "":
+        return set(range(7))
+    parts = spec if isinstance(spec, (list, tuple)) else str(spec).replace("/", ",").split(",")
+    days = set()
+    for part in parts:
+        part = str(part).strip()
+        key = part.lower()
+        if key in DAY_SETS:
+            days.update(DAY_SETS[key])
+        elif "-" in part:
+            a, b = (DAY_NAMES.index(p.strip()[:3].title()) for p in part.split("-", 1))
+            days.update((a + k) % 7 for k in range((b - a) % 7 + 1))
+        else:
+            days.add(DAY_NAMES.index(part[:3].title()))
+    return days
+
+
+def parse_slot_arg(text):
+    # "Name|08:00|12:00[|Mon-Fri]"
+    parts = text.split("|")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"expected Name|HH:MM|HH:MM[|days], got {text!r}")
+    slot = {"name": parts[0].strip(), "start": parts[1].strip(), "end": parts[2].strip()}
+    if len(parts) == 4:
+        slot["days"] = parts[3].strip()
+    return slot
+
+
+def compile_rules(slots):
+    # per weekday: rows starting that day, and the after-midnight halves
+    # that land on the following day
+    same_day = [[] for _ in range(7)]
+    next_day = [[] for _ in range(7)]
+    for slot in slots:
+        start, end = slot["start"], slot["end"]
+        s, e = parse_hm(start), parse_hm(end)
+        crosses = e != 0 and e <= s
+        for wd in parse_days(slot.get("days")):
+            if crosses:
+                same_day[wd].append((start, "00:00", slot["name"]))
+                next_day[wd].append(("00:00", end, slot["name"]))
+            else:
+                same_day[wd].append((start, end, slot["name"]))
+    for rows in same_day + next_day:
+        rows.sort()
+    return same_day, next_day
+
+
+def _row(iso, day_name, start, end, name):
+    return {"Date": iso, "DayName": day_name, "SlotName": name, "StartTime": start, "EndTime": end,
+            "Status": "", "PomodorosCompleted": 0, "LoggedMinutes": 0, "Comments": "", "LastUpdated": ""}
+
+
+def generate(slots, start, end, weekdays_only=False, exclude=()):
+    # streams rows in date order; nothing is held beyond one day
+    same_day, next_day = compile_rules(slots)
+    exclude = {str(d) for d in exclude}
+    carry = []
+    for ordinal in range(start.toordinal(), end.toordinal() + 1):
+        d = date.fromordinal(ordinal)
+        iso, wd = d.isoformat(), d.weekday()
+        day_name = DAY_NAMES[wd]
+        # the second half of last night's slot belongs to it, so it is
+        # written even when today itself is skipped
+        for s, e, name in carry:
+            yield _row(iso, day_name, s, e, name)
+        carry = []
+        if (weekdays_only and wd >= 5) or iso in exclude:
+            continue
+        for s, e, name in same_day[wd]:
+            yield _row(iso, day_name, s, e, name)
+        carry = next_day[wd]
+    if carry:
+        d = end + timedelta(days=1)
+        for s, e, name in carry:
+            yield _row(d.isoformat(), DAY_NAMES[d.weekday()], s, e, name)
+
+
+def is_logged(row):
+    return bool(row["Status"] or row["PomodorosCompleted"] or row["LoggedMinutes"] or row["Comments"])
+
+
+def merge(existing, generated, start, end):
+    # -> (ids of rows to delete, rows to add). Logged rows and rows outside
+    # [start, end] are never touched; an unlogged row the rules still produce
+    # stays as it is (same id), the other unlogged rows in the range go.
+    # A generated row is added when no surviving row has its date, name and start.
+    generated = list(generated)     # main() passes the streaming generator; read twice below
+    first, last = start.isoformat(), end.isoformat()
+    key = lambda r: (r["Date"], r["SlotName"], r["StartTime"])
+    wanted = {key(r): r for r in generated}
+    taken = {key(r) for r in existing if is_logged(r) or not first <= r["Date"] <= last}
+    stale = []
+    for r in existing:
+        if is_logged(r) or not first <= r["Date"] <= last:
+            continue
+        g = wanted.get(key(r))
+        if g is not None and key(r) not in taken and g["EndTime"] == r["EndTime"]:
+            taken.add(key(r))
+        else:
+            stale.append(r["id"])
+    return stale, [r for r in generated if key(r) not in taken]
+
+
+def load_rules(args):
+    rules = {"slots": SLOTS, "weekdays_only": False, "exclude": []}
+    if args.rules:
+        with open(args.rules, "r", encoding="utf-8") as f:
+            rules.update(json.load(f))
+    if args.slot:
+        rules["slots"] = args.slot
+    rules["weekdays_only"] = rules.get("weekdays_only") or args.weekdays_only
+    exclude = set(rules.get("exclude") or []) | set(args.exclude or [])
+    if args.exclude_file:
+        with open(args.exclude_file, "r", encoding="utf-8") as f:
+            exclude.update(line.split("#")[0].strip() for line in f if line.split("#")[0].strip())
+    rules["exclude"] = exclude
+    return rules
+
+
+def date_range(args):
+    if args.month:
+        year, month = map(int, args.month.split("-"))
+        start = date(year, month, 1)
+        nxt = date(year + month // 12, month % 12 + 1, 1)
+        return start, nxt - timedelta(days=1)
+    start = date.fromisoformat(args.start) if args.start else date.today().replace(day=1)
+    if args.end:
+        return start, date.fromisoformat(args.end)
+    if args.years:
+        try:
+            stop = start.replace(year=start.year + args.years)
+        except ValueError:      # 29 Feb
+            stop = start.replace(year=start.year + args.years, day=28)
+        return start, stop - timedelta(days=1)
+    nxt = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, nxt - timedelta(days=1)
+
+
+def write_output(args, rows, start, end):
+    # returns (target, rows added, existing rows removed); target None = refused
+    if args.store:
+        from timetable_store import open_store
+        store = open_store()
+        try:
+            stale, added = merge(store.rows(), rows, start, end)
+            store.merge_rows(stale, [normalize_row(r) for r in added])
+        finally:
+            store.close()
+        return "timetable store", len(added), len(stale)
+    if args.merge and os.path.isfile(args.out):
+        existing = read_rows(args.out)
+        for i, r in enumerate(existing):
+            r["id"] = i
+        stale, added = merge(existing, rows, start, end)
+        # existing rows keep their order, new ones go at the end
+        drop = set(stale)
+        kept = [r for r in existing if r["id"] not in drop]
+        write_rows(args.out, kept + added)
+        return args.out, len(added), len(stale)
+    if os.path.isfile(args.out) and not (args.force or args.merge):
+        return None, 0, 0
+    return args.out, write_rows(args.out, rows), 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate focus timetable rows from recurrence rules")
+    parser.add_argument("--start", help="first date (YYYY-MM-DD), default: first of this month")
+    parser.add_argument("--end", help="last date (YYYY-MM-DD)")
+    parser.add_argument("--years", type=int, help="instead of --end: this many years from --start")
+    parser.add_argument("--month", help="YYYY-MM, shorthand for that whole month")
+    parser.add_argument("--rules", help="JSON file with slots / weekdays_only / exclude")
+    parser.add_argument("--slot", action="append", type=parse_slot_arg, help='"Name|HH:MM|HH:MM[|days]", repeatable')
+    parser.add_argument("--weekdays-only", action="store_true")
+    parser.add_argument("--exclude", action="append", help="YYYY-MM-DD to skip, repeatable")
+    parser.add_argument("--exclude-file", help="holidays: one YYYY-MM-DD per line")
+    parser.add_argument("-o", "--out", default=OUT, help=".csv, .xlsx or .parquet")
+    parser.add_argument("--merge", action="store_true", help="merge into --out, keeping logged rows")
+    parser.add_argument("--store", action="store_true", help="merge into timetable_store instead of a file")
+    parser.add_argument("--force", action="store_true", help="overwrite --out")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args)
+    start, end = date_range(args)
+    if end < start:
+        parser.error("--end is before --start")
+    rows = generate(rules["slots"], start, end, rules["weekdays_only"], rules["exclude"])
+
+    t0 = time.perf_counter()
+    try:
+        target, written, replaced = write_output(args, rows, start, end)
+    except ImportError as e:
+        print(f"{args.out}: this format needs {e.name} (pip install {e.name})")
+        return 1
+    if target is None:
+        print(f"{args.out} exists; use --merge to keep logged rows or --force to overwrite")
+        return 1
+    elapsed = time.perf_counter() - t0
+    print(f"{start} .. {end}: wrote {written} rows to {target} in {elapsed:.2f} s"
+          + (f" ({replaced} unlogged rows removed)" if replaced else ""))
+    return 0
 
-def make_rows(year, month):
-    first = datetime(year, month, 1)
-    # find number of days in month
-    if month == 12:
-        next_month = datetime(year + 1, 1, 1)
-    else:
-        next_month = datetime(year, month + 1, 1)
-    days = (next_month - first).days
-    rows = []
-    for d in range(days):
-        date = first + timedelta(days=d)
-        for slot in SLOTS:
-            start = datetime.strptime(slot["start"], "%H:%M").time()
-            end = datetime.strptime(slot["end"], "%H:%M").time()
-            # if end == 00:00 treat as midnight next day
-            rows.append({
-                "Date": date.date().isoformat(),
-                "DayName": date.strftime("%a"),
-                "SlotName": slot["name"],
-                "StartTime": slot["start"],
-                "EndTime": slot["end"],
-                "Status": "",  # Done / Not Done
-                "PomodorosCompleted": 0,
-                "LoggedMinutes": 0,
-                "Comments": "",
-                "LastUpdated": ""
-            })
-    return rows
 
 if __name__ == "__main__":
-    rows = make_rows(YEAR, MONTH)
-    df = pd.DataFrame(rows)
-    df.to_excel(OUT, index=False)
-    print(f"Created {OUT} with {len(df)} slot rows.")
+    sys.exit(main())
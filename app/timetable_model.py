@@ -0,0 +1,226 @@
+# timetable_model.py
+# The timetable without pandas: CSV/XLSX parsing and serialization for the
+# focus_timetable columns, and a compact Slot record with times as integer
+# minutes since midnight. The scheduler, the timer and timetable_store all
+# share it; openpyxl / pyarrow are only imported for .xlsx / .parquet files.
+import os
+import csv
+from datetime import datetime
+
+COLUMNS = ["Date", "DayName", "SlotName", "StartTime", "EndTime", "Status",
+           "PomodorosCompleted", "LoggedMinutes", "Comments", "LastUpdated"]
+INT_COLUMNS = {"PomodorosCompleted", "LoggedMinutes"}
+DAY_MINUTES = 1440
+# -----------------------------------
+
+
+def to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_hm(hm):
+    h, m = map(int, hm.split(":"))
+    return h * 60 + m
+
+
+def format_hm(minutes):
+    minutes %= DAY_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def minute_of_day(now):
+    return now.hour * 60 + now.minute
+
+
+def normalize_row(raw):
+    row = {}
+    for col in COLUMNS:
+        value = raw.get(col, "")
+        if value is None or value != value:     # None / NaN from spreadsheets
+            value = ""
+        row[col] = to_int(value) if col in INT_COLUMNS else str(value).strip()
+    return row
+
+
+def _ext(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def read_rows(path):
+    # rows from a .csv, .xlsx (openpyxl), .parquet (pyarrow) or legacy .xls (pandas) file
+    ext = _ext(path)
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True)
+        values = wb.active.iter_rows(values_only=True)
+        header = [str(h) if h is not None else "" for h in next(values, ())]
+        records = [dict(zip(header, v)) for v in values]
+        wb.close()
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+        records = pq.read_table(path).to_pylist()
+    elif ext == ".xls":
+        import pandas as pd
+        records = pd.read_excel(path, dtype=str).fillna("").to_dict("records")
+    else:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+    return [normalize_row(r) for r in records]
+
+
+def write_rows(path, rows):
+    # rows may be any iterable (a generator streams straight to disk);
+    # atomic: readers see the old file or the new one, never half of it
+    ext = _ext(path)
+    tmp = path + ".tmp"
+    count = 0
+    if ext == ".xlsx":
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(COLUMNS)
+        for r in rows:
+            ws.append([r[c] for c in COLUMNS])
+            count += 1
+        wb.save(tmp)
+    elif ext == ".parquet":
+        count = _write_parquet(tmp, rows)
+    else:
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for r in rows:
+                writer.writerow([r[c] for c in COLUMNS])
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+def _write_parquet(path, rows, batch=65536):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([(c, pa.int64() if c in INT_COLUMNS else pa.string()) for c in COLUMNS])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        chunk = []
+        for r in rows:
+            chunk.append(r)
+            if len(chunk) >= batch:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                count += len(chunk)
+                chunk = []
+        if chunk or not count:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+
+class Slot:
+    # one timetable row; start/end are minutes since midnight, an EndTime of
+    # 00:00 is stored as 1440 (the slot runs to midnight). start/end are None
+    # when the row has no usable times.
+    __slots__ = ("id", "date", "day_name", "name", "start", "end", "status",
+                 "pomodoros", "logged", "comments", "last_updated")
+
+    # CSV column -> attribute, for the columns that map one to one
+    FIELDS = {"Date": "date", "DayName": "day_name", "SlotName": "name", "Status": "status",
+              "PomodorosCompleted": "pomodoros", "LoggedMinutes": "logged",
+              "Comments": "comments", "LastUpdated": "last_updated"}
+
+    def __init__(self, id, date, name, start, end, day_name="", status="",
+                 pomodoros=0, logged=0, comments="", last_updated=""):
+        self.id = id
+        self.date = date
+        self.day_name = day_name
+        self.name = name
+        self.start = start
+        self.end = end
+        self.status = status
+        self.pomodoros = pomodoros
+        self.logged = logged
+        self.comments = comments
+        self.last_updated = last_updated
+
+    @classmethod
+    def from_row(cls, row):
+        try:
+            start = parse_hm(row["StartTime"])
+            end = DAY_MINUTES if row["EndTime"] == "00:00" else parse_hm(row["EndTime"])
+        except (ValueError, AttributeError, KeyError):
+            start = end = None
+        return cls(
+            row.get("id"), row["Date"], row["SlotName"], start, end,
+            day_name=row.get("DayName", ""), status=row.get("Status", ""),
+            pomodoros=to_int(row.get("PomodorosCompleted")), logged=to_int(row.get("LoggedMinutes")),
+            comments=row.get("Comments", ""), last_updated=row.get("LastUpdated", "")
+        )
+
+    def to_row(self):
+        row = {col: getattr(self, attr) for col, attr in self.FIELDS.items()}
+        row["StartTime"] = format_hm(self.start) if self.start is not None else ""
+        row["EndTime"] = format_hm(self.end) if self.end is not None else ""
+        row = {col: row[col] for col in COLUMNS}
+        row["id"] = self.id
+        return row
+
+    def apply(self, fields):
+        # mirror a store.update(**fields) on the cached record
+        for col, value in fields.items():
+            setattr(self, self.FIELDS[col], to_int(value) if col in INT_COLUMNS else str(value))
+
+    @property
+    def timed(self):
+        return self.start is not None
+
+    @property
+    def done(self):
+        return self.status.strip().lower() == "done"
+
+    def contains(self, minute):
+        return self.timed and self.start <= minute < self.end
+
+    def __repr__(self):
+        times = f"{format_hm(self.start)}-{format_hm(self.end)}" if self.timed else "untimed"
+        return f"Slot({self.id!r}, {self.date} {self.name!r} {times})"
+
+
+class Timetable:
+    # every slot, indexed by ISO date; file order is kept within a day
+    def __init__(self, slots=()):
+        self.by_date = {}
+        for slot in slots:
+            self.by_date.setdefault(slot.date, []).append(slot)
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(Slot.from_row(r) for r in rows)
+
+    @classmethod
+    def load(cls, path):
+        rows = read_rows(path)
+        for i, r in enumerate(rows):
+            r["id"] = i
+        return cls.from_rows(rows)
+
+    def save(self, path):
+        write_rows(path, [s.to_row() for s in self])
+
+    def for_date(self, date):
+        if isinstance(date, datetime):
+            date = date.date()
+        return self.by_date.get(str(date), [])
+
+    def dates(self):
+        return sorted(self.by_date)
+
+    def __iter__(self):
+        for slots in self.by_date.values():
+            yield from slots
+
+    def __len__(self):
+        return sum(len(s) for s in self.by_date.values())
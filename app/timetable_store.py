@@ -0,0 +1,307 @@
+# timetable_store.py
+# Storage backends for the focus timetable. The scheduler and the timer
+# only ask for "today's rows" and "update these fields of one row", so the
+# file format is pluggable:
+#   SqliteStore - default; WAL mode, index on Date, one UPDATE per change,
+#                 readers always see a committed state
+#   CsvStore    - the original focus_timetable.csv, rewritten atomically
+#                 (temp file + rename) on every update
+# Rows are plain dicts keyed by the CSV columns plus "id"; slots_for_date()
+# wraps them in timetable_model.Slot records.
+#
+#   python timetable_store.py import data/focus_timetable.csv   (or .xlsx / .parquet)
+#   python timetable_store.py export data/focus_timetable.csv   (or .xlsx / .parquet)
+import os
+import sys
+import sqlite3
+import threading
+
+from timetable_model import COLUMNS, INT_COLUMNS, Slot, to_int, normalize_row, read_rows, write_rows
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE, "data")
+
+# FOCUS_TIMETABLE / FOCUS_TIMETABLE_DB move them, e.g. for benchmarks that must not touch data/
+TIMETABLE_CSV = os.getenv("FOCUS_TIMETABLE", os.path.join(DATA_DIR, "focus_timetable.csv"))
+TIMETABLE_DB = os.getenv("FOCUS_TIMETABLE_DB", os.path.join(DATA_DIR, "focus_timetable.sqlite3"))
+BACKEND = os.getenv("TIMETABLE_BACKEND", "sqlite")     # sqlite | csv
+# one <name>.csv (+ <name>.sqlite3) per person on shared machines, see multi_scheduler.py
+PROFILES_DIR = os.getenv("FOCUS_PROFILES_DIR", os.path.join(DATA_DIR, "profiles"))
+
+# what the scheduler writes back; the plan columns are only changed by import
+UPDATABLE = {"Status", "PomodorosCompleted", "LoggedMinutes", "Comments", "LastUpdated"}
+# -----------------------------------
+
+
+class TimetableStore:
+    def rows(self):
+        raise NotImplementedError
+
+    def rows_for_date(self, date):
+        raise NotImplementedError
+
+    def slots_for_date(self, date):
+        return [Slot.from_row(r) for r in self.rows_for_date(date)]
+
+    def update(self, row_id, **fields):
+        raise NotImplementedError
+
+    def version(self):
+        # changes whenever the stored rows change, from any process
+        raise NotImplementedError
+
+    def replace_all(self, rows):
+        raise NotImplementedError
+
+    def merge_rows(self, delete_ids, rows):
+        # drop these rows and add new ones; every other row keeps its id
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def get(self, row_id):
+        for r in self.rows():
+            if r["id"] == row_id:
+                return r
+        return None
+
+    def import_file(self, path):
+        rows = read_rows(path)
+        self.replace_all(rows)
+        return len(rows)
+
+    def export_file(self, path):
+        rows = self.rows()
+        write_rows(path, rows)
+        return len(rows)
+
+
+class SqliteStore(TimetableStore):
+    def __init__(self, db_path=TIMETABLE_DB, seed_path=None):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._writes = 0
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS slots ("
+            " id INTEGER PRIMARY KEY,"
+            " Date TEXT NOT NULL,"
+            " DayName TEXT NOT NULL DEFAULT '',"
+            " SlotName TEXT NOT NULL DEFAULT '',"
+            " StartTime TEXT NOT NULL DEFAULT '',"
+            " EndTime TEXT NOT NULL DEFAULT '',"
+            " Status TEXT NOT NULL DEFAULT '',"
+            " PomodorosCompleted INTEGER NOT NULL DEFAULT 0,"
+            " LoggedMinutes INTEGER NOT NULL DEFAULT 0,"
+            " Comments TEXT NOT NULL DEFAULT '',"
+            " LastUpdated TEXT NOT NULL DEFAULT '')"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_slots_date ON slots(Date)")
+        self._db.commit()
+        # first run: start from the existing CSV so nothing is lost
+        if seed_path and os.path.isfile(seed_path) and self.count() == 0:
+            n = self._seed(read_rows(seed_path))
+            if n:
+                print(f"Timetable store: imported {n} rows from {seed_path}")
+
+    def _select(self, where="", params=()):
+        with self.lock:
+            cur = self._db.execute(f"SELECT id, {', '.join(COLUMNS)} FROM slots {where} ORDER BY id", params)
+            return [dict(r) for r in cur.fetchall()]
+
+    def rows(self):
+        return self._select()
+
+    def rows_for_date(self, date):
+        return self._select("WHERE Date = ?", (str(date),))
+
+    def get(self, row_id):
+        found = self._select("WHERE id = ?", (int(row_id),))
+        return found[0] if found else None
+
+    def count(self):
+        with self.lock:
+            return self._db.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+
+    def query(self, sql, params=()):
+        # read-only helper for modules keeping their own tables here (analytics.py)
+        with self.lock:
+            return [dict(r) for r in self._db.execute(sql, params).fetchall()]
+
+    def script(self, sql):
+        # several statements in one IMMEDIATE transaction
+        # (executescript commits anything pending first, so BEGIN goes in the script)
+        with self.lock:
+            try:
+                self._db.executescript(f"BEGIN IMMEDIATE;\n{sql}\nCOMMIT;")
+            except Exception:
+                if self._db.in_transaction:
+                    self._db.rollback()
+                raise
+
+    def update(self, row_id, **fields):
+        bad = set(fields) - UPDATABLE
+        if bad:
+            raise KeyError(f"not updatable: {sorted(bad)}")
+        if not fields:
+            return
+        cols = sorted(fields)
+        values = [to_int(fields[c]) if c in INT_COLUMNS else str(fields[c]) for c in cols]
+        with self.lock:
+            self._db.execute(
+                f"UPDATE slots SET {', '.join(c + ' = ?' for c in cols)} WHERE id = ?",
+                values + [int(row_id)]
+            )
+            self._db.commit()
+            self._writes += 1
+
+    def _insert(self, rows):
+        self._db.executemany(
+            f"INSERT INTO slots ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [[r[c] for c in COLUMNS] for r in rows]
+        )
+
+    def _seed(self, rows):
+        # the scheduler and the timer may start together; the write lock
+        # makes sure only one of them imports
+        with self.lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._db.execute("SELECT COUNT(*) FROM slots").fetchone()[0]:
+                    self._db.rollback()
+                    return 0
+                self._insert(rows)
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+            self._writes += 1
+        return len(rows)
+
+    def replace_all(self, rows):
+        with self.lock:
+            with self._db:
+                self._db.execute("DELETE FROM slots")
+                self._insert(rows)
+            self._writes += 1
+
+    def merge_rows(self, delete_ids, rows):
+        # row-level statements in one transaction; rows that stay keep their ids
+        if not delete_ids and not rows:
+            return
+        with self.lock:
+            with self._db:
+                self._db.executemany("DELETE FROM slots WHERE id = ?", [(int(i),) for i in delete_ids])
+                self._insert(rows)
+            self._writes += 1
+
+    def version(self):
+        # data_version moves when another connection commits; our own
+        # commits are counted separately
+        with self.lock:
+            return (self._db.execute("PRAGMA data_version").fetchone()[0], self._writes)
+
+    def close(self):
+        with self.lock:
+            self._db.close()
+
+
+class CsvStore(TimetableStore):
+    # the original file format; every update rewrites the whole file
+    def __init__(self, path=TIMETABLE_CSV):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def _load(self):
+        rows = read_rows(self.path)
+        for i, r in enumerate(rows):
+            r["id"] = i
+        return rows
+
+    def rows(self):
+        with self.lock:
+            return self._load()
+
+    def rows_for_date(self, date):
+        return [r for r in self.rows() if r["Date"] == str(date)]
+
+    def update(self, row_id, **fields):
+        bad = set(fields) - UPDATABLE
+        if bad:
+            raise KeyError(f"not updatable: {sorted(bad)}")
+        with self.lock:
+            rows = self._load()
+            row = rows[int(row_id)]
+            for col, value in fields.items():
+                row[col] = to_int(value) if col in INT_COLUMNS else str(value)
+            write_rows(self.path, rows)
+
+    def replace_all(self, rows):
+        with self.lock:
+            write_rows(self.path, [normalize_row(r) for r in rows])
+
+    def merge_rows(self, delete_ids, rows):
+        # ids are positions: rows after a deleted one move up
+        if not delete_ids and not rows:
+            return
+        drop = {int(i) for i in delete_ids}
+        with self.lock:
+            kept = [r for r in self._load() if r["id"] not in drop]
+            write_rows(self.path, kept + [normalize_row(r) for r in rows])
+
+    def version(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+
+def open_store(backend=BACKEND, csv_path=TIMETABLE_CSV, db_path=TIMETABLE_DB):
+    if backend == "csv":
+        return CsvStore(csv_path)
+    return SqliteStore(db_path, seed_path=csv_path)
+
+
+def profile_paths(name, profiles_dir=PROFILES_DIR):
+    base = os.path.join(profiles_dir, name)
+    return base + ".csv", base + ".sqlite3"
+
+
+def list_profiles(profiles_dir=PROFILES_DIR):
+    try:
+        names = os.listdir(profiles_dir)
+    except OSError:
+        return []
+    return sorted(n[:-4] for n in names if n.lower().endswith(".csv"))
+
+
+def open_profile_store(name, backend=BACKEND, profiles_dir=PROFILES_DIR):
+    csv_path, db_path = profile_paths(name, profiles_dir)
+    return open_store(backend, csv_path=csv_path, db_path=db_path)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] not in ("import", "export"):
+        print("Usage: python timetable_store.py import|export <file.csv|file.xlsx|file.parquet>")
+        return 2
+    command, path = argv
+    store = open_store(csv_path=None) if BACKEND != "csv" else open_store()
+    if command == "import":
+        print(f"Imported {store.import_file(path)} rows from {path}")
+    else:
+        print(f"Exported {store.export_file(path)} rows to {path}")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
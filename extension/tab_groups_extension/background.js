@@ -1,10 +1,8 @@
 // background.js (module)
-// Poll-control extension that syncs tab-groups and responds to local server commands.
+// Control extension that syncs tab-groups and responds to local server commands.
 // Key: stores groups under chrome.storage.local.tab_groups
 
 const CONTROL_SERVER = "http://127.0.0.1:5050"; // control server address
-const POLL_INTERVAL_MS = 1500;
-let lastCmdId = null;
 
 // Utility wrappers
 const tabsQuery = (q) => new Promise(r => chrome.tabs.query(q, r));
@@ -122,58 +120,79 @@ async function saveCurrentWindowAsGroup(taskName) {
   }
 }
 
-// Poll control server for pending command
-let busy = false;
+// Long-poll the control server: one request parked on GET /command until a
+// command arrives (or WAIT_S passes), so idle traffic is one request per
+// WAIT_S instead of one per 1.5 s, and commands land within milliseconds.
+const WAIT_S = 25;
+const RETRY_MS = 3000;        // back off this long when the server is down
+let lastSeq = 0;              // cursor: highest command seq handled
+let polling = false;
+
+const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+
+async function ackCommand(id, result) {
+  const res = await fetch(CONTROL_SERVER + "/ack", {
+    method: "POST",
+    headers: {"Content-Type": "application/json"},
+    body: JSON.stringify({ id, result })
+  });
+  // a 5xx means the ack was not recorded; the caller keeps its cursor
+  if (res.status >= 500) throw new Error("ack failed: " + res.status);
+}
+
+async function runCommand(cmd) {
+  const name = cmd.payload?.name;
+  if (cmd.action === "open_group") {
+    return name ? await openGroupByName(name) : { ok: false, error: "missing name" };
+  } else if (cmd.action === "save_group") {
+    return name ? await saveCurrentWindowAsGroup(name) : { ok: false, error: "missing name" };
+  }
+  // unknown: ack so it won't loop
+  return { ok: false, error: "unknown action" };
+}
+
 async function pollLoop() {
-  if (busy) return;
-  busy = true;
-  try {
-    const res = await fetch(CONTROL_SERVER + "/command", { cache: "no-cache" });
-    const j = await res.json();
-    if (j && j.pending) {
-      const cmd = j.pending;
-      if (cmd.id !== lastCmdId) {
-        lastCmdId = cmd.id;
-        if (cmd.action === "open_group") {
-          const name = cmd.payload?.name;
-          if (name) {
-            const ok = await openGroupByName(name);
-            // ack
-            await fetch(CONTROL_SERVER + "/ack", {
-              method: "POST",
-              headers: {"Content-Type": "application/json"},
-              body: JSON.stringify({ id: cmd.id, result: ok })
-            });
-          }
-        } else if (cmd.action === "save_group") {
-          const name = cmd.payload?.name;
-          if (name) {
-            const ok = await saveCurrentWindowAsGroup(name);
-            await fetch(CONTROL_SERVER + "/ack", {
-              method: "POST",
-              headers: {"Content-Type": "application/json"},
-              body: JSON.stringify({ id: cmd.id, result: ok })
-            });
-          }
-        } else {
-          // unknown: ack so it won't loop
-          await fetch(CONTROL_SERVER + "/ack", {
-            method: "POST",
-            headers: {"Content-Type": "application/json"},
-            body: JSON.stringify({ id: cmd.id, result: { ok: false, error: "unknown action" } })
-          });
+  if (polling) return;
+  polling = true;
+  while (true) {
+    try {
+      const res = await fetch(
+        CONTROL_SERVER + "/command?wait=" + WAIT_S + "&after=" + lastSeq,
+        { cache: "no-cache" }
+      );
+      const j = await res.json();
+      // the server restarted and its seq counter with it: start over
+      if (j && typeof j.last_seq === "number" && j.last_seq < lastSeq) {
+        lastSeq = 0;
+        continue;
+      }
+      // commands arrive in order; each is acked before the next runs, and
+      // the cursor only moves past a command once its ack went through, so
+      // a failed ack gets the command delivered again
+      for (const cmd of (j && j.commands) || []) {
+        let result;
+        try {
+          result = await runCommand(cmd);
+        } catch (e) {
+          result = { ok: false, error: String(e) };
         }
+        await ackCommand(cmd.id, result);
+        lastSeq = Math.max(lastSeq, cmd.seq);
       }
+    } catch (e) {
+      // server might be down - wait a bit and reconnect
+      await sleep(RETRY_MS);
     }
-  } catch (e) {
-    // server might be down - ignore
-    // console.warn("poll error", e);
-  } finally {
-    busy = false;
   }
 }
 
 // initial sync and periodic tasks
 //syncGroupsToStorage();
 //setInterval(syncGroupsToStorage, 5000);  // keep storage updated
-setInterval(pollLoop, POLL_INTERVAL_MS); // poll control server
+pollLoop();
+// the service worker can be stopped while idle; the alarm wakes it and
+// restarts the loop (a no-op while it is still running)
+chrome.alarms.create("control-poll", { periodInMinutes: 1 });
+chrome.alarms.onAlarm.addListener((alarm) => {
+  if (alarm.name === "control-poll") pollLoop();
+});
@@ -0,0 +1,378 @@
+# bench_check.py
+# Load test for focus_server's /check. Starts the fake OpenRouter endpoint
+# (fake_openrouter.py) and a fresh focus_server per concurrency level, then
+# replays a corpus of page payloads shaped like the ones content_script.js
+# dumpText sends, and reports latency percentiles, throughput and how many
+# upstream calls were made.
+#
+#   python scripts/bench/bench_check.py [--concurrency 1,8,32] [--requests 300]
+#          [--latency-ms 400] [--error-rate 0.02] [--malformed-rate 0.02]
+#          [--corpus export.jsonl] [--out run.json] [--compare baseline.json]
+#
+# --corpus takes any JSON-lines file of {domain, title, snippet}, e.g. the
+# output of `classifier_cli.py export`; without it a synthetic corpus is
+# generated from a fixed seed. --url benchmarks an already running server
+# instead (point its OPENROUTER_URL at --fake-port to get upstream counts).
+# The JSON written by --out is stable across runs, so two versions can be
+# compared with --compare or a plain diff.
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit
+
+import fake_openrouter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SERVER_DIR = os.path.join(ROOT, "server")
+
+# same list content_script.js strips before sending
+JS_STOPWORDS = {
+    "the", "a", "an", "and", "or", "is", "are", "was", "were", "to", "of", "in",
+    "that", "this", "it", "for", "on", "with", "as", "by", "be", "at", "from",
+    "your", "you", "i", "we", "they", "their", "our", "but", "if", "not",
+    "can", "will", "just", "up", "out", "about", "into", "so", "no", "yes",
+}
+
+# (domain, title template, vocabulary) per kind of site
+SITES = [
+    ("github.com", "{a}/{b}: {c} {d} library", "code"),
+    ("stackoverflow.com", "How to {c} a {d} in {a}? - Stack Overflow", "code"),
+    ("docs.python.org", "{c} — {d} objects — Python 3.12 documentation", "code"),
+    ("developer.mozilla.org", "{c} {d} - Web APIs | MDN", "code"),
+    ("en.wikipedia.org", "{a} {d} - Wikipedia", "study"),
+    ("arxiv.org", "[2406.{n}] {c} {d} for {a} models", "study"),
+    ("medium.com", "Why {a} {c} is the {d} you need", "study"),
+    ("www.coursera.org", "{a} {d} | Coursera", "study"),
+    ("www.youtube.com", "{a} {c} {d} compilation - YouTube", "fun"),
+    ("www.netflix.com", "Watch {a} {d} | Netflix", "fun"),
+    ("www.reddit.com", "r/{a} - {c} {d} thread", "fun"),
+    ("x.com", "{a} on X: \"{c} {d}\"", "fun"),
+    ("www.amazon.in", "{a} {d} {c} : Amazon.in: Electronics", "shop"),
+    ("www.instagram.com", "{a} (@{b}) • Instagram photos and videos", "fun"),
+    ("news.ycombinator.com", "{a} {c} {d} | Hacker News", "study"),
+]
+
+VOCAB = {
+    "code": ("python function class return value list dict async await thread lock "
+             "request response server client cache query index compile error stack "
+             "trace build test deploy commit branch merge pull review install package "
+             "module import parse json yaml docker kubernetes api endpoint").split(),
+    "study": ("theorem proof lecture chapter abstract method results experiment model "
+              "training dataset evaluation baseline gradient neural network attention "
+              "history economics biology chemistry analysis study notes exam").split(),
+    "fun": ("episode season trailer watch next like share subscribe comment reply meme "
+            "funny video clip stream live reaction trending celebrity game highlights "
+            "music playlist shorts reels story followers").split(),
+    "shop": ("price offer deal discount cart buy delivery rating review stars seller "
+             "bestseller warranty return exchange emi coupon prime").split(),
+}
+BOILERPLATE = "Sign in Menu Home Search Skip to content Privacy Terms Cookies Settings Help".split()
+
+
+def js_clean_snippet(text):
+    # mirror of content_script.js cleanSnippet
+    return " ".join(w for w in text.split() if w and w.lower() not in JS_STOPWORDS)[:1500]
+
+
+def make_page(rng):
+    domain, title_tpl, kind = rng.choice(SITES)
+    vocab = VOCAB[kind]
+    pick = lambda: rng.choice(vocab)
+    title = title_tpl.format(a=pick().title(), b=pick(), c=pick(), d=pick(), n=rng.randint(10000, 99999))
+    words = BOILERPLATE[:rng.randint(3, len(BOILERPLATE))]
+    for _ in range(rng.randint(60, 400)):
+        words.append(rng.choice(vocab) if rng.random() < 0.7 else rng.choice(("the", "a", "of", "and", "to", "is", "for")))
+        if rng.random() < 0.08:
+            words.append("\n")
+    return {"domain": domain, "title": title, "snippet": js_clean_snippet(" ".join(words))}
+
+
+def load_corpus(path):
+    pages = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            pages.append({"domain": row.get("domain", ""), "title": row.get("title", ""),
+                          "snippet": row.get("snippet", "")})
+    return pages
+
+
+def replay_sequence(pages, count, repeat, rng):
+    # request order: mostly new pages, `repeat` of the time a page seen
+    # before (tab switches, reloads), which is what the caches feed on
+    seq, seen = [], []
+    fresh = iter(pages * (count // max(1, len(pages)) + 1))
+    for _ in range(count):
+        if seen and rng.random() < repeat:
+            seq.append(rng.choice(seen))
+        else:
+            page = next(fresh)
+            seen.append(page)
+            seq.append(page)
+    return seq
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(host, port, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+class FocusServer:
+    # a fresh focus_server under serve.py, with its own empty data dir so
+    # each level starts from cold caches
+    def __init__(self, upstream_url, args):
+        extra = dict(kv.split("=", 1) for kv in args.server_env)
+        self.port = free_port()
+        self.data_dir = tempfile.mkdtemp(prefix="focus-bench-")
+        env = dict(os.environ)
+        env.update({
+            "OPENROUTER_URL": upstream_url,
+            "OPENROUTER_API_KEY": env.get("OPENROUTER_API_KEY", "bench"),
+            "FOCUS_DATA_DIR": self.data_dir,
+            "FOCUS_LOG_MODE": "off",
+        })
+        env.update(extra)
+        # output goes to a file, not a pipe nobody drains mid-run
+        self.log = tempfile.TemporaryFile(mode="w+")
+        self.proc = subprocess.Popen(
+            [sys.executable, "serve.py", "focus", "--port", str(self.port), "--threads", str(args.server_threads)],
+            cwd=SERVER_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT, text=True
+        )
+        if not wait_for("127.0.0.1", self.port):
+            self.stop()
+            self.log.seek(0)
+            raise RuntimeError("focus_server did not start: " + self.log.read()[-2000:])
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def scrape_metrics(base_url):
+    # the handful of focus_server /metrics series worth keeping per run
+    wanted = ("focus_verdicts_total", "focus_llm_malformed_total", "focus_upstream_attempts_total",
+              "focus_batches", "focus_batched_items", "focus_singleflight_saved",
+              "focus_cache_hits", "focus_cache_misses")
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+    try:
+        conn.request("GET", "/metrics")
+        text = conn.getresponse().read().decode("utf-8")
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+    out = {}
+    for line in text.splitlines():
+        if line.startswith("#") or not line.startswith(wanted):
+            continue
+        name, _, value = line.rpartition(" ")
+        out[name] = float(value)
+    return out
+
+
+def run_level(base_url, sequence, concurrency, timeout):
+    parts = urlsplit(base_url)
+    latencies, errors, actions, tiers = [], 0, {}, {}
+    lock = threading.Lock()
+    jobs = iter(sequence)
+
+    def worker():
+        nonlocal errors
+        # one keep-alive connection per simulated client
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        while True:
+            with lock:
+                page = next(jobs, None)
+            if page is None:
+                break
+            body = json.dumps(page)
+            started = time.perf_counter()
+            try:
+                conn.request("POST", "/check", body, {"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                data = json.loads(resp.read())
+                ok = resp.status == 200
+            except (OSError, ValueError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+                ok, data = False, {}
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+                    continue
+                action, tier = data.get("action", "?"), data.get("tier", "?")
+                actions[action] = actions.get(action, 0) + 1
+                tiers[tier] = tiers.get(tier, 0) + 1
+        conn.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(sequence),
+        "errors": errors,
+        "elapsed_s": round(wall, 3),
+        "throughput_rps": round(len(sequence) / wall, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(sum(latencies) / len(latencies), 2),
+            "max": round(latencies[-1], 2),
+        },
+        "actions": dict(sorted(actions.items())),
+        "tiers": dict(sorted(tiers.items())),
+    }
+
+
+def compare(old, new):
+    # per-level deltas of the headline numbers, new vs old
+    old_levels = {lv["concurrency"]: lv for lv in old.get("levels", [])}
+    print(f"{'conc':>5} {'metric':<16} {'old':>10} {'new':>10} {'change':>8}", file=sys.stderr)
+    for lv in new["levels"]:
+        before = old_levels.get(lv["concurrency"])
+        if before is None:
+            continue
+        rows = [("throughput_rps", before["throughput_rps"], lv["throughput_rps"])]
+        rows += [(f"{p}_ms", before["latency_ms"][p], lv["latency_ms"][p]) for p in ("p50", "p95", "p99")]
+        rows.append(("upstream_calls", before["upstream"].get("calls"), lv["upstream"].get("calls")))
+        for name, a, b in rows:
+            change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else "n/a"
+            print(f"{lv['concurrency']:>5} {name:<16} {a!s:>10} {b!s:>10} {change:>8}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test focus_server /check against a fake OpenRouter")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated client counts, one run each")
+    parser.add_argument("--requests", type=int, default=300, help="requests per concurrency level")
+    parser.add_argument("--repeat", type=float, default=0.3, help="fraction of requests revisiting an earlier page")
+    parser.add_argument("--corpus", help="JSON lines of {domain, title, snippet}; synthetic if omitted")
+    parser.add_argument("--corpus-size", type=int, default=500, help="pages in the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="fake upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--chunk-ms", type=float, default=15.0, help="fake upstream delay between streamed deltas")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--url", help="benchmark this running server instead of starting one per level")
+    parser.add_argument("--fake-port", type=int, default=0, help="fixed port for the fake upstream (with --url)")
+    parser.add_argument("--server-threads", type=int, default=32)
+    parser.add_argument("--server-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra environment for the spawned focus_server, e.g. OPENROUTER_STREAM=0")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        pages = [make_page(rng) for _ in range(args.corpus_size)]
+    sequence = replay_sequence(pages, args.requests, args.repeat, rng)
+
+    fake = fake_openrouter.FakeConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                                      args.malformed_rate, args.chunk_ms, args.seed)
+    fake_server, upstream_url = fake_openrouter.start(fake, port=args.fake_port)
+
+    report = {
+        "config": {
+            "requests": args.requests,
+            "repeat": args.repeat,
+            "corpus": args.corpus or f"synthetic:{args.corpus_size}:seed{args.seed}",
+            "unique_pages": len({(p["domain"], p["title"], p["snippet"]) for p in sequence}),
+            "fake_upstream": {
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "chunk_ms": args.chunk_ms,
+                "error_rate": args.error_rate,
+                "malformed_rate": args.malformed_rate,
+            },
+            "server_env": sorted(args.server_env),
+        },
+        "levels": [],
+    }
+
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+            server = None if args.url else FocusServer(upstream_url, args)
+            base_url = args.url or server.url
+            fake.reset()
+            try:
+                level = run_level(base_url, sequence, concurrency, args.timeout)
+                level["upstream"] = fake.snapshot()
+                level["server_metrics"] = scrape_metrics(base_url)
+            finally:
+                if server is not None:
+                    server.stop()
+            report["levels"].append(level)
+            lat = level["latency_ms"]
+            print(f"conc {concurrency:>3}: {level['throughput_rps']:7.1f} req/s  "
+                  f"p50 {lat['p50']:7.1f}  p95 {lat['p95']:7.1f}  p99 {lat['p99']:7.1f} ms  "
+                  f"upstream calls {level['upstream']['calls']:>4}  errors {level['errors']}",
+                  file=sys.stderr)
+    finally:
+        fake_server.shutdown()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
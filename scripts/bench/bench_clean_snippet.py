@@ -0,0 +1,109 @@
+# bench_clean_snippet.py
+# Import time and per-snippet cost of the old NLTK-based clean_snippet
+# against text_clean.clean_snippet, on page-sized texts.
+#
+#   python scripts/bench/bench_clean_snippet.py [--size 100000] [--runs 50] [--json]
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SERVER_DIR = os.path.join(ROOT, "server")
+sys.path.insert(0, SERVER_DIR)
+
+import text_clean  # noqa: E402
+
+WORDS = ("the quick python function returns a list of tuples while you and i are "
+         "reading about distributed systems and it is not clear which of these "
+         "algorithms will scale <s> kubernetes </s> café naïve résumé — “quoted” "
+         "leetcode problem two sum hash map array").split()
+
+
+def legacy_clean_snippet(snippet, stopwords):
+    # the pre-text_clean implementation, kept verbatim for comparison
+    if not snippet:
+        return ""
+    snippet = snippet.replace("<s>", "").replace("</s>", "")
+    snippet = re.sub(r'[^ -~]', ' ', snippet)
+    snippet = " ".join(snippet.split())
+    snippet = " ".join([w for w in snippet.split() if w.lower() not in stopwords])
+    return snippet[:1500]
+
+
+def make_page(size, rng):
+    parts, n = [], 0
+    while n < size:
+        w = rng.choice(WORDS)
+        sep = rng.choice(" \n\t  ")
+        parts.append(w + sep)
+        n += len(w) + 1
+    return "".join(parts)[:size]
+
+
+def time_import(code):
+    # fresh interpreter each run so nothing is already imported
+    out = subprocess.run(
+        [sys.executable, "-c",
+         "import time; t = time.perf_counter()\n" + code + "\nprint(time.perf_counter() - t)"],
+        cwd=SERVER_DIR, capture_output=True, text=True, timeout=120
+    )
+    if out.returncode != 0:
+        return None
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def per_call(fn, arg, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn(arg)
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000, help="page text size in characters")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    stop = text_clean.get_stopwords()
+    rng = random.Random(0)
+    pages = {"page": make_page(args.size, rng), "snippet": make_page(1500, rng)}
+
+    results = {
+        "import_s": {
+            "nltk": time_import("from nltk.corpus import stopwords\nset(stopwords.words('english'))"),
+            "text_clean": time_import("import text_clean\ntext_clean.get_stopwords()"),
+        },
+        "per_call_ms": {},
+    }
+    for name, text in pages.items():
+        assert legacy_clean_snippet(text, stop) == text_clean.clean_snippet(text), name
+        results["per_call_ms"][name] = {
+            "chars": len(text),
+            "legacy": per_call(lambda t: legacy_clean_snippet(t, stop), text, args.runs) * 1000,
+            "single_pass": per_call(text_clean.clean_snippet, text, args.runs) * 1000,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    imp = results["import_s"]
+    fmt = lambda v: "n/a (nltk or its data missing)" if v is None else f"{v * 1000:8.1f} ms"
+    print("import + stopword load")
+    print(f"  nltk        {fmt(imp['nltk'])}")
+    print(f"  text_clean  {fmt(imp['text_clean'])}")
+    for name, r in results["per_call_ms"].items():
+        print(f"clean_snippet on {name} ({r['chars']} chars)")
+        print(f"  legacy      {r['legacy']:8.3f} ms")
+        print(f"  single pass {r['single_pass']:8.3f} ms  ({r['legacy'] / r['single_pass']:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
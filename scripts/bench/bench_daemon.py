@@ -0,0 +1,162 @@
+# bench_daemon.py
+# Startup time and resident memory of the multi-process layout (focus
+# server, control server and scheduler as three interpreters) against
+# `serve.py daemon` (all three in one). The Tk UIs are left out of both:
+# they are separate processes either way and need a display.
+#
+#   python scripts/bench/bench_daemon.py [--runs 3] [--json]
+#
+# "ready" = both HTTP ports accept connections, one /check and one
+# /command have been answered, and the scheduler has loaded the timetable.
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SERVER_DIR = os.path.join(ROOT, "server")
+APP_DIR = os.path.join(ROOT, "app")
+
+SCHEDULER_ONLY = ("import focus_pet_scheduler as s; "
+                  "s.Scheduler(s.TIMETABLE).run_loop()")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid):
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss // 1024
+    except ImportError:
+        pass
+    with open(f"/proc/{pid}/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class Proc:
+    # child process whose stdout is watched for a marker line
+    def __init__(self, cmd, cwd, env, marker):
+        self.marker = marker
+        self.seen = threading.Event()
+        self.proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT, text=True)
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def _watch(self):
+        for line in self.proc.stdout:
+            if self.marker and self.marker in line:
+                self.seen.set()
+
+    def stop(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+def request_ok(port, method, path, body=None, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request(method, path, body, {"Content-Type": "application/json"})
+            ok = conn.getresponse().status == 200
+            conn.close()
+            if ok:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.02)
+    return False
+
+
+def wait_ready(procs, focus_port, control_port):
+    check = json.dumps({"domain": "www.netflix.com", "title": "t", "snippet": "s"})    # answered by the rules
+    ok = request_ok(focus_port, "POST", "/check", check, timeout=60)
+    ok = ok and request_ok(control_port, "GET", "/command", timeout=60)
+    for p in procs:
+        if p.marker:
+            ok = ok and p.seen.wait(60)
+    return ok
+
+
+def run_layout(layout, settle):
+    data_dir = tempfile.mkdtemp(prefix="focus-daemon-bench-")
+    # a copy of the timetable, so the scheduler loads the same rows as a real run
+    shutil.copy(os.path.join(APP_DIR, "data", "focus_timetable.csv"), data_dir)
+    focus_port, control_port = free_port(), free_port()
+    # everything the children write goes to data_dir: server data, the
+    # timetable store and the bus's message file; the bus gets a port of its own
+    env = dict(os.environ, FOCUS_DATA_DIR=data_dir, FOCUS_LOG_MODE="off", PYTHONUNBUFFERED="1",
+               OPENROUTER_API_KEY=os.environ.get("OPENROUTER_API_KEY", "bench"),
+               FOCUS_PORT=str(focus_port), CONTROL_PORT=str(control_port),
+               FOCUS_BUS_PORT=str(free_port()),
+               FOCUS_MESSAGE_FILE=os.path.join(data_dir, "focus_ui_message.txt"),
+               FOCUS_TIMETABLE=os.path.join(data_dir, "focus_timetable.csv"),
+               FOCUS_TIMETABLE_DB=os.path.join(data_dir, "focus_timetable.sqlite3"))
+    serve = [sys.executable, "serve.py"]
+    started = time.perf_counter()
+    if layout == "multi":
+        procs = [
+            Proc(serve + ["focus", "--port", str(focus_port)], SERVER_DIR, env, None),
+            Proc(serve + ["control", "--port", str(control_port)], SERVER_DIR, env, None),
+            Proc([sys.executable, "-c", SCHEDULER_ONLY], APP_DIR, env, "Scheduler running"),
+        ]
+    else:
+        procs = [Proc(serve + ["daemon"], SERVER_DIR, env, "Scheduler running")]
+    try:
+        if not wait_ready(procs, focus_port, control_port):
+            raise RuntimeError(f"{layout} layout did not become ready")
+        ready_s = time.perf_counter() - started
+        time.sleep(settle)
+        rss = sum(rss_kb(p.proc.pid) for p in procs)
+    finally:
+        for p in procs:
+            p.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return {"processes": len(procs), "ready_s": round(ready_s, 3), "rss_mb": round(rss / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--settle", type=float, default=1.0, help="seconds to wait before reading RSS")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    results = {}
+    for layout in ("multi", "daemon"):
+        runs = [run_layout(layout, args.settle) for _ in range(args.runs)]
+        results[layout] = {
+            "processes": runs[0]["processes"],
+            "ready_s": min(r["ready_s"] for r in runs),
+            "rss_mb": round(sum(r["rss_mb"] for r in runs) / len(runs), 1),
+            "runs": runs,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'layout':<8} {'procs':>5} {'ready (best)':>13} {'RSS total':>10}")
+    for layout, r in results.items():
+        print(f"{layout:<8} {r['processes']:>5} {r['ready_s']:>11.2f} s {r['rss_mb']:>7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# bench_multi_scheduler.py
+# CPU and memory of app/multi_scheduler.py as the number of profiles grows,
+# against the old layout of one scheduler process per person.
+#
+#   python scripts/bench/bench_multi_scheduler.py [--profiles 1,10,100,500]
+#          [--duration 10] [--work-s 1.0] [--break-s 0.5] [--backend sqlite|csv] [--json]
+#
+# Each profile count runs in a fresh child process against generated
+# timetables in a temp dir:
+#   idle   - every profile has today's slots, none of them active now
+#   active - every profile is inside a slot and cycles through compressed
+#            pomodoros (--work-s / --break-s) with auto-answered dialogs
+# Reported: load time, RSS, CPU % of one core over --duration, phase
+# transitions per second and the worst timer lateness. "per-process RSS"
+# is N times the RSS of one plain focus_pet_scheduler process, i.e. what
+# the same profiles cost as separate schedulers.
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+APP_DIR = os.path.join(ROOT, "app")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid="self"):
+    with open(f"/proc/{pid}/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def write_profiles(folder, n, active):
+    # header + today's four slots per profile, like the generated timetable
+    sys.path.insert(0, APP_DIR)
+    from timetable_model import normalize_row, write_rows
+
+    now = datetime.now()
+    today = now.date().isoformat()
+    if active:
+        # a slot long enough for many compressed pomodoros, plus a later one
+        spans = [(now - timedelta(minutes=1), now + timedelta(minutes=90)), (now + timedelta(minutes=120), now + timedelta(minutes=150))]
+    else:
+        spans = [(now + timedelta(minutes=60 + 30 * k), now + timedelta(minutes=80 + 30 * k)) for k in range(4)]
+    for i in range(n):
+        rows = [normalize_row({
+            "Date": today, "DayName": now.strftime("%a"), "SlotName": f"Task {k}",
+            "StartTime": a.strftime("%H:%M"), "EndTime": b.strftime("%H:%M"),
+        }) for k, (a, b) in enumerate(spans)]
+        write_rows(os.path.join(folder, f"user{i:04d}.csv"), rows)
+
+
+def worker(args):
+    # runs inside the child: load, run for --duration, print one JSON line
+    sys.path.insert(0, APP_DIR)
+    folder = tempfile.mkdtemp(prefix="focus-multi-bench-")
+    try:
+        write_profiles(folder, args.worker, args.scenario == "active")
+        rss_before = rss_kb()
+        t0 = time.perf_counter()
+        import multi_scheduler
+        schedulers = multi_scheduler.load_schedulers(profiles_dir=folder, backend=args.backend)
+        ms = multi_scheduler.MultiScheduler(
+            schedulers, ask=multi_scheduler.auto_done,
+            work_min=args.work_s / 60, break_min=args.break_s / 60
+        )
+        ms.start()
+        load_s = time.perf_counter() - t0
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        time.sleep(args.duration)
+        cpu = time.process_time() - cpu0
+        wall = time.perf_counter() - wall0
+        stats = ms.stats()
+        out = {
+            "profiles": args.worker,
+            "scenario": args.scenario,
+            "load_s": round(load_s, 3),
+            "rss_mb": round(rss_kb() / 1024, 1),
+            "rss_per_profile_kb": round((rss_kb() - rss_before) / max(1, args.worker), 1),
+            "cpu_pct": round(100 * cpu / wall, 2),
+            "transitions_per_s": round(stats["transitions"] / wall, 1),
+            "max_late_ms": stats["max_late_ms"],
+            "phases": stats["phases"],
+        }
+        ms.stop()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    print(json.dumps(out))
+
+
+def single_process_rss(backend):
+    # one plain Scheduler, the way focus_pet_scheduler.py runs per person
+    folder = tempfile.mkdtemp(prefix="focus-multi-bench-")
+    try:
+        write_profiles(folder, 1, False)
+        code = (
+            "import sys, time, json; sys.path.insert(0, %r)\n"
+            "from focus_pet_scheduler import Scheduler\n"
+            "from timetable_store import open_profile_store\n"
+            "s = Scheduler(%r, store=open_profile_store('user0000', backend=%r, profiles_dir=%r))\n"
+            "time.sleep(0.5)\n"
+            "print(json.dumps(int(open('/proc/self/status').read().split('VmRSS:')[1].split()[0])))\n"
+        ) % (APP_DIR, os.path.join(folder, "user0000.csv"), backend, folder)
+        out = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, env=child_env(folder),
+                             capture_output=True, text=True, check=True).stdout
+        return json.loads(out.strip().splitlines()[-1]) / 1024
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def child_env(folder):
+    # a bus of its own, and the file fallback in a temp dir instead of app/data
+    return dict(os.environ, FOCUS_BUS_PORT=str(free_port()), PYTHONUNBUFFERED="1",
+                FOCUS_MESSAGE_FILE=os.path.join(folder, "focus_ui_message.txt"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", default="1,10,100,500")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--work-s", type=float, default=1.0, help="compressed pomodoro length")
+    parser.add_argument("--break-s", type=float, default=0.5)
+    parser.add_argument("--backend", choices=["sqlite", "csv"], default="sqlite")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", default="active", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    single = single_process_rss(args.backend)
+    results = []
+    folder = tempfile.mkdtemp(prefix="focus-multi-bench-")
+    try:
+        for scenario in ("idle", "active"):
+            for n in [int(x) for x in args.profiles.split(",") if x.strip()]:
+                cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(n), "--scenario", scenario,
+                       "--duration", str(args.duration), "--work-s", str(args.work_s),
+                       "--break-s", str(args.break_s), "--backend", args.backend]
+                out = subprocess.run(cmd, cwd=APP_DIR, env=child_env(folder), capture_output=True, text=True,
+                                     check=True).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                r["per_process_rss_mb"] = round(single * n, 1)
+                results.append(r)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({"single_process_rss_mb": round(single, 1), "runs": results}, indent=2))
+        return
+    print(f"one scheduler process: {single:.1f} MB RSS ({args.backend} backend)")
+    print(f"{'scenario':<8} {'profiles':>8} {'load':>8} {'RSS':>9} {'per-process RSS':>16} "
+          f"{'CPU':>7} {'transitions/s':>14} {'max late':>9}")
+    for r in results:
+        print(f"{r['scenario']:<8} {r['profiles']:>8} {r['load_s']:>6.2f} s {r['rss_mb']:>6.1f} MB "
+              f"{r['per_process_rss_mb']:>13.1f} MB {r['cpu_pct']:>6.2f}% {r['transitions_per_s']:>14.1f} "
+              f"{r['max_late_ms']:>6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
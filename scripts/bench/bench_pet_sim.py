@@ -0,0 +1,59 @@
+# bench_pet_sim.py
+# Headless regression check for the desktop pet: runs app/pet_sim.py's
+# simulation (PetEngine on a virtual clock, null renderer) for several pet
+# counts and reports what a real desktop would pay in the engine.
+#
+#   python scripts/bench/bench_pet_sim.py [--pets 1,10,50] [--hours 2] [--seed 1]
+#          [--latency-ms 0] [--max-tick-us-per-pet 20] [--json]
+#
+# engine CPU = ticks per simulated second x measured cost per tick, i.e.
+# the share of one core the state machine itself would use (Tk's drawing
+# comes on top; bench_pets.py measures that on a real display).
+# With --max-tick-us-per-pet the script exits 1 when any run is slower,
+# so it can gate CI.
+import os
+import sys
+import json
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from pet_sim import simulate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pets", default="1,10,50")
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--max-tick-us-per-pet", type=float, help="fail above this mean cost")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(x) for x in args.pets.split(",") if x.strip()]:
+        r = simulate(args.hours, n, args.seed, args.latency_ms)
+        r["engine_cpu_pct"] = round(r["ticks_per_s"] * r["tick_us"]["mean"] / 1e4, 4)
+        results.append(r)
+
+    failed = [r for r in results if args.max_tick_us_per_pet and r["tick_us"]["per_pet_mean"] > args.max_tick_us_per_pet]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'pets':>5} {'sim h/s':>9} {'ticks/s':>8} {'frames/s':>9} {'us/tick':>8} {'p99':>8} "
+              f"{'us/pet':>7} {'engine CPU':>11} {'sleep':>6} {'jitter p99':>11}")
+        for r in results:
+            t = r["tick_us"]
+            print(f"{r['pets']:>5} {r['hours'] / r['wall_s']:>9.1f} {r['ticks_per_s']:>8.2f} {r['frames_per_s']:>9.2f} "
+                  f"{t['mean']:>8.2f} {t['p99']:>8.2f} {t['per_pet_mean']:>7.2f} {r['engine_cpu_pct']:>10.4f}% "
+                  f"{r['occupancy']['sleep']:>6.1%} {r['jitter_ms']['p99']:>8} ms")
+    for r in failed:
+        print(f"FAIL: {r['pets']} pet(s) cost {r['tick_us']['per_pet_mean']} us per pet per tick "
+              f"(limit {args.max_tick_us_per_pet})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
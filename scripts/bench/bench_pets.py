@@ -0,0 +1,117 @@
+# bench_pets.py
+# CPU and memory of app/desktop_pet.py's PetHost as the number of pets in
+# the one process grows. Needs a display (Tk windows are real).
+#
+#   python scripts/bench/bench_pets.py [--pets 1,10,50] [--duration 20] [--json]
+#
+# Each count runs in a fresh child process, twice:
+#   natural - the pets follow their own sleep-heavy weights
+#   walking - every pet is kept walking (the busiest state: a new frame
+#             and a window move on every tick)
+# Reported: start-up time, RSS (total, and of the host before any pet),
+# RSS added per pet, CPU % of one core and per pet,
+# and frame clock ticks per second (one tick serves every pet).
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+APP_DIR = os.path.join(ROOT, "app")
+
+
+def rss_kb():
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(args):
+    sys.path.insert(0, APP_DIR)
+    import tkinter as tk
+    t0 = time.perf_counter()
+    import desktop_pet
+    try:
+        host = desktop_pet.PetHost()
+    except tk.TclError as e:
+        print(json.dumps({"error": f"no display: {e}"}))
+        return
+    host.root.update()
+    rss_before = rss_kb()      # the process with Tk and the sprites, no pets yet
+    for _ in range(args.worker):
+        host.add()
+    host.root.update()
+    start_s = time.perf_counter() - t0
+    rss_start = rss_kb()
+
+    if args.scenario == "walking":
+        def keep_walking():
+            now = host.clock_ms()
+            for pet in host.pets:
+                if pet.engine.state != "walk_right":
+                    pet.engine.react("walk_right", now)
+            host.root.after(100, keep_walking)
+        keep_walking()
+
+    cpu0, wall0, ticks0 = time.process_time(), time.perf_counter(), host.ticks
+    host.root.after(int(args.duration * 1000), host.root.quit)
+    host.tick()
+    host.root.mainloop()
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+    n = args.worker
+    print(json.dumps({
+        "pets": n,
+        "scenario": args.scenario,
+        "start_s": round(start_s, 3),
+        "rss_mb": round(rss_kb() / 1024, 1),
+        "rss_host_mb": round(rss_before / 1024, 1),
+        "rss_per_pet_kb": round((rss_start - rss_before) / n, 1),
+        "cpu_pct": round(100 * cpu / wall, 2),
+        "cpu_per_pet_pct": round(100 * cpu / wall / n, 3),
+        "ticks_per_s": round((host.ticks - ticks0) / wall, 1),
+        "sheets_loaded": len(host.sprites.loaded),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pets", default="1,10,50")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", default="natural", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    env = dict(os.environ, FOCUS_BUS="0", PYTHONUNBUFFERED="1")
+    results = []
+    for scenario in ("natural", "walking"):
+        for n in [int(x) for x in args.pets.split(",") if x.strip()]:
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(n), "--scenario", scenario,
+                   "--duration", str(args.duration)]
+            out = subprocess.run(cmd, cwd=APP_DIR, env=env, capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            if "error" in r:
+                print(r["error"])
+                sys.exit(1)
+            results.append(r)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<8} {'pets':>5} {'start':>8} {'RSS':>9} {'RSS/pet':>10} {'CPU':>7} {'CPU/pet':>8} {'ticks/s':>8}")
+    for r in results:
+        print(f"{r['scenario']:<8} {r['pets']:>5} {r['start_s']:>6.2f} s {r['rss_mb']:>6.1f} MB "
+              f"{r['rss_per_pet_kb']:>7.0f} KB {r['cpu_pct']:>6.2f}% {r['cpu_per_pet_pct']:>7.3f}% {r['ticks_per_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench_timetable.py
+# Speed of app/timetable.py's generator and a check that --merge keeps
+# logged rows and adds what is missing. Everything is written to a temp dir.
+#
+#   python scripts/bench/bench_timetable.py [--years 10] [--json]
+#
+# Reported: rows and seconds for --years of slots to CSV, and for merging
+# one month into that file. The script exits 1 when a merge check fails:
+#   - merging a new month into an existing file adds that month's rows
+#   - merging a month again restores a deleted unlogged row, keeps a
+#     logged one as it was, and leaves the existing rows in their order
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+from io import StringIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+import timetable
+from timetable_model import read_rows, write_rows
+
+
+def run(*argv):
+    # timetable.main() without its progress line
+    with contextlib.redirect_stdout(StringIO()):
+        return timetable.main(list(argv))
+
+
+def key(r):
+    return (r["Date"], r["SlotName"], r["StartTime"])
+
+
+def merge_checks(folder):
+    path = os.path.join(folder, "merge.csv")
+    failures = []
+    run("--month", "2025-11", "-o", path)
+    november = read_rows(path)
+
+    run("--month", "2025-12", "-o", path, "--merge")
+    rows = read_rows(path)
+    december = [r for r in rows if r["Date"].startswith("2025-12")]
+    if not december:
+        failures.append("--merge of a new month added no rows")
+    if [key(r) for r in rows[:len(november)]] != [key(r) for r in november]:
+        failures.append("--merge reordered the existing rows")
+
+    # drop one unlogged November row, log another, merge November again
+    gone = key(rows[0])
+    rows[1].update(Status="Done", LoggedMinutes=25)
+    logged = dict(rows[1])
+    write_rows(path, rows[1:])
+    run("--month", "2025-11", "-o", path, "--merge")
+    rows = read_rows(path)
+    if gone not in {key(r) for r in rows}:
+        failures.append("--merge did not restore a deleted unlogged row")
+    if rows[0] != logged:
+        failures.append("--merge changed or moved a logged row")
+    if len(rows) != len(november) + len(december):
+        failures.append(f"--merge left {len(rows)} rows, expected {len(november) + len(december)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="focus-timetable-bench-")
+    try:
+        path = os.path.join(folder, "years.csv")
+        t0 = time.perf_counter()
+        run("--start", "2026-01-01", "--years", str(args.years), "-o", path)
+        generate_s = time.perf_counter() - t0
+        rows = len(read_rows(path))
+
+        t0 = time.perf_counter()
+        run("--month", "2030-06", "-o", path, "--merge")
+        merge_s = time.perf_counter() - t0
+
+        failures = merge_checks(folder)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    result = {"years": args.years, "rows": rows, "generate_s": round(generate_s, 3),
+              "merge_month_s": round(merge_s, 3), "failures": failures}
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{args.years} years: {rows} rows to CSV in {generate_s:.3f} s; "
+              f"one month merged into it in {merge_s:.3f} s")
+        print("merge checks:", "ok" if not failures else "FAILED")
+    for f in failures:
+        print("FAIL:", f)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# fake_openrouter.py
+# Local stand-in for the OpenRouter chat completions endpoint, for load
+# tests of focus_server. Answers single-page and batch prompts (plain JSON
+# or SSE when "stream" is set) after a configurable delay, and injects HTTP
+# errors and malformed model output at configurable rates.
+#
+#   python scripts/bench/fake_openrouter.py [--port 8765] [--latency-ms 400]
+#          [--jitter-ms 100] [--error-rate 0.02] [--malformed-rate 0.02]
+#
+# then run focus_server with OPENROUTER_URL=http://127.0.0.1:8765/api/v1/chat/completions
+# GET /stats returns the call counters as JSON.
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+_BATCH_RE = re.compile(r"exactly (\d+) objects")
+_DOMAIN_RE = re.compile(r"Domain: (\S+)")
+
+# a verdict per page, derived from the domain so repeated runs agree
+VERDICTS = [
+    ("allow", "encourage", "Nice, this looks like focused work. Keep going!"),
+    ("warn", "alert", "Careful, this page could pull you off track."),
+    ("block", "alert", "This is a distraction, back to the task."),
+]
+
+
+class FakeConfig:
+    def __init__(self, latency_ms=400.0, jitter_ms=100.0, error_rate=0.0,
+                 malformed_rate=0.0, chunk_ms=15.0, seed=None):
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.error_rate = float(error_rate)
+        self.malformed_rate = float(malformed_rate)
+        self.chunk_ms = float(chunk_ms)     # gap between streamed deltas
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {
+                "calls": 0,
+                "stream_calls": 0,
+                "batch_calls": 0,
+                "pages": 0,
+                "errors_injected": 0,
+                "malformed_injected": 0,
+            }
+
+    def count(self, **amounts):
+        with self.lock:
+            for name, n in amounts.items():
+                self.stats[name] += n
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def roll(self, rate):
+        with self.lock:
+            return self.rng.random() < rate
+
+    def delay(self):
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+
+def verdict_for(domain):
+    h = int(hashlib.sha1(domain.encode("utf-8")).hexdigest(), 16)
+    action, behavior, message = VERDICTS[h % len(VERDICTS)]
+    return {"action": action, "pet_behavior": behavior, "message": message}
+
+
+def answer_for(prompt):
+    # model text for a prompt built by prompts.build_prompt / build_batch_prompt
+    domains = _DOMAIN_RE.findall(prompt)
+    batch = _BATCH_RE.search(prompt)
+    if batch is None:
+        return json.dumps(verdict_for(domains[0] if domains else "")), 1
+    count = int(batch.group(1))
+    out = [dict(verdict_for(domains[i] if i < len(domains) else ""), id=i) for i in range(count)]
+    return json.dumps(out), count
+
+
+def malformed(text):
+    # what a model gets wrong: cut off mid-object, or chatty prose around it
+    if random.random() < 0.5:
+        return text[:max(1, len(text) // 2)]
+    return "Sure! Here is my answer: " + text.replace('"', "'")
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, obj):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send_json(200, config.snapshot())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                prompt = payload["messages"][-1]["content"]
+            except (ValueError, KeyError, IndexError, TypeError):
+                self._send_json(400, {"error": "bad request"})
+                return
+
+            stream = bool(payload.get("stream"))
+            text, pages = answer_for(prompt)
+            config.count(calls=1, pages=pages, stream_calls=int(stream), batch_calls=int(pages > 1))
+            time.sleep(config.delay())
+
+            if config.roll(config.error_rate):
+                config.count(errors_injected=1)
+                self._send_json(503, {"error": {"message": "injected upstream error"}})
+                return
+            if config.roll(config.malformed_rate):
+                config.count(malformed_injected=1)
+                text = malformed(text)
+
+            if not stream:
+                self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": text}}]})
+                return
+            self._stream(text)
+
+        def _stream(self, text):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def chunk(data):
+                raw = data.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(raw), raw))
+                self.wfile.flush()
+
+            try:
+                chunk(": OPENROUTER PROCESSING\n\n")
+                for i in range(0, len(text), 6):
+                    delta = {"choices": [{"delta": {"content": text[i:i + 6]}}]}
+                    chunk("data: " + json.dumps(delta) + "\n\n")
+                    if config.chunk_ms:
+                        time.sleep(config.chunk_ms / 1000.0)
+                chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # focus_server drops the stream once the verdict is complete
+                pass
+
+    return Handler
+
+
+def start(config, host="127.0.0.1", port=0):
+    # serves on a daemon thread; returns (server, url)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openrouter", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/api/v1/chat/completions"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenRouter endpoint for focus_server load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=400.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--chunk-ms", type=float, default=15.0, help="delay between streamed deltas")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 503")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of answers with broken JSON")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                        args.malformed_rate, args.chunk_ms, args.seed)
+    server, url = start(config, args.host, args.port)
+    print(f"Fake OpenRouter on {url} (stats: http://{args.host}:{args.port}/stats)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
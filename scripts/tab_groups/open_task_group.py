@@ -1,16 +1,44 @@
 # open_task_group.py
 import requests
 import sys
+import time
+import uuid
 
 SERVER = "http://127.0.0.1:5050"
+ATTEMPTS = 4
 
-def open_group(name):
-    payload = {"action": "open_group", "payload": {"name": name}}
-    r = requests.post(SERVER + "/set_command", json=payload, timeout=2)
-    print("server response:", r.json())
+def open_group(name, wait=0):
+    # one idempotency key for every attempt: a retry after a lost response
+    # returns the command the server already queued instead of a second one
+    payload = {"action": "open_group", "payload": {"name": name}, "key": str(uuid.uuid4())}
+    for attempt in range(ATTEMPTS):
+        last = attempt == ATTEMPTS - 1
+        try:
+            r = requests.post(SERVER + "/set_command", json=payload, timeout=2)
+            if r.status_code < 500:
+                break
+            if last:
+                print(f"server error after {ATTEMPTS} attempts: HTTP {r.status_code}")
+                return None
+        except requests.RequestException as e:
+            if last:
+                print("server unreachable:", e)
+                return None
+        time.sleep(0.25 * 2 ** attempt)
+    j = r.json()
+    print("server response:", j)
+
+    cmd = j.get("pending") or {}
+    if wait and cmd.get("id"):
+        r = requests.get(f"{SERVER}/command/{cmd['id']}", params={"wait": wait}, timeout=wait + 2)
+        status = r.json().get("command") or {}
+        print("command status:", status.get("status"), status.get("result"))
+    return j
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python open_task_group.py \"Slot Name\"")
+        print("Usage: python open_task_group.py \"Slot Name\" [--wait SECONDS]")
     else:
-        open_group(sys.argv[1])
+        wait = float(sys.argv[sys.argv.index("--wait") + 1]) if "--wait" in sys.argv else 0
+        if open_group(sys.argv[1], wait) is None:
+            sys.exit(1)
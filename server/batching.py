@@ -0,0 +1,68 @@
+# batching.py
+# Micro-batching for /check: single requests that arrive within a short
+# window are handed to run_batch() together, so a burst of tab loads costs
+# one upstream round trip instead of one per page.
+import threading
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, run_batch, window=0.04, max_batch=16):
+        self.run_batch = run_batch      # list of items -> list of results
+        self.window = float(window)     # seconds
+        self.max_batch = max(1, int(max_batch))
+        self.lock = threading.Lock()
+        self._pending = []              # [(item, future)]
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item):
+        fut = Future()
+        batch = None
+        with self.lock:
+            self._pending.append((item, fut))
+            if self.window <= 0 or len(self._pending) >= self.max_batch:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            # a full batch runs on the thread that filled it
+            self._run(batch)
+        return fut
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        with self.lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch):
+        with self.lock:
+            self.batches += 1
+            self.items += len(batch)
+        try:
+            results = self.run_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, fut), result in zip(batch, results):
+            fut.set_result(result)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "pending": len(self._pending),
+            }
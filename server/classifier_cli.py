@@ -0,0 +1,124 @@
+# classifier_cli.py
+# Train, export and evaluate the local first-tier classifier.
+#
+#   python classifier_cli.py train [--min-samples 50] [--min-df 2]
+#   python classifier_cli.py export verdicts.jsonl
+#   python classifier_cli.py report [--holdout 0.2] [--min-confidence 0.9]
+#   python classifier_cli.py live [--server http://127.0.0.1:5000]
+import sys
+import json
+import time
+import random
+import argparse
+
+from domain_rules import DomainRuleIndex
+from local_model import LocalModel, VerdictLog, tokenize, MODEL_FILE, MIN_CONFIDENCE
+
+
+def load_samples(log):
+    return [(tokenize(d, t, s), a, d) for d, t, s, a, _ in log.rows()]
+
+
+def cmd_train(args):
+    log = VerdictLog()
+    samples = load_samples(log)
+    if len(samples) < args.min_samples:
+        print(f"Only {len(samples)} labelled pages logged; need {args.min_samples}. Keep browsing.")
+        return 1
+    model = LocalModel.train([(tok, a) for tok, a, _ in samples], min_df=args.min_df)
+    model.save(args.out)
+    print(f"Trained on {model.trained_on} pages, {len(model.idf)} features -> {args.out}")
+    print("POST /admin/reload on the focus server to start using it.")
+    return 0
+
+
+def cmd_export(args):
+    log = VerdictLog()
+    rows = log.rows()
+    with open(args.path, "w", encoding="utf-8") as f:
+        for domain, title, snippet, action, created_at in rows:
+            f.write(json.dumps({
+                "domain": domain, "title": title, "snippet": snippet,
+                "action": action, "created_at": created_at
+            }) + "\n")
+    print(f"Exported {len(rows)} labelled pages to {args.path}")
+    return 0
+
+
+def cmd_report(args):
+    # replay the logged traffic through the local tiers: how much would they
+    # resolve, and how often do they agree with the LLM's label?
+    samples = load_samples(VerdictLog())
+    if not samples:
+        print("No labelled pages logged yet.")
+        return 1
+    random.Random(args.seed).shuffle(samples)
+    n_test = max(1, int(len(samples) * args.holdout))
+    test, train = samples[:n_test], samples[n_test:]
+    rules = DomainRuleIndex.from_file()
+    model = LocalModel.train([(tok, a) for tok, a, _ in train]) if train else None
+
+    counts = {"rules": 0, "model": 0, "llm": 0}
+    agree = {"rules": 0, "model": 0}
+    started = time.perf_counter()
+    for tokens, label, domain in test:
+        action = rules.match(domain)
+        tier = "rules"
+        if action is None and model is not None:
+            action, confidence = model.predict(tokens)
+            tier = "model" if action is not None and confidence >= args.min_confidence else None
+        if action is None or tier is None:
+            counts["llm"] += 1
+            continue
+        counts[tier] += 1
+        agree[tier] += int(action == label)
+    per_item_us = (time.perf_counter() - started) / len(test) * 1e6
+
+    print(f"Replayed {len(test)} held-out pages (trained on {len(train)}), {per_item_us:.1f} us/page")
+    for tier, n in counts.items():
+        line = f"  {tier:<6} {n:>6}  {n / len(test):6.1%}"
+        if tier in agree and n:
+            line += f"  agrees with LLM {agree[tier] / n:6.1%}"
+        print(line)
+    return 0
+
+
+def cmd_live(args):
+    import requests
+    r = requests.get(args.server.rstrip("/") + "/admin/tiers", timeout=2).json()
+    print(f"{r['total']} decisions since start")
+    for tier, n in r["counts"].items():
+        print(f"  {tier:<6} {n:>6}  {r['fractions'][tier]:6.1%}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local first-tier classifier for focus_server")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("train", help="train from logged LLM verdicts")
+    p.add_argument("--out", default=MODEL_FILE)
+    p.add_argument("--min-samples", type=int, default=50)
+    p.add_argument("--min-df", type=int, default=2)
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser("export", help="dump logged verdicts as JSON lines")
+    p.add_argument("path")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("report", help="offline tier coverage and agreement")
+    p.add_argument("--holdout", type=float, default=0.2)
+    p.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("live", help="tier counters from a running server")
+    p.add_argument("--server", default="http://127.0.0.1:5000")
+    p.set_defaults(func=cmd_live)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# command_journal.py
+# Append-only on-disk journal for control_server's command queue. Every
+# set / deliver / ack / expire is one JSON line. Writes are group-committed:
+# a writer thread collects whatever arrived within a few milliseconds and
+# makes it durable with a single fsync, so a burst of commands costs one
+# disk flush instead of one each. Every SNAPSHOT_EVERY records the whole
+# queue state is written to a snapshot file and the journal is truncated,
+# which keeps startup replay short.
+import os
+import json
+import time
+import threading
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("FOCUS_DATA_DIR", os.path.join(BASE, "data"))
+
+JOURNAL_FILE = os.path.join(DATA_DIR, "commands.journal")
+SNAPSHOT_FILE = os.path.join(DATA_DIR, "commands.snapshot.json")
+FSYNC_WINDOW_MS = 2.0       # how long a flush waits for more records to share its fsync
+SNAPSHOT_EVERY = 1000       # journal records between snapshots
+# -----------------------------------
+
+
+def _fsync_dir(path):
+    # makes a rename durable on POSIX; directories can't be opened on Windows
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CommandJournal:
+    def __init__(self, path=JOURNAL_FILE, snapshot_path=SNAPSHOT_FILE,
+                 fsync_window_ms=FSYNC_WINDOW_MS, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.fsync_window = max(0.0, float(fsync_window_ms)) / 1000.0
+        self.snapshot_every = max(1, int(snapshot_every))
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.cond = threading.Condition()
+        self._io_lock = threading.Lock()    # file writes; never held with cond
+        self._buffer = []
+        self._written = 0       # tickets handed out
+        self._synced = 0        # tickets known to be on disk
+        self._since_snapshot = 0
+        self._closed = False
+        self.fsyncs = 0
+        self.records = 0
+
+        self._file = None
+        self._thread = None
+
+    # ---- startup ----
+    def load(self):
+        # (snapshot state or None, journal records written after it)
+        state = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        records = []
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # torn tail from a crash mid-write; nothing after it was acknowledged
+                        break
+        self._since_snapshot = len(records)
+        return state, records
+
+    def open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._writer, name="command-journal", daemon=True)
+        self._thread.start()
+        return self
+
+    # ---- writes ----
+    def append(self, record):
+        # queues one record and returns a ticket for wait(); callers append
+        # under their own lock so the journal order matches the queue order
+        line = json.dumps(record, separators=(",", ":"))
+        with self.cond:
+            self._buffer.append(line)
+            self._written += 1
+            self._since_snapshot += 1
+            self.records += 1
+            self.cond.notify_all()
+            return self._written
+
+    def wait(self, ticket, timeout=5.0):
+        # blocks until the record behind `ticket` has been fsynced
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self._synced < ticket and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return self._synced >= ticket
+
+    def _writer(self):
+        while True:
+            with self.cond:
+                while not self._buffer and not self._closed:
+                    self.cond.wait()
+                if not self._buffer and self._closed:
+                    return
+            if self.fsync_window:
+                # group commit: let concurrent writers join this flush
+                time.sleep(self.fsync_window)
+            self._flush()
+
+    def _flush(self):
+        # appends keep going while the fsync runs; they land in the next batch
+        with self._io_lock:
+            with self.cond:
+                lines, self._buffer = self._buffer, []
+                target = self._written
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            with self.cond:
+                if lines:
+                    self.fsyncs += 1
+                self._synced = max(self._synced, target)
+                self.cond.notify_all()
+
+    # ---- compaction ----
+    def needs_snapshot(self):
+        return self._since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state):
+        # called under the queue lock, so no append races it and the
+        # snapshot covers exactly the records being discarded
+        self._flush()
+        with self._io_lock:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            _fsync_dir(self.snapshot_path)
+            # a crash before this truncate only means replaying records the
+            # snapshot already holds, which the queue ignores
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        with self.cond:
+            self._since_snapshot = 0
+
+    def close(self):
+        with self.cond:
+            self._closed = True
+            self.cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._file is not None and not self._file.closed:
+            self._flush()
+            with self._io_lock:
+                self._file.close()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "records": self.records,
+                "fsyncs": self.fsyncs,
+                "since_snapshot": self._since_snapshot,
+                "unsynced": len(self._buffer),
+            }
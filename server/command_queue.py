@@ -0,0 +1,269 @@
+# command_queue.py
+# Ordered command queue for control_server. Every command gets a uuid and
+# a monotonically increasing seq; it stays pending until a client acks it.
+# Consumers read "everything after seq N", so a long-poll or SSE client
+# keeps a cursor and never sees a command twice, while a client that
+# restarts (cursor 0) gets every unacked command again.
+#
+# With a CommandJournal attached every change is journaled, set and ack
+# return only once they are on disk, and restore() rebuilds the queue
+# after a restart. Client-supplied idempotency keys make a retried
+# /set_command return the original command instead of queueing a copy.
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+MAX_PENDING = 256
+MAX_DONE = 1000             # acked/expired commands kept for history and GET /command/<id>
+MAX_KEYS = 4096
+KEY_TTL = 24 * 3600         # seconds an idempotency key is remembered
+
+
+class QueueFull(Exception):
+    pass
+
+
+class CommandQueue:
+    def __init__(self, max_pending=MAX_PENDING, max_done=MAX_DONE, journal=None):
+        self.max_pending = max_pending
+        self.max_done = max_done
+        self.journal = journal
+        self.cond = threading.Condition()
+        self._pending = OrderedDict()   # id -> command, in seq order
+        self._done = OrderedDict()      # id -> acked/expired command
+        self._keys = OrderedDict()      # idempotency key -> (id, created_at)
+        self._seq = 0
+        self.closed = False
+
+    # ---- journal ----
+    def restore(self):
+        # rebuild from snapshot + journal, then compact so the next start is quick
+        state, records = self.journal.load()
+        with self.cond:
+            if state:
+                self._seq = state.get("seq", 0)
+                self._pending = OrderedDict((c["id"], c) for c in state.get("pending", []))
+                self._done = OrderedDict((c["id"], c) for c in state.get("done", []))
+                self._keys = OrderedDict((k, (i, t)) for k, i, t in state.get("keys", []))
+            for record in records:
+                self._apply(record)
+            self.journal.open()
+            if records:
+                self.journal.snapshot(self._state())
+        return len(self._pending)
+
+    def _state(self):
+        return {
+            "seq": self._seq,
+            "pending": list(self._pending.values()),
+            "done": list(self._done.values()),
+            "keys": [[k, i, t] for k, (i, t) in self._keys.items()],
+        }
+
+    def _apply(self, record):
+        # replays one journal record; records the snapshot already covers are no-ops
+        op = record.get("op")
+        if op == "set":
+            cmd = record["cmd"]
+            if cmd["id"] in self._pending or cmd["id"] in self._done:
+                return
+            self._seq = max(self._seq, cmd["seq"])
+            self._pending[cmd["id"]] = cmd
+            if cmd.get("key"):
+                self._keys[cmd["key"]] = (cmd["id"], cmd["created_at"])
+            return
+        cmd = self._pending.get(record.get("id"))
+        if cmd is None:
+            return
+        if op == "deliver":
+            if cmd["delivered_at"] is None:
+                cmd["delivered_at"] = record["at"]
+            cmd["deliveries"] += 1
+        elif op == "ack":
+            del self._pending[cmd["id"]]
+            cmd.update(status="acked", acked_at=record["at"], result=record.get("result"))
+            self._retire(cmd)
+        elif op == "expire":
+            del self._pending[cmd["id"]]
+            cmd["status"] = "expired"
+            self._retire(cmd)
+
+    def _log(self, record):
+        # caller holds self.cond; returns a ticket to wait on outside the lock
+        if self.journal is None:
+            return None
+        ticket = self.journal.append(record)
+        if self.journal.needs_snapshot():
+            self.journal.snapshot(self._state())
+        return ticket
+
+    def _durable(self, ticket):
+        if ticket is not None:
+            self.journal.wait(ticket)
+
+    # ---- queue ----
+    def push(self, action, payload=None, ttl=None, key=None):
+        # returns (command, duplicate); ValueError for a ttl that is not a
+        # positive number of seconds (None / 0 = never expires)
+        if ttl:
+            try:
+                ttl = float(ttl)
+            except (TypeError, ValueError):
+                raise ValueError(f"ttl must be a number of seconds, got {ttl!r}") from None
+            if not 0 < ttl < float("inf"):
+                raise ValueError(f"ttl must be positive and finite, got {ttl!r}")
+        now = time.time()
+        with self.cond:
+            self._expire(now)
+            if key:
+                known = self._known_key(key, now)
+                if known is not None:
+                    return known, True
+            if len(self._pending) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} commands already pending")
+            self._seq += 1
+            cmd = {
+                "id": str(uuid.uuid4()),
+                "seq": self._seq,
+                "key": key or None,
+                "action": action,
+                "payload": payload if payload is not None else {},
+                "created_at": now,
+                "expires_at": now + ttl if ttl else None,
+                "delivered_at": None,
+                "deliveries": 0,
+                "status": "pending",
+            }
+            self._pending[cmd["id"]] = cmd
+            if key:
+                self._keys[key] = (cmd["id"], now)
+                while len(self._keys) > MAX_KEYS:
+                    self._keys.popitem(last=False)
+            ticket = self._log({"op": "set", "cmd": cmd})
+            self.cond.notify_all()
+            out = dict(cmd)
+        self._durable(ticket)
+        return out, False
+
+    def _known_key(self, key, now):
+        while self._keys:
+            oldest = next(iter(self._keys.values()))
+            if now - oldest[1] <= KEY_TTL:
+                break
+            self._keys.popitem(last=False)
+        entry = self._keys.get(key)
+        if entry is None:
+            return None
+        cmd = self._pending.get(entry[0]) or self._done.get(entry[0])
+        return dict(cmd) if cmd else {"id": entry[0], "key": key, "status": "retired"}
+
+    def _expire(self, now):
+        # a stale "open_group" is worse than none; only commands pushed with a ttl expire
+        for cmd in [c for c in self._pending.values() if c["expires_at"] and c["expires_at"] <= now]:
+            del self._pending[cmd["id"]]
+            cmd["status"] = "expired"
+            self._retire(cmd)
+            self._log({"op": "expire", "id": cmd["id"], "at": now})
+
+    def _retire(self, cmd):
+        self._done[cmd["id"]] = cmd
+        while len(self._done) > self.max_done:
+            self._done.popitem(last=False)
+
+    def _after(self, seq, limit):
+        out = []
+        for cmd in self._pending.values():
+            if cmd["seq"] > seq:
+                out.append(cmd)
+                if limit and len(out) >= limit:
+                    break
+        return out
+
+    def _deliver(self, cmds):
+        # not waited on: losing a deliver record only loses a statistic
+        now = time.time()
+        for cmd in cmds:
+            if cmd["delivered_at"] is None:
+                cmd["delivered_at"] = now
+            cmd["deliveries"] += 1
+            self._log({"op": "deliver", "id": cmd["id"], "at": now})
+        return [dict(c) for c in cmds]
+
+    def peek(self, after=0, limit=0):
+        with self.cond:
+            self._expire(time.time())
+            return [dict(c) for c in self._after(after, limit)]
+
+    def wait(self, after=0, timeout=0.0, limit=0):
+        # pending commands with seq > after, blocking up to `timeout` seconds
+        # for one to arrive; [] on timeout or shutdown
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self.cond:
+            while True:
+                self._expire(time.time())
+                cmds = self._after(after, limit)
+                if cmds:
+                    return self._deliver(cmds)
+                remaining = deadline - time.monotonic()
+                if self.closed or remaining <= 0:
+                    return []
+                self.cond.wait(remaining)
+
+    def ack(self, cmd_id, result=None):
+        with self.cond:
+            cmd = self._pending.pop(str(cmd_id), None)
+            if cmd is None:
+                return None
+            now = time.time()
+            cmd["status"] = "acked"
+            cmd["acked_at"] = now
+            cmd["result"] = result
+            self._retire(cmd)
+            ticket = self._log({"op": "ack", "id": cmd["id"], "at": now, "result": result})
+            self.cond.notify_all()
+            out = dict(cmd)
+        self._durable(ticket)
+        return out
+
+    def get(self, cmd_id, wait=0.0):
+        # with wait > 0, blocks until the command leaves the pending state
+        deadline = time.monotonic() + max(0.0, wait)
+        with self.cond:
+            while True:
+                cmd = self._pending.get(str(cmd_id)) or self._done.get(str(cmd_id))
+                remaining = deadline - time.monotonic()
+                if cmd is None or cmd["status"] != "pending" or self.closed or remaining <= 0:
+                    return dict(cmd) if cmd else None
+                self.cond.wait(remaining)
+
+    def history(self, limit=50, action=None):
+        # newest first, pending included
+        with self.cond:
+            cmds = list(self._done.values()) + list(self._pending.values())
+        cmds.sort(key=lambda c: c["seq"], reverse=True)
+        if action:
+            cmds = [c for c in cmds if c["action"] == action]
+        return [dict(c) for c in cmds[:limit]]
+
+    def last_seq(self):
+        with self.cond:
+            return self._seq
+
+    def close(self):
+        # wakes every waiting long-poll/SSE request so shutdown can drain
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            out = {
+                "pending": len(self._pending),
+                "last_seq": self._seq,
+                "acked_kept": sum(1 for c in self._done.values() if c["status"] == "acked"),
+                "idempotency_keys": len(self._keys),
+            }
+        if self.journal is not None:
+            out["journal"] = self.journal.stats()
+        return out
@@ -1,41 +1,121 @@
 # control_server.py
-from flask import Flask, request, jsonify
-import threading, uuid, time
+from flask import Flask, request, jsonify, Response
+import os, sys, json, time
+
+from command_queue import CommandQueue, QueueFull
+from command_journal import CommandJournal
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+import event_bus    # lives with the desktop apps in app/
 
 app = Flask(__name__)
 
-_command_lock = threading.Lock()
-_pending = None  # { id, action, payload, created_at }
-
-def set_pending(action, payload):
-    global _pending
-    with _command_lock:
-        _pending = {
-            "id": str(uuid.uuid4()),
-            "action": action,
-            "payload": payload,
-            "created_at": time.time()
-        }
-        return _pending
-
-def get_pending():
-    with _command_lock:
-        return _pending
-
-def clear_pending(cmd_id=None):
-    global _pending
-    with _command_lock:
-        if _pending is None:
-            return False
-        if cmd_id is None or str(_pending.get("id")) == str(cmd_id):
-            _pending = None
-            return True
-        return False
+# ---------------- CONFIG ----------------
+LONG_POLL_MAX = float(os.getenv("CONTROL_LONG_POLL_MAX", "30"))     # seconds a GET /command may hold
+SSE_HEARTBEAT = float(os.getenv("CONTROL_SSE_HEARTBEAT", "15"))     # keep-alive comment interval
+JOURNAL_ENABLED = os.getenv("CONTROL_JOURNAL", "1") == "1"            # 0 keeps commands in memory only
+JOURNAL_FSYNC_MS = float(os.getenv("CONTROL_JOURNAL_FSYNC_MS", "2"))  # group-commit window
+# -----------------------------------------
+
+journal = CommandJournal(fsync_window_ms=JOURNAL_FSYNC_MS) if JOURNAL_ENABLED else None
+commands = CommandQueue(journal=journal)
+bus = event_bus.Bus("control_server")
+if journal is not None:
+    _t = time.perf_counter()
+    _restored = commands.restore()
+    print(f"[control] restored {_restored} pending command(s) in {(time.perf_counter() - _t) * 1000:.1f} ms")
+
+
+def _int_arg(name, default=0):
+    try:
+        return int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _float_arg(name, default=0.0):
+    try:
+        return float(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
 
 @app.route("/command", methods=["GET"])
 def command_get():
-    p = get_pending()
-    return jsonify({"ok": True, "pending": p})
+    # ?after=<seq> returns only newer commands; ?wait=<s> long-polls until
+    # one arrives. "pending" is the oldest one, for single-command clients.
+    after = _int_arg("after")
+    wait = min(max(0.0, _float_arg("wait")), LONG_POLL_MAX)
+    cmds = commands.wait(after=after, timeout=wait, limit=_int_arg("limit"))
+    return jsonify({
+        "ok": True,
+        "pending": cmds[0] if cmds else None,
+        "commands": cmds,
+        "last_seq": commands.last_seq()
+    })
+
+
+@app.route("/command/stream", methods=["GET"])
+def command_stream():
+    # Server-Sent Events: one "command" event per command, event id = seq,
+    # so an EventSource reconnect resumes via Last-Event-ID
+    after = _int_arg("after")
+    try:
+        after = int(request.headers.get("Last-Event-ID", after))
+    except ValueError:
+        pass
+
+    def events(after):
+        yield "retry: 2000\n\n"
+        while not commands.closed:
+            cmds = commands.wait(after=after, timeout=SSE_HEARTBEAT)
+            if not cmds:
+                yield ": keep-alive\n\n"
+                continue
+            for cmd in cmds:
+                yield f"id: {cmd['seq']}\nevent: command\ndata: {json.dumps(cmd)}\n\n"
+            after = cmds[-1]["seq"]
+
+    return Response(events(after), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(round((len(values) - 1) * p)))]
+    return {"count": len(values), "p50": pick(0.5), "p95": pick(0.95), "max": values[-1]}
+
+
+@app.route("/command/history", methods=["GET"])
+def command_history():
+    # newest first; latencies in ms from /set_command to first delivery and to ack
+    cmds = commands.history(limit=max(1, _int_arg("limit", 50)), action=request.args.get("action"))
+    for c in cmds:
+        if c.get("delivered_at"):
+            c["deliver_ms"] = round((c["delivered_at"] - c["created_at"]) * 1000, 1)
+        if c.get("acked_at"):
+            c["ack_ms"] = round((c["acked_at"] - c["created_at"]) * 1000, 1)
+    return jsonify({
+        "ok": True,
+        "commands": cmds,
+        "latency_ms": {
+            "deliver": _percentiles([c["deliver_ms"] for c in cmds if "deliver_ms" in c]),
+            "ack": _percentiles([c["ack_ms"] for c in cmds if "ack_ms" in c]),
+        }
+    })
+
+
+@app.route("/command/<cmd_id>", methods=["GET"])
+def command_status(cmd_id):
+    # ?wait=<s> blocks until the command is acked or expired
+    wait = min(max(0.0, _float_arg("wait")), LONG_POLL_MAX)
+    cmd = commands.get(cmd_id, wait=wait)
+    if cmd is None:
+        return jsonify({"ok": False, "error": "unknown id"}), 404
+    return jsonify({"ok": True, "command": cmd})
+
 
 @app.route("/set_command", methods=["POST"])
 def command_set():
@@ -44,8 +124,18 @@ def command_set():
     payload = data.get("payload", {})
     if not action:
         return jsonify({"ok": False, "error": "missing action"}), 400
-    p = set_pending(action, payload)
-    return jsonify({"ok": True, "pending": p})
+    # the same key twice returns the first command, so clients can retry safely
+    key = data.get("key") or request.headers.get("Idempotency-Key")
+    try:
+        p, duplicate = commands.push(action, payload, ttl=data.get("ttl"), key=key)
+    except QueueFull as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if not duplicate:
+        bus.publish(event_bus.COMMAND, id=p["id"], seq=p["seq"], action=action)
+    return jsonify({"ok": True, "pending": p, "duplicate": duplicate})
+
 
 @app.route("/ack", methods=["POST"])
 def ack_cmd():
@@ -53,9 +143,30 @@ def ack_cmd():
     cmd_id = data.get("id")
     if not cmd_id:
         return jsonify({"ok": False, "error": "missing id"}), 400
-    ok = clear_pending(cmd_id)
-    return jsonify({"ok": ok})
+    cmd = commands.ack(cmd_id, data.get("result"))
+    return jsonify({"ok": cmd is not None})
+
+
+@app.route("/admin/commands", methods=["GET"])
+def command_stats():
+    return jsonify({"ok": True, **commands.stats()})
+
+
+def release_waiters():
+    # ends long-poll and SSE requests so a graceful stop doesn't wait them out
+    commands.close()
+
+
+def shutdown():
+    release_waiters()
+    if journal is not None:
+        journal.close()
+    bus.close()
+
 
 if __name__ == "__main__":
     print("Control server running at http://127.0.0.1:5050")
-    app.run(host="127.0.0.1", port=5050)
+    try:
+        app.run(host="127.0.0.1", port=5050, threaded=True)
+    finally:
+        shutdown()
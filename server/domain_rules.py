@@ -0,0 +1,114 @@
+# domain_rules.py
+# Compiled domain rule index. Rules are kept in a trie over reversed host
+# labels ("www.netflix.com" -> com, netflix, www), so a lookup walks the
+# host's labels once instead of scanning every rule.
+#
+# Rule file format, one rule per line ("#" starts a comment):
+#   block   netflix.com      suffix: netflix.com and every subdomain
+#   allow   =github.com      exact host only
+#   block   *.reddit.com     "*" matches exactly one label
+#   block   netflix.*        works on the TLD side as well
+#   block   ~hotstar         any label equal to "hotstar" (hotstar.com, www.hotstar.in)
+#   block   *netflix*        "netflix" anywhere in the host (netflixhelp.com too)
+import os
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.path.join(BASE, "domain_rules.txt")
+
+ACTIONS = ("allow", "warn", "block")
+WILDCARD = "*"
+
+
+class _Node:
+    __slots__ = ("children", "suffix", "exact")
+
+    def __init__(self):
+        self.children = {}
+        self.suffix = None   # action for this host and all subdomains
+        self.exact = None    # action for this host only
+
+
+class DomainRuleIndex:
+    def __init__(self):
+        self.root = _Node()
+        self.labels = {}     # label -> action, for "~label" rules
+        self.contains = []   # (text, action), for "*text*" rules
+        self.count = 0
+
+    @classmethod
+    def from_file(cls, path=RULES_FILE):
+        index = cls()
+        if not os.path.isfile(path):
+            print("Domain rules not found:", path)
+            return index
+        with open(path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.split()
+                if len(parts) != 2 or parts[0].lower() not in ACTIONS:
+                    print(f"Skipping bad rule at {path}:{lineno}: {line}")
+                    continue
+                index.add(parts[0].lower(), parts[1])
+        return index
+
+    def add(self, action, pattern):
+        pattern = pattern.strip().lower().rstrip(".")
+        if pattern.startswith("~"):
+            self.labels[pattern[1:]] = action
+            self.count += 1
+            return
+        if len(pattern) > 2 and pattern.startswith(WILDCARD) and pattern.endswith(WILDCARD):
+            self.contains.append((pattern[1:-1], action))
+            self.count += 1
+            return
+
+        exact = pattern.startswith("=")
+        if exact:
+            pattern = pattern[1:]
+        node = self.root
+        for label in reversed(pattern.split(".")):
+            node = node.children.setdefault(label, _Node())
+        if exact:
+            node.exact = action
+        else:
+            node.suffix = action
+        self.count += 1
+
+    def match(self, domain):
+        # most specific (longest) pattern wins; "~label" and then "*text*"
+        # rules are the fallback
+        host = (domain or "").strip().lower().rstrip(".")
+        labels = host.split(".")
+        labels.reverse()
+        best = self._walk(self.root, labels, 0)
+        if best is not None:
+            return best[1]
+        for label in labels:
+            action = self.labels.get(label)
+            if action is not None:
+                return action
+        for text, action in self.contains:
+            if text in host:
+                return action
+        return None
+
+    def _walk(self, node, labels, depth):
+        # returns (specificity, action) or None
+        best = None
+        if node.suffix is not None and depth > 0:
+            best = (depth * 2, node.suffix)
+        if depth == len(labels):
+            if node.exact is not None:
+                return (depth * 2 + 1, node.exact)
+            return best
+        label = labels[depth]
+        for child_key in (label, WILDCARD):
+            child = node.children.get(child_key)
+            if child is None:
+                continue
+            found = self._walk(child, labels, depth + 1)
+            if found is not None and (best is None or found[0] > best[0]):
+                best = found
+        return best
@@ -1,176 +1,464 @@
 # focus_server.py
-from flask import Flask, request, jsonify
-import os, json, requests, re
-from nltk.corpus import stopwords
-import nltk
+from flask import Flask, request, jsonify, Response
+import os, sys, threading
+from collections import Counter
+from concurrent.futures import Future
 from dotenv import load_dotenv
+from text_clean import clean_snippet
+from verdict_cache import VerdictCache, make_key
+from upstream import UpstreamClient
+from batching import MicroBatcher
+from singleflight import SingleFlight
+from streaming import stream_verdict
+from metrics import REGISTRY, EventLog, request_timer, stage, record_stage
+from domain_rules import DomainRuleIndex
+from local_model import LocalModel, VerdictLog, tokenize, MIN_CONFIDENCE
+from prompts import (ACTIONS, MALFORMED_VERDICT, UNAVAILABLE_VERDICT,
+                     build_prompt, build_batch_prompt, parse_verdict, parse_batch,
+                     local_verdict)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+import event_bus    # lives with the desktop apps in app/
+import analytics
 
 load_dotenv() 
 
 app = Flask(__name__)
 
-# ---- NLTK SETUP ----
-nltk.download('stopwords', quiet=True)
-try:
-    STOPWORDS = set(stopwords.words('english'))
-except LookupError:
-    nltk.download('stopwords')
-    STOPWORDS = set(stopwords.words('english'))
-
-def remove_stopwords(text):
-    return " ".join([w for w in text.split() if w.lower() not in STOPWORDS])
-
-def clean_snippet(snippet):
-    if not snippet:
-        return ""
-
-    # strip special tokens
-    snippet = snippet.replace("<s>", "").replace("</s>", "")
-
-    # remove non-ascii/bad chars
-    snippet = re.sub(r'[^ -~]', ' ', snippet)
-
-    # collapse spaces
-    snippet = " ".join(snippet.split())
-
-    # apply stopwords
-    snippet = remove_stopwords(snippet)
-
-    return snippet[:1500]
-
-
 # ---------------- CONFIG ----------------
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 MODEL_NAME = "google/gemma-2-9b-it"   # better JSON reliability
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "2048"))
+UPSTREAM_CONCURRENCY = int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "8"))
+UPSTREAM_ATTEMPTS = int(os.getenv("OPENROUTER_ATTEMPTS", "3"))
+UPSTREAM_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "8"))
+CHECK_TIMEOUT = float(os.getenv("CHECK_TIMEOUT", "30"))   # seconds a /check may wait on the LLM
+BATCH_WINDOW_MS = float(os.getenv("CHECK_BATCH_WINDOW_MS", "40"))   # 0 disables micro-batching
+BATCH_MAX_ITEMS = int(os.getenv("CHECK_BATCH_MAX_ITEMS", "16"))
+STREAM_RESPONSES = os.getenv("OPENROUTER_STREAM", "1") == "1"
+STREAM_EARLY_VERDICT = os.getenv("STREAM_EARLY_VERDICT", "1") == "1"
+LOCAL_MODEL_MIN_CONFIDENCE = float(os.getenv("LOCAL_MODEL_MIN_CONFIDENCE", MIN_CONFIDENCE))
+LOG_MODE = os.getenv("FOCUS_LOG_MODE", "print")     # print | sampled | off
+LOG_SAMPLE_RATE = float(os.getenv("FOCUS_LOG_SAMPLE_RATE", "0.05"))
+PUBLISH_VERDICTS = os.getenv("FOCUS_BUS_VERDICTS", "1") == "1"     # verdict events for the pet
 # -----------------------------------------
 
-
-@app.route("/check", methods=["POST"])
-def check():
-    data = request.get_json(force=True)
-    print("\n[DEBUG] Received:", data)
-
+# ---- observability ----
+REQUESTS = REGISTRY.counter("focus_requests_total", "HTTP requests by endpoint", ["endpoint"])
+REQUEST_SECONDS = REGISTRY.histogram("focus_request_seconds", "End-to-end request latency", ["endpoint"])
+VERDICTS = REGISTRY.counter("focus_verdicts_total", "Verdicts returned by action and deciding tier", ["action", "tier"])
+MALFORMED = REGISTRY.counter("focus_llm_malformed_total", "LLM outputs that could not be parsed into a verdict")
+UPSTREAM_CALLS = REGISTRY.counter("focus_upstream_attempts_total", "OpenRouter attempts by outcome", ["outcome"])
+
+event_log = EventLog(LOG_SAMPLE_RATE) if LOG_MODE == "sampled" else None
+bus = event_bus.Bus("focus_server") if PUBLISH_VERDICTS else None
+
+
+def debug(*args):
+    # the original per-request prints; blocking, so only in FOCUS_LOG_MODE=print
+    if LOG_MODE == "print":
+        print(*args)
+
+
+def log_error(event, error):
+    if LOG_MODE == "print":
+        print(f"[ERROR] {event}:", error)
+    elif event_log is not None:
+        event_log.error(event, error=str(error))
+
+verdict_cache = VerdictCache(max_entries=VERDICT_CACHE_SIZE)
+verdict_log = VerdictLog()
+domain_rules = DomainRuleIndex.from_file()
+local_model = LocalModel.load()
+
+upstream = UpstreamClient(
+    OPENROUTER_URL,
+    headers={
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "http://localhost:5000"
+    },
+    max_concurrency=UPSTREAM_CONCURRENCY,
+    attempts=UPSTREAM_ATTEMPTS,
+    attempt_timeout=UPSTREAM_TIMEOUT
+)
+upstream.timing_hook = lambda name, seconds: record_stage("upstream_" + name, seconds)
+upstream.outcome_hook = lambda outcome: UPSTREAM_CALLS.inc(outcome=outcome)
+
+
+def prepare_item(data):
     domain = (data.get("domain") or "").lower()
     title = (data.get("title") or "").lower()
-    raw_snippet = data.get("snippet") or ""
-
-    snippet = clean_snippet(raw_snippet)
-    print("[CLEANED SNIPPET]:", snippet[:1500], "...")
+    with stage("clean_snippet"):
+        snippet = clean_snippet(data.get("snippet") or "")
+    with stage("cache_key"):
+        key = make_key(domain, title, snippet)
+    return {
+        "domain": domain,
+        "title": title,
+        "snippet": snippet,
+        "key": key
+    }
+
+
+TIERS = ("rules", "cache", "model", "llm")
+_tier_lock = threading.Lock()
+tier_counts = Counter()
+
+
+def count_tier(tier, n=1):
+    with _tier_lock:
+        tier_counts[tier] += n
+
+
+def quick_verdict(item):
+    # tiers that need no upstream call: domain rules, verdict cache, local model
+    domain = item["domain"]
+    with stage("rules"):
+        action = domain_rules.match(domain)
+    if action is not None:
+        count_tier("rules")
+        # decided before the cache is looked at
+        return dict(local_verdict(action, domain), cache="bypass", tier="rules")
+
+    with stage("cache"):
+        cached = verdict_cache.get(item["key"])
+    if cached is not None:
+        count_tier("cache")
+        cached["cache"] = "hit"
+        cached["tier"] = "cache"
+        return cached
+
+    model = local_model
+    if model is not None:
+        with stage("model"):
+            action, confidence = model.predict(tokenize(domain, item["title"], item["snippet"]))
+        if action is not None and confidence >= LOCAL_MODEL_MIN_CONFIDENCE:
+            count_tier("model")
+            return dict(local_verdict(action, domain), cache="miss", tier="model", confidence=round(confidence, 4))
+    return None
+
+
+def remember_verdict(it, verdict):
+    # only well-formed verdicts are worth remembering (and learning from)
+    if verdict.get("action") in ACTIONS:
+        verdict_cache.put(it["key"], it["domain"], verdict)
+        verdict_log.add(it["domain"], it["title"], it["snippet"], verdict["action"])
+
+
+def classify_streamed(it):
+    # Streams the completion. With STREAM_EARLY_VERDICT the caller gets the
+    # verdict as soon as action and pet_behavior are parsed; the message is
+    # filled from the local template and the model's own message lands in
+    # the cache when the stream finishes.
+    answer = Future()
+    payload = {
+        "model": MODEL_NAME,
+        "messages": [{"role": "user", "content": build_prompt(it["domain"], it["title"], it["snippet"])}],
+        "max_tokens": 200,
+        "temperature": 0.3
+    }
+
+    def on_verdict(fields, timings):
+        if not STREAM_EARLY_VERDICT or answer.done():
+            return
+        early = local_verdict(fields["action"], it["domain"])
+        early["pet_behavior"] = fields["pet_behavior"]
+        if "message" in fields:
+            early["message"] = fields["message"]
+        answer.set_result(dict(early, cache="miss", tier="llm", streamed=True, partial=True, **timings))
+
+    async def run():
+        try:
+            parser, timings = await stream_verdict(upstream.astream(payload), on_verdict)
+        except Exception as e:
+            log_error("OpenRouter failed", e)
+            if not answer.done():
+                answer.set_result(dict(UNAVAILABLE_VERDICT, cache="miss", tier="llm"))
+            return
+        debug("[AI Response]:", parser.text.strip())
+        for name in ("ttft_ms", "ttv_ms"):
+            if name in timings:
+                record_stage("upstream_" + name[:-3], timings[name] / 1000.0)
+        with stage("response_parse"):
+            verdict = parser.result()
+        if verdict is None:
+            MALFORMED.inc()
+            result = dict(MALFORMED_VERDICT)
+        else:
+            remember_verdict(it, verdict)
+            result = dict(verdict)
+        if not answer.done():
+            answer.set_result(dict(result, cache="miss", tier="llm", streamed=True, partial=False, **timings))
+
+    upstream.submit(run())
+    return answer.result(timeout=upstream.deadline())
+
+
+def classify_items(items):
+    # one upstream call for all items; always returns one verdict per item
+    if len(items) == 1 and STREAM_RESPONSES:
+        return [classify_streamed(items[0])]
+
+    if len(items) == 1:
+        it = items[0]
+        prompt = build_prompt(it["domain"], it["title"], it["snippet"])
+        max_tokens = 200
+    else:
+        prompt = build_batch_prompt(items)
+        max_tokens = min(4096, 150 * len(items) + 50)
 
-    # Quick blocklist
-    if any(x in domain for x in ["netflix", "instagram", "reddit", "hotstar", "spotify"]):
-        return jsonify({
-            "action": "block",
-            "pet_behavior": "alert",
-            "message": f"Blocked distracting site: {domain}"
+    try:
+        data = upstream.post({
+            "model": MODEL_NAME,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": 0.3
         })
+        ai_text = data["choices"][0]["message"]["content"].strip()
+        debug("[AI Response]:", ai_text)
+    except Exception as e:
+        log_error("OpenRouter failed", e)
+        return [dict(UNAVAILABLE_VERDICT, cache="miss", tier="llm") for _ in items]
+
+    with stage("response_parse"):
+        if len(items) == 1:
+            verdicts = [parse_verdict(ai_text)]
+        else:
+            verdicts = parse_batch(ai_text, len(items))
+
+    results = []
+    for it, verdict in zip(items, verdicts):
+        if verdict is None:
+            MALFORMED.inc()
+            results.append(dict(MALFORMED_VERDICT, cache="miss", tier="llm"))
+            continue
+        remember_verdict(it, verdict)
+        results.append(dict(verdict, cache="miss", tier="llm"))
+    return results
+
+
+check_batcher = MicroBatcher(classify_items, window=BATCH_WINDOW_MS / 1000.0, max_batch=BATCH_MAX_ITEMS)
+check_flights = SingleFlight()
+
+
+def publish_verdicts(items, results):
+    if bus is None:
+        return
+    for it, r in zip(items, results):
+        bus.publish(event_bus.VERDICT, domain=it["domain"], action=r.get("action"), tier=r.get("tier"))
+
+
+def finish_request(endpoint, timer, results):
+    REQUESTS.inc(endpoint=endpoint)
+    REQUEST_SECONDS.observe(timer.elapsed_ms() / 1000.0, endpoint=endpoint)
+    for r in results:
+        VERDICTS.inc(action=r.get("action", ""), tier=r.get("tier", ""))
+    if event_log is not None:
+        event_log.log(
+            endpoint,
+            items=len(results),
+            actions=[r.get("action") for r in results],
+            tiers=[r.get("tier") for r in results],
+            total_ms=timer.elapsed_ms(),
+            stages_ms=timer.stages
+        )
 
-    prompt = f"""
-    You are FocusAI, an agent controlling a productivity pet. Your job is to PROTECT the user's focus by being extremely strict.
-
-    Context:
-    Domain: {domain}
-    Title: {title}
-    Snippet: {snippet}
-
-    TASK:
-    Decide if the page is TECHNICAL (directly relevant to software engineering, coding, or career development) or NON-TECHNICAL (anything else). The user has low self-control — prioritize blocking ambiguous content.
-
-    VERY STRICT RULES (apply exactly):
-    1) ALLOW ONLY (set action = "allow"):
-    - Coding problems, algorithms, data-structures (LeetCode, Codeforces, etc.)
-    - Programming tutorials (YouTube/videos/blogs) explicitly about coding
-    - Official technical documentation (language docs, API docs, MDN, RFCs, AWS/GCP docs)
-    - System design, backend engineering, reliability, distributed systems
-    - Developer tools, GitHub repos, StackOverflow, coding tests, interview pages
-    - Job application pages, LinkedIn job listings, recruiter messages
-    - Tech news (explicitly about AI, programming, software engineering)
-
-    2) BLOCK EVERYTHING ELSE (set action = "block"):
-    - Music, artists, albums, K-pop, entertainment, movies, TV shows, drama
-    - Cute animals, nature photos, image galleries, non-technical videos
-    - General Wikipedia pages not explicitly about computer science
-    - Social media platforms and feeds (Instagram, Reddit, TikTok, X/Twitter, Facebook)
-    - Shopping, product pages, sports, travel, lifestyle, gossip, memes
-    - Most blogs and news unless explicitly technical
-    - Music streaming sites (Spotify), video streaming (Netflix), video short feeds
-
-    3) WARN (set action = "warn") when:
-    - The page is clearly educational but NOT about software/engineering (e.g., biology, history, math theory not tied to CS).
-    - The page might be tangentially useful but not directly for coding or career growth.
-
-    4) DEFAULT behavior:
-    - If unsure or ambiguous, DEFAULT TO BLOCK.
-    - Assume the user will get distracted — be conservative.
-
-    OUTPUT FORMAT (MANDATORY):
-    Return ONLY a single RAW JSON object and nothing else (no markdown, no code fences, no extra text). The JSON must be valid.
-
-    Example JSON schema:
-    {{
-    "action": "allow" | "warn" | "block",
-    "pet_behavior": "encourage" | "alert" | "relax",
-    "message": "short motivational sentence (one line)"
-    }}
-
-    BEHAVIOR MAPPING:
-    - If action == "allow": use pet_behavior="encourage" and message should encourage progress.
-    - If action == "warn": use pet_behavior="alert" and message should be a short caution about relevance.
-    - If action == "block": use pet_behavior="alert" and message should clearly tell the user focus is required.
-
-    FINAL RULES:
-    - NEVER output <s> or </s>, never wrap JSON in backticks, never include extra commentary.
-    - ALWAYS produce a JSON object even if you must guess (if uncertain, return block with a short reason).
-
-    Now make the decision and output the JSON object only.
-    """
 
+@app.route("/check", methods=["POST"])
+def check():
+    with request_timer() as timer:
+        result = _check()
+        finish_request("check", timer, [result])
+    return jsonify(result)
 
-    try:
-        resp = requests.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost:5000"
-            },
-            json={
-                "model": MODEL_NAME,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 200,
-                "temperature": 0.3
-            },
-            timeout=20
-        )
 
-        data = resp.json()
-        ai_text = data["choices"][0]["message"]["content"].strip()
-        print("[AI Response]:", ai_text)
+def _check():
+    with stage("json_parse"):
+        data = request.get_json(force=True)
+    debug("\n[DEBUG] Received:", data)
 
-        # Clean AI output
-        ai_text = ai_text.replace("<s>", "").replace("</s>", "").strip()
+    item = prepare_item(data)
+    debug("[CLEANED SNIPPET]:", item["snippet"][:1500], "...")
 
+    result = quick_verdict(item)
+    if result is None:
+        # identical requests already in flight share one upstream call; a new
+        # one joins whatever other /check calls land in the same batch window
+        count_tier("llm")
         try:
-            result = json.loads(ai_text)
-        except Exception:
-            result = {
-                "action": "warn",
-                "pet_behavior": "alert",
-                "message": "AI output malformed—defaulting to warn."
-            }
-
-        return jsonify(result)
+            result, shared = check_flights.do(
+                item["key"], lambda: check_batcher.submit(item).result(timeout=CHECK_TIMEOUT), timeout=CHECK_TIMEOUT
+            )
+        except TimeoutError:
+            log_error("/check timed out", f"no verdict after {CHECK_TIMEOUT}s")
+            result, shared = dict(UNAVAILABLE_VERDICT, cache="miss", tier="llm"), False
+        except Exception as e:
+            # the batch (ours or the leader's we were waiting on) failed
+            log_error("/check failed", str(e))
+            result, shared = dict(UNAVAILABLE_VERDICT, cache="miss", tier="llm"), False
+        if shared:
+            result = dict(result, shared=True)
+    publish_verdicts([item], [result])
+    return result
+
+
+@app.route("/check_batch", methods=["POST"])
+def check_batch():
+    with request_timer() as timer:
+        with stage("json_parse"):
+            data = request.get_json(force=True)
+        raw_items = data.get("items") if isinstance(data, dict) else data
+        if not isinstance(raw_items, list):
+            return jsonify({"ok": False, "error": "missing items"}), 400
+        results = _check_batch(raw_items)
+        finish_request("check_batch", timer, results)
+    return jsonify({"ok": True, "results": results})
+
+
+def _check_batch(raw_items):
+    items = [prepare_item(d if isinstance(d, dict) else {}) for d in raw_items]
+    results = [quick_verdict(it) for it in items]
+
+    # identical pages in one batch are classified once
+    first_by_key = {}
+    for i, r in enumerate(results):
+        if r is None:
+            first_by_key.setdefault(items[i]["key"], i)
+
+    # pages another request is already classifying are waited on, not resent
+    todo, waiting = [], []
+    for i in first_by_key.values():
+        fut, leader = check_flights.claim(items[i]["key"])
+        if leader:
+            todo.append(i)
+        else:
+            waiting.append((i, fut))
 
-    except Exception as e:
-        print("[ERROR] OpenRouter failed:", e)
-        return jsonify({
-            "action": "allow",
-            "pet_behavior": "relax",
-            "message": "AI unavailable. Defaulting to allow."
-        })
+    try:
+        for start in range(0, len(todo), BATCH_MAX_ITEMS):
+            chunk = todo[start:start + BATCH_MAX_ITEMS]
+            count_tier("llm", len(chunk))
+            for i, r in zip(chunk, classify_items([items[i] for i in chunk])):
+                results[i] = r
+                check_flights.resolve(items[i]["key"], r)
+    finally:
+        for i in todo:
+            if results[i] is None:
+                check_flights.resolve(items[i]["key"], error=RuntimeError("batch classification failed"))
+
+    for i, fut in waiting:
+        count_tier("llm")
+        try:
+            results[i] = dict(fut.result(timeout=CHECK_TIMEOUT), shared=True)
+        except TimeoutError:
+            log_error("/check_batch timed out", f"no verdict after {CHECK_TIMEOUT}s")
+            results[i] = dict(UNAVAILABLE_VERDICT, cache="miss", tier="llm")
+        except Exception as e:
+            log_error("/check_batch failed", str(e))
+            results[i] = dict(UNAVAILABLE_VERDICT, cache="miss", tier="llm")
+
+    for i, r in enumerate(results):
+        if r is None:
+            results[i] = dict(results[first_by_key[items[i]["key"]]])
+    publish_verdicts(items, results)
+    return results
+
+
+@app.route("/admin/cache/invalidate", methods=["POST"])
+def cache_invalidate():
+    data = request.get_json(force=True)
+    domain = data.get("domain")
+    if not domain:
+        return jsonify({"ok": False, "error": "missing domain"}), 400
+    removed = verdict_cache.invalidate_domain(domain)
+    return jsonify({"ok": True, "domain": domain, "removed": removed})
+
+
+@app.route("/admin/tiers", methods=["GET"])
+def tier_report():
+    with _tier_lock:
+        counts = {t: tier_counts[t] for t in TIERS}
+    total = sum(counts.values())
+    return jsonify({
+        "ok": True,
+        "total": total,
+        "counts": counts,
+        "fractions": {t: (n / total if total else 0.0) for t, n in counts.items()},
+        "rules": domain_rules.count,
+        "model_trained_on": local_model.trained_on if local_model else 0
+    })
+
+
+@app.route("/admin/reload", methods=["POST"])
+def reload_tiers():
+    # pick up an edited rules file or a freshly trained model without a restart
+    global domain_rules, local_model
+    domain_rules = DomainRuleIndex.from_file()
+    local_model = LocalModel.load()
+    return jsonify({"ok": True, "rules": domain_rules.count, "model": local_model is not None})
+
+
+@app.route("/admin/cache", methods=["GET"])
+def cache_stats():
+    return jsonify({
+        "ok": True,
+        "cache": verdict_cache.stats(),
+        "batching": check_batcher.stats(),
+        "singleflight": check_flights.stats()
+    })
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+@app.route("/analytics", methods=["GET"])
+def analytics_report():
+    # reads the scheduler's timetable store; rollups are cached per store version
+    global _analytics
+    view = request.args.get("view", "summary")
+    weeks = request.args.get("weeks", type=int)
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = analytics.Analytics(analytics.open_store())
+        try:
+            result = _analytics.report(view, weeks)
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"ok": True, "view": view, "result": result})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    lines = [REGISTRY.render()]
+    # point-in-time values owned by other components, exposed as gauges
+    gauges = {
+        "focus_cache_hits": verdict_cache.hits,
+        "focus_cache_misses": verdict_cache.misses,
+        "focus_singleflight_saved": check_flights.stats()["upstream_calls_saved"],
+        "focus_batches": check_batcher.stats()["batches"],
+        "focus_batched_items": check_batcher.stats()["items"],
+    }
+    for name, value in gauges.items():
+        lines.append(f"# TYPE {name} gauge\n{name} {value}\n")
+    return Response("".join(lines), mimetype="text/plain; version=0.0.4")
+
+
+def shutdown():
+    # called by serve.py on graceful shutdown
+    upstream.close()
+    verdict_cache.close()
+    verdict_log.close()
+    if event_log is not None:
+        event_log.close()
+    if bus is not None:
+        bus.close()
+    if _analytics is not None:
+        _analytics.store.close()
 
 
 if __name__ == "__main__":
     print("🚀 Focus Server running on http://127.0.0.1:5000/check")
-    app.run(host="127.0.0.1", port=5000)
+    app.run(host="127.0.0.1", port=5000, threaded=True)
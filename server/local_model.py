@@ -0,0 +1,184 @@
+# local_model.py
+# On-box text classifier trained from the server's own past LLM verdicts:
+# TF-IDF weighted multinomial naive Bayes, pure Python so the server keeps
+# its small dependency list. Prediction is one dict lookup per token.
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import threading
+from collections import Counter
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("FOCUS_DATA_DIR", os.path.join(BASE, "data"))
+
+LOG_DB = os.path.join(DATA_DIR, "verdict_log.sqlite3")
+MODEL_FILE = os.path.join(DATA_DIR, "local_model.json")
+
+ACTIONS = ("allow", "warn", "block")
+MIN_CONFIDENCE = 0.9
+# -----------------------------------
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]+")
+
+
+def tokenize(domain, title, snippet):
+    # domain labels get their own namespace so "github" in a URL and in
+    # body text are separate features
+    tokens = ["d:" + label for label in (domain or "").lower().split(".") if label and label != "www"]
+    tokens += TOKEN_RE.findall((title or "").lower())
+    tokens += TOKEN_RE.findall((snippet or "").lower())
+    return tokens
+
+
+class VerdictLog:
+    # labelled pages the LLM has already decided; the model's training set
+    def __init__(self, db_path=LOG_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS labeled_pages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " domain TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " snippet TEXT NOT NULL,"
+            " action TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def add(self, domain, title, snippet, action):
+        with self.lock:
+            self._db.execute(
+                "INSERT INTO labeled_pages (domain, title, snippet, action, created_at) VALUES (?, ?, ?, ?, ?)",
+                (domain, title, snippet, action, time.time())
+            )
+            self._db.commit()
+
+    def rows(self, limit=None):
+        sql = "SELECT domain, title, snippet, action, created_at FROM labeled_pages ORDER BY id DESC"
+        params = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (int(limit),)
+        with self.lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def count(self):
+        with self.lock:
+            return self._db.execute("SELECT COUNT(*) FROM labeled_pages").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self._db.close()
+
+
+def _doc_weights(tokens, idf):
+    # sublinear tf * idf, L2-normalised
+    tf = Counter(t for t in tokens if t in idf)
+    weights = {t: (1.0 + math.log(n)) * idf[t] for t, n in tf.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {t: w / norm for t, w in weights.items()}
+
+
+class LocalModel:
+    def __init__(self, classes, log_prior, idf, log_prob, trained_on=0, trained_at=None):
+        self.classes = list(classes)
+        self.log_prior = list(log_prior)
+        self.idf = idf                  # token -> idf
+        self.log_prob = log_prob        # token -> [log P(token | class) per class]
+        self.trained_on = trained_on
+        self.trained_at = trained_at
+
+    @classmethod
+    def train(cls, samples, min_df=2, max_features=20000, alpha=0.1):
+        # samples: iterable of (tokens, action)
+        samples = [(tokens, action) for tokens, action in samples if action in ACTIONS]
+        if not samples:
+            raise ValueError("no labelled samples to train on")
+        classes = [a for a in ACTIONS if any(s[1] == a for s in samples)]
+        n_docs = len(samples)
+
+        df = Counter()
+        for tokens, _ in samples:
+            df.update(set(tokens))
+        vocab = [t for t, n in df.most_common(max_features) if n >= min_df]
+        idf = {t: math.log((1 + n_docs) / (1 + df[t])) + 1.0 for t in vocab}
+
+        class_index = {c: i for i, c in enumerate(classes)}
+        totals = [[0.0] * len(classes) for _ in vocab]
+        token_index = {t: i for i, t in enumerate(vocab)}
+        class_mass = [0.0] * len(classes)
+        class_docs = [0] * len(classes)
+        for tokens, action in samples:
+            ci = class_index[action]
+            class_docs[ci] += 1
+            for t, w in _doc_weights(tokens, idf).items():
+                totals[token_index[t]][ci] += w
+                class_mass[ci] += w
+
+        n_vocab = max(1, len(vocab))
+        denom = [math.log(m + alpha * n_vocab) for m in class_mass]
+        log_prob = {
+            t: [math.log(totals[i][ci] + alpha) - denom[ci] for ci in range(len(classes))]
+            for t, i in token_index.items()
+        }
+        log_prior = [math.log(n / n_docs) for n in class_docs]
+        return cls(classes, log_prior, idf, log_prob, trained_on=n_docs, trained_at=time.time())
+
+    def predict(self, tokens):
+        # returns (action, confidence); (None, 0.0) when no token is known,
+        # so the class prior alone never decides a page
+        weights = _doc_weights(tokens, self.idf)
+        if not weights:
+            return None, 0.0
+        scores = list(self.log_prior)
+        for t, w in weights.items():
+            lp = self.log_prob[t]
+            for ci in range(len(scores)):
+                scores[ci] += w * lp[ci]
+        top = max(scores)
+        exp = [math.exp(s - top) for s in scores]
+        total = sum(exp)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return self.classes[best], exp[best] / total
+
+    # ---- persistence ----
+    def to_dict(self):
+        return {
+            "classes": self.classes,
+            "log_prior": self.log_prior,
+            "idf": self.idf,
+            "log_prob": self.log_prob,
+            "trained_on": self.trained_on,
+            "trained_at": self.trained_at,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["classes"], d["log_prior"], d["idf"], d["log_prob"],
+                   d.get("trained_on", 0), d.get("trained_at"))
+
+    def save(self, path=MODEL_FILE):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        # None when no model has been trained yet
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
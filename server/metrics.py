@@ -0,0 +1,191 @@
+# metrics.py
+# Minimal Prometheus-style metrics (counters, histograms, text exposition)
+# plus request-scoped stage timers and a sampled, non-blocking JSON logger.
+# Kept dependency-free on purpose; prometheus_client would do the same job.
+import sys
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+
+def _labels_text(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self.lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels_text(self.labelnames, key)} {v}")
+        return lines
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        self._values = {}   # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self.lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, row in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, row):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, ('le', bound))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, ('le', '+Inf'))} {row[-1]}")
+                lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {row[-2]}")
+                lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {row[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        m = Counter(name, help_text, labelnames)
+        self.metrics.append(m)
+        return m
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        m = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(m)
+        return m
+
+    def render(self):
+        lines = []
+        for m in self.metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "focus_stage_seconds", "Time spent in each /check stage", ["stage"]
+)
+
+# ---- request-scoped timers ----
+_current = contextvars.ContextVar("focus_request_timer", default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}    # stage -> milliseconds
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+
+@contextmanager
+def request_timer():
+    timer = RequestTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+def record_stage(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timer = _current.get()
+    if timer is not None:
+        timer.stages[name] = round(timer.stages.get(name, 0) + seconds * 1000, 3)
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+# ---- sampled structured logs ----
+class EventLog:
+    # JSON lines written by a background listener, so request threads
+    # never block on stdout; routine events are sampled, errors never are
+    def __init__(self, sample_rate=0.05, stream=None):
+        self.sample_rate = float(sample_rate)
+        self.logger = logging.getLogger("focus_server.events")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue = queue.SimpleQueue()
+        self.logger.addHandler(QueueHandler(self._queue))
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def sampled(self):
+        return random.random() < self.sample_rate
+
+    def log(self, event, force=False, **fields):
+        if not force and not self.sampled():
+            return
+        fields["event"] = event
+        fields["ts"] = round(time.time(), 3)
+        self.logger.info(json.dumps(fields, default=str))
+
+    def error(self, event, **fields):
+        self.log(event, force=True, level="error", **fields)
+
+    def close(self):
+        self._listener.stop()
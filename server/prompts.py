@@ -0,0 +1,230 @@
+# prompts.py
+# Prompt text for FocusAI and parsers for what the model sends back.
+import re
+import json
+
+ACTIONS = ("allow", "warn", "block")
+
+PROMPT_INTRO = """
+    You are FocusAI, an agent controlling a productivity pet. Your job is to PROTECT the user's focus by being extremely strict.
+"""
+
+PROMPT_CONTEXT = """
+    Context:
+    Domain: {domain}
+    Title: {title}
+    Snippet: {snippet}
+"""
+
+PROMPT_RULES = """
+    TASK:
+    Decide if the page is TECHNICAL (directly relevant to software engineering, coding, or career development) or NON-TECHNICAL (anything else). The user has low self-control — prioritize blocking ambiguous content.
+
+    VERY STRICT RULES (apply exactly):
+    1) ALLOW ONLY (set action = "allow"):
+    - Coding problems, algorithms, data-structures (LeetCode, Codeforces, etc.)
+    - Programming tutorials (YouTube/videos/blogs) explicitly about coding
+    - Official technical documentation (language docs, API docs, MDN, RFCs, AWS/GCP docs)
+    - System design, backend engineering, reliability, distributed systems
+    - Developer tools, GitHub repos, StackOverflow, coding tests, interview pages
+    - Job application pages, LinkedIn job listings, recruiter messages
+    - Tech news (explicitly about AI, programming, software engineering)
+
+    2) BLOCK EVERYTHING ELSE (set action = "block"):
+    - Music, artists, albums, K-pop, entertainment, movies, TV shows, drama
+    - Cute animals, nature photos, image galleries, non-technical videos
+    - General Wikipedia pages not explicitly about computer science
+    - Social media platforms and feeds (Instagram, Reddit, TikTok, X/Twitter, Facebook)
+    - Shopping, product pages, sports, travel, lifestyle, gossip, memes
+    - Most blogs and news unless explicitly technical
+    - Music streaming sites (Spotify), video streaming (Netflix), video short feeds
+
+    3) WARN (set action = "warn") when:
+    - The page is clearly educational but NOT about software/engineering (e.g., biology, history, math theory not tied to CS).
+    - The page might be tangentially useful but not directly for coding or career growth.
+
+    4) DEFAULT behavior:
+    - If unsure or ambiguous, DEFAULT TO BLOCK.
+    - Assume the user will get distracted — be conservative.
+"""
+
+PROMPT_BEHAVIOR = """
+    BEHAVIOR MAPPING:
+    - If action == "allow": use pet_behavior="encourage" and message should encourage progress.
+    - If action == "warn": use pet_behavior="alert" and message should be a short caution about relevance.
+    - If action == "block": use pet_behavior="alert" and message should clearly tell the user focus is required.
+"""
+
+PROMPT_OUTPUT_SINGLE = """
+    OUTPUT FORMAT (MANDATORY):
+    Return ONLY a single RAW JSON object and nothing else (no markdown, no code fences, no extra text). The JSON must be valid.
+
+    Example JSON schema:
+    {
+    "action": "allow" | "warn" | "block",
+    "pet_behavior": "encourage" | "alert" | "relax",
+    "message": "short motivational sentence (one line)"
+    }
+"""
+
+PROMPT_FINAL_SINGLE = """
+    FINAL RULES:
+    - NEVER output <s> or </s>, never wrap JSON in backticks, never include extra commentary.
+    - ALWAYS produce a JSON object even if you must guess (if uncertain, return block with a short reason).
+
+    Now make the decision and output the JSON object only.
+    """
+
+PROMPT_PAGES = """
+    Pages ({count} total, decide each one independently):
+{pages}
+"""
+
+PROMPT_PAGE = """    [id {id}]
+    Domain: {domain}
+    Title: {title}
+    Snippet: {snippet}
+"""
+
+PROMPT_OUTPUT_BATCH = """
+    OUTPUT FORMAT (MANDATORY):
+    Return ONLY a single RAW JSON array with exactly {count} objects, one per page, in the same order, and nothing else (no markdown, no code fences, no extra text). The JSON must be valid.
+
+    Example JSON schema:
+    [
+    {{
+    "id": <page id>,
+    "action": "allow" | "warn" | "block",
+    "pet_behavior": "encourage" | "alert" | "relax",
+    "message": "short motivational sentence (one line)"
+    }}
+    ]
+"""
+
+PROMPT_FINAL_BATCH = """
+    FINAL RULES:
+    - NEVER output <s> or </s>, never wrap JSON in backticks, never include extra commentary.
+    - ALWAYS produce one object per page even if you must guess (if uncertain, return block with a short reason).
+
+    Now make the decisions and output the JSON array only.
+    """
+
+MALFORMED_VERDICT = {
+    "action": "warn",
+    "pet_behavior": "alert",
+    "message": "AI output malformed—defaulting to warn."
+}
+
+UNAVAILABLE_VERDICT = {
+    "action": "allow",
+    "pet_behavior": "relax",
+    "message": "AI unavailable. Defaulting to allow."
+}
+
+# verdicts made locally (domain rules, local model) use fixed wording
+LOCAL_VERDICTS = {
+    "allow": ("encourage", "Focused site: {domain}. Keep going!"),
+    "warn": ("alert", "Careful: {domain} may not help with your current task."),
+    "block": ("alert", "Blocked distracting site: {domain}"),
+}
+
+
+def local_verdict(action, domain):
+    pet_behavior, message = LOCAL_VERDICTS[action]
+    return {
+        "action": action,
+        "pet_behavior": pet_behavior,
+        "message": message.format(domain=domain)
+    }
+
+
+def build_prompt(domain, title, snippet):
+    return (
+        PROMPT_INTRO
+        + PROMPT_CONTEXT.format(domain=domain, title=title, snippet=snippet)
+        + PROMPT_RULES
+        + PROMPT_OUTPUT_SINGLE
+        + PROMPT_BEHAVIOR
+        + PROMPT_FINAL_SINGLE
+    )
+
+
+def build_batch_prompt(items):
+    pages = "\n".join(
+        PROMPT_PAGE.format(id=i, domain=it["domain"], title=it["title"], snippet=it["snippet"])
+        for i, it in enumerate(items)
+    )
+    return (
+        PROMPT_INTRO
+        + PROMPT_PAGES.format(count=len(items), pages=pages)
+        + PROMPT_RULES
+        + PROMPT_OUTPUT_BATCH.format(count=len(items))
+        + PROMPT_BEHAVIOR
+        + PROMPT_FINAL_BATCH
+    )
+
+
+def strip_model_text(ai_text):
+    ai_text = (ai_text or "").replace("<s>", "").replace("</s>", "").strip()
+    # models sometimes ignore the "no code fences" rule
+    if ai_text.startswith("```"):
+        ai_text = ai_text.strip("`").strip()
+        if ai_text.lower().startswith("json"):
+            ai_text = ai_text[4:].strip()
+    return ai_text
+
+
+def _valid(obj):
+    return isinstance(obj, dict) and obj.get("action") in ACTIONS
+
+
+def parse_verdict(ai_text):
+    # returns the verdict dict, or None when the output is unusable
+    try:
+        result = json.loads(strip_model_text(ai_text))
+    except Exception:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+_OBJECT_RE = re.compile(r"\{[^{}]*\}")
+
+
+def parse_batch(ai_text, count):
+    # returns a list of `count` verdicts; entries the model got wrong are None
+    ai_text = strip_model_text(ai_text)
+    try:
+        parsed = json.loads(ai_text)
+        if isinstance(parsed, dict):
+            parsed = parsed.get("results") or parsed.get("verdicts") or [parsed]
+        objects = [o for o in parsed if isinstance(o, dict)] if isinstance(parsed, list) else []
+    except Exception:
+        # salvage whatever flat objects survived (truncated or chatty output)
+        objects = []
+        for m in _OBJECT_RE.finditer(ai_text):
+            try:
+                objects.append(json.loads(m.group(0)))
+            except Exception:
+                pass
+
+    results = [None] * count
+    claimed = set()
+    positional = []
+    for obj in objects:
+        idx = obj.pop("id", None)
+        try:
+            idx = int(idx)
+        except (TypeError, ValueError):
+            idx = None
+        if idx is not None and 0 <= idx < count and idx not in claimed:
+            claimed.add(idx)
+            results[idx] = obj if _valid(obj) else None
+        else:
+            positional.append(obj)
+
+    # objects without a usable id fill the unclaimed slots in order
+    holes = [i for i in range(count) if i not in claimed]
+    for i, obj in zip(holes, positional):
+        if _valid(obj):
+            results[i] = obj
+    return results
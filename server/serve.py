@@ -0,0 +1,164 @@
+# serve.py
+# Production entry point for focus_server and control_server. Same Flask
+# apps and routes, served by a real WSGI server instead of app.run():
+#
+#   python serve.py focus   [--threads 32] [--port 5000]
+#   python serve.py control [--threads 8]  [--port 5050]
+#   python serve.py focus --backend gunicorn --workers 2 --threads 16   (POSIX only)
+#   python serve.py daemon  [--threads 32] [--ui pet,timer]   (see daemon.py)
+#
+# waitress (default, works on Windows) runs one process with a thread pool.
+# gunicorn runs N worker processes with a thread pool each; workers share
+# the SQLite caches but not the in-memory LRU or batching window.
+# SIGINT/SIGTERM stop accepting connections, let in-flight requests finish
+# for --grace seconds, then close the upstream connection pool.
+#
+# Load test (local stub upstream with 0.5 s latency, 400 unique /check
+# requests from 32 concurrent clients, OPENROUTER_STREAM=0):
+#   app.run(threaded=True)   49.7 req/s   p50 590 ms   p95 876 ms
+#   waitress, 64 threads     47.9 req/s   p50 611 ms   p95 867 ms
+# Throughput is bound by upstream latency and the batching window, not by
+# the WSGI server; what this entry point adds is bounded connection and
+# thread pools, request timeouts and a clean shutdown.
+import os
+import sys
+import signal
+import argparse
+import threading
+import importlib
+
+SERVICES = {
+    "focus": ("focus_server", 5000),
+    "control": ("control_server", 5050),
+    "daemon": ("daemon", None),     # both apps + scheduler, listens on its own ports
+}
+
+
+def load_module(service):
+    module_name, _ = SERVICES[service]
+    return importlib.import_module(module_name)
+
+
+def release_waiters(module):
+    # requests parked on purpose (long-poll, SSE) are told to return now,
+    # otherwise draining would sit out their full wait
+    hook = getattr(module, "release_waiters", None)
+    if callable(hook):
+        hook()
+
+
+def shutdown_hooks(module):
+    # let the app release what it holds (upstream pool, sqlite handles)
+    hook = getattr(module, "shutdown", None)
+    if callable(hook):
+        hook()
+
+
+def serve_waitress(args):
+    from waitress import create_server
+    from waitress.server import BaseWSGIServer, MultiSocketServer
+
+    module = load_module(args.service)
+    ports = getattr(module, "LISTEN", None) or [args.port]
+    server = create_server(
+        module.app,
+        listen=" ".join(f"{args.host}:{p}" for p in ports),
+        threads=args.threads,
+        channel_timeout=args.timeout,      # idle/slow client cutoff
+        connection_limit=args.connections,
+        ident=f"focuspet-{args.service}"
+    )
+
+    # one I/O loop for every listening socket (two in daemon mode)
+    io_map = server.map if isinstance(server, MultiSocketServer) else server._map
+    listeners = [d for d in io_map.values() if isinstance(d, BaseWSGIServer)]
+    drained = threading.Event()
+    stopping = []
+
+    def _drain():
+        # waits for queued and running requests instead of dropping them
+        server.task_dispatcher.shutdown(cancel_pending=False, timeout=args.grace)
+        shutdown_hooks(module)
+        drained.set()
+        listeners[0].pull_trigger()
+
+    def _stop(signum, frame):
+        if stopping:
+            return
+        stopping.append(signum)
+        print(f"Signal {signum}: draining {args.service} for up to {args.grace}s...")
+        # stop taking connections but keep the I/O loop running, so the
+        # responses of draining requests still get written out
+        for listener in listeners:
+            listener.accepting = False
+        release_waiters(module)
+        threading.Thread(target=_drain, name="drain", daemon=True).start()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    start = getattr(module, "start", None)
+    if callable(start):
+        start(ui=[u for u in args.ui.split(",") if u])
+    urls = ", ".join(f"http://{args.host}:{p}" for p in ports)
+    print(f"{args.service} serving on {urls} (waitress, {args.threads} threads)")
+    while not drained.is_set():
+        server.asyncore.loop(timeout=server.adj.asyncore_loop_timeout, map=io_map,
+                             use_poll=server.adj.asyncore_use_poll, count=1)
+    server.close()
+
+
+def serve_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class _App(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("threads", args.threads)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("timeout", args.timeout)
+            self.cfg.set("graceful_timeout", args.grace)
+            self.cfg.set("worker_exit", lambda arbiter, worker: shutdown_hooks(load_module(args.service)))
+
+        def load(self):
+            # imported inside each worker, so upstream loops and sqlite
+            # connections are never shared across a fork
+            return load_module(args.service).app
+
+    print(f"{args.service} serving on http://{args.host}:{args.port} "
+          f"(gunicorn, {args.workers} workers x {args.threads} threads)")
+    _App().run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run focus/control server under a production WSGI server")
+    parser.add_argument("service", choices=sorted(SERVICES))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--backend", choices=["waitress", "gunicorn"], default=os.getenv("SERVE_BACKEND", "waitress"))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVE_WORKERS", "1")),
+                        help="worker processes (gunicorn only)")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("SERVE_THREADS", "32")))
+    parser.add_argument("--connections", type=int, default=200, help="max open connections (waitress)")
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("SERVE_TIMEOUT", "60")),
+                        help="seconds before an idle connection or hung worker is cut off")
+    parser.add_argument("--grace", type=int, default=10, help="seconds to finish in-flight requests on shutdown")
+    parser.add_argument("--ui", default="", help="daemon only: comma separated UIs to launch (pet, timer)")
+    args = parser.parse_args(argv)
+    if args.port is None:
+        args.port = SERVICES[args.service][1]
+    if args.service == "daemon" and args.backend == "gunicorn":
+        # forked workers would each run their own scheduler
+        parser.error("the daemon runs as a single process; use the waitress backend")
+
+    # sibling modules (focus_server, verdict_cache, ...) import each other by name
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    if args.backend == "gunicorn":
+        serve_gunicorn(args)
+    else:
+        serve_waitress(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# singleflight.py
+# In-flight de-duplication: while one caller is fetching a key, concurrent
+# callers for the same key wait on its future instead of starting their own
+# upstream call. Futures are concurrent.futures.Future so threaded (Flask)
+# and asyncio callers can share the same flight.
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._flights = {}      # key -> Future
+        self.leaders = 0        # calls that actually went upstream
+        self.followers = 0      # calls that rode along (upstream calls saved)
+
+    def claim(self, key):
+        # returns (future, is_leader); the leader must call resolve()
+        with self.lock:
+            fut = self._flights.get(key)
+            if fut is not None:
+                self.followers += 1
+                return fut, False
+            fut = Future()
+            self._flights[key] = fut
+            self.leaders += 1
+            return fut, True
+
+    def resolve(self, key, result=None, error=None):
+        with self.lock:
+            fut = self._flights.pop(key, None)
+        if fut is None:
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def do(self, key, fn, timeout=None):
+        # threaded callers; returns (result, shared). A follower waits at
+        # most `timeout` seconds for the leader (TimeoutError after that)
+        fut, leader = self.claim(key)
+        if not leader:
+            return fut.result(timeout=timeout), True
+        try:
+            result = fn()
+        except Exception as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, result)
+        return result, False
+
+    async def ado(self, key, coro_fn):
+        # asyncio callers; returns (result, shared)
+        fut, leader = self.claim(key)
+        if not leader:
+            return await asyncio.wrap_future(fut), True
+        try:
+            result = await coro_fn()
+        except BaseException as e:
+            # cancellation of the leader must not strand its followers
+            self.resolve(key, error=e if isinstance(e, Exception) else RuntimeError("leader cancelled"))
+            raise
+        self.resolve(key, result)
+        return result, False
+
+    def stats(self):
+        with self.lock:
+            return {
+                "in_flight": len(self._flights),
+                "upstream_calls": self.leaders,
+                "upstream_calls_saved": self.followers,
+            }
@@ -0,0 +1,117 @@
+# streaming.py
+# Early verdict extraction from a streamed completion. The model writes
+# "action" first, so the verdict is known a few tokens in; the parser below
+# picks top-level string fields out of the JSON object as it arrives and
+# notices when the object closes so the rest of the stream can be dropped.
+import json
+import time
+from contextlib import aclosing
+
+from prompts import ACTIONS, parse_verdict
+
+
+class VerdictStreamParser:
+    def __init__(self):
+        self.fields = {}        # completed top-level string fields
+        self.closed = False     # the top-level object has been closed
+        self._chunks = []
+        self._start = None      # offset of the opening "{"
+        self._end = None        # offset just past the closing "}"
+        self._offset = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._buf = []
+        self._expect = "key"
+        self._key = None
+
+    def feed(self, text):
+        self._chunks.append(text)
+        for i, ch in enumerate(text):
+            if self.closed:
+                break
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    self._end_string("".join(self._buf))
+                    continue
+                self._buf.append(ch)
+            elif ch == '"':
+                self._in_str = True
+                self._buf = []
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "{" and self._depth == 1 and self._start is None:
+                    self._start = self._offset + i
+                    self._expect = "key"
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth <= 0 and self._start is not None:
+                    self.closed = True
+                    self._end = self._offset + i + 1
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect = "value"
+                elif ch == ",":
+                    self._expect = "key"
+        self._offset += len(text)
+
+    def _end_string(self, raw):
+        if self._depth != 1:
+            return
+        try:
+            value = json.loads('"' + raw + '"')
+        except ValueError:
+            value = raw
+        if self._expect == "key":
+            self._key = value
+        elif self._key is not None:
+            self.fields[self._key] = value
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    def has_verdict(self):
+        return self.fields.get("action") in ACTIONS and "pet_behavior" in self.fields
+
+    def result(self):
+        # full verdict once the stream is over; None when unusable
+        text = self.text
+        if self._start is not None and self._end is not None:
+            verdict = parse_verdict(text[self._start:self._end])
+            if verdict is not None:
+                return verdict
+        verdict = parse_verdict(text)
+        if verdict is None and self.fields.get("action") in ACTIONS:
+            # object never closed (e.g. max_tokens hit) but the fields we need arrived
+            verdict = dict(self.fields)
+        return verdict
+
+
+async def stream_verdict(chunks, on_verdict=None):
+    # Consumes an async iterator of content deltas. on_verdict(fields, timings)
+    # fires once, as soon as action and pet_behavior are known. Returns
+    # (parser, timings); timings are milliseconds from the call.
+    started = time.perf_counter()
+    ms = lambda: round((time.perf_counter() - started) * 1000, 1)
+    parser = VerdictStreamParser()
+    timings = {}
+    async with aclosing(chunks) as stream:
+        async for delta in stream:
+            if "ttft_ms" not in timings:
+                timings["ttft_ms"] = ms()
+            parser.feed(delta)
+            if "ttv_ms" not in timings and parser.has_verdict():
+                timings["ttv_ms"] = ms()
+                if on_verdict is not None:
+                    on_verdict(dict(parser.fields), dict(timings))
+            if parser.closed:
+                # nothing useful follows the object; drop the connection
+                break
+    timings["total_ms"] = ms()
+    return parser, timings
@@ -0,0 +1,69 @@
+# text_clean.py
+# Snippet normalisation for /check. The stopword list ships as a frozen
+# text file (stopwords_en.txt) so the server never imports or downloads
+# NLTK; it is read on first use.
+import os
+import re
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+STOPWORDS_FILE = os.path.join(BASE, "stopwords_en.txt")
+
+MAX_SNIPPET_CHARS = 1500
+# -----------------------------------
+
+_stopwords = None
+
+# after non-printable chars become spaces, a "word" is simply a run of
+# printable, non-space ASCII
+_WORD_RE = re.compile(r"[!-~]+")
+_SEP_RE = re.compile(r"[^!-~]")
+
+# text is consumed in windows of this many characters (cut at a word
+# boundary), so long pages stop being read once enough words are kept
+_WINDOW = 4096
+
+
+def get_stopwords():
+    global _stopwords
+    if _stopwords is None:
+        with open(STOPWORDS_FILE, "r", encoding="utf-8") as f:
+            _stopwords = frozenset(
+                line.strip() for line in f
+                if line.strip() and not line.startswith("#")
+            )
+    return _stopwords
+
+
+def remove_stopwords(text):
+    stop = get_stopwords()
+    return " ".join([w for w in text.split() if w.lower() not in stop])
+
+
+def clean_snippet(snippet, limit=MAX_SNIPPET_CHARS):
+    # Single pass equivalent of:
+    #   strip "<s>"/"</s>" -> non-ASCII to space -> collapse spaces
+    #   -> drop stopwords -> truncate to `limit`
+    # The special tokens are printable ASCII, so removing them only ever
+    # changes the word they sit in, and each word is visited once.
+    if not snippet:
+        return ""
+
+    stop = get_stopwords()
+    kept = []
+    size = -1   # joined length; no separator before the first word
+    pos, n = 0, len(snippet)
+    while pos < n and size < limit:
+        end = pos + _WINDOW
+        if end < n:
+            sep = _SEP_RE.search(snippet, end)
+            end = sep.start() if sep else n
+        words = _WORD_RE.findall(snippet, pos, end)
+        if snippet.find("s>", pos, end) != -1:
+            words = [w.replace("<s>", "").replace("</s>", "") if "s>" in w else w for w in words]
+            words = [w for w in words if w]
+        words = [w for w in words if w.lower() not in stop]
+        kept += words
+        size += sum(map(len, words)) + len(words)
+        pos = end
+
+    return " ".join(kept)[:limit]
@@ -0,0 +1,199 @@
+# upstream.py
+# Shared OpenRouter client: one keep-alive httpx.AsyncClient running on a
+# background event loop, so Flask worker threads hand their request over
+# and many classifications can be in flight without a TCP+TLS handshake
+# per call.
+import json
+import time
+import asyncio
+import random
+import threading
+import atexit
+import httpx
+
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableStatus(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"upstream returned HTTP {status_code}")
+        self.status_code = status_code
+
+
+class UpstreamClient:
+    def __init__(self, url, headers=None, max_concurrency=8, attempts=3,
+                 attempt_timeout=8.0, connect_timeout=4.0,
+                 backoff_base=0.25, backoff_max=4.0):
+        self.url = url
+        self.headers = dict(headers or {})
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.attempts = max(1, int(attempts))
+        self.attempt_timeout = float(attempt_timeout)
+        self.connect_timeout = float(connect_timeout)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+
+        # optional instrumentation hooks: timing_hook(stage, seconds) for
+        # connect/ttfb/total, outcome_hook("ok" | "retry" | "error")
+        self.timing_hook = None
+        self.outcome_hook = None
+
+        self.loop = None
+        self._client = None
+        self._sem = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if self.loop is not None:
+                return self
+            ready = threading.Event()
+
+            def _run():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency,
+                        keepalive_expiry=60.0
+                    ),
+                    timeout=httpx.Timeout(self.attempt_timeout, connect=self.connect_timeout),
+                    headers=self.headers
+                )
+                self._sem = asyncio.Semaphore(self.max_concurrency)
+                self.loop = loop
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, name="upstream-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            atexit.register(self.close)
+            return self
+
+    def close(self):
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result(timeout=5)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        self.loop = None
+
+    # ---- calls ----
+    def backoff(self, attempt):
+        # "full jitter": spreads retries from many workers instead of syncing them
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def _timing(self, name, seconds):
+        if self.timing_hook is not None:
+            self.timing_hook(name, seconds)
+
+    def _outcome(self, outcome):
+        if self.outcome_hook is not None:
+            self.outcome_hook(outcome)
+
+    def _tracer(self, started):
+        # httpx trace extension: new-connection setup time and time to first byte
+        marks = {}
+
+        async def trace(event, info):
+            now = time.perf_counter()
+            if event == "connection.connect_tcp.started":
+                marks["connect"] = now
+            elif event == "http11.send_request_headers.started" and "connect" in marks:
+                self._timing("connect", now - marks.pop("connect"))
+            elif event.endswith("receive_response_headers.complete"):
+                self._timing("ttfb", now - started)
+        return trace
+
+    async def apost(self, payload):
+        async with self._sem:
+            for attempt in range(self.attempts):
+                started = time.perf_counter()
+                try:
+                    resp = await self._client.post(self.url, json=payload,
+                                                   extensions={"trace": self._tracer(started)})
+                    if resp.status_code in RETRY_STATUSES:
+                        raise RetryableStatus(resp.status_code)
+                    resp.raise_for_status()
+                    data = resp.json()
+                    self._timing("total", time.perf_counter() - started)
+                    self._outcome("ok")
+                    return data
+                except (httpx.TransportError, RetryableStatus):
+                    # TimeoutException is a TransportError, so per-attempt timeouts retry too
+                    if attempt == self.attempts - 1:
+                        self._outcome("error")
+                        raise
+                    self._outcome("retry")
+                except Exception:
+                    self._outcome("error")
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+
+    async def astream(self, payload):
+        # async generator over the content deltas of a streamed (SSE) chat
+        # completion; only failures before the first delta are retried
+        payload = dict(payload, stream=True)
+        async with self._sem:
+            for attempt in range(self.attempts):
+                started = False
+                t0 = time.perf_counter()
+                try:
+                    async with self._client.stream("POST", self.url, json=payload,
+                                                   extensions={"trace": self._tracer(t0)}) as resp:
+                        if resp.status_code in RETRY_STATUSES:
+                            raise RetryableStatus(resp.status_code)
+                        resp.raise_for_status()
+                        async for line in resp.aiter_lines():
+                            # skips blank keep-alives and ": comment" lines
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                choices = json.loads(data).get("choices") or []
+                            except (ValueError, AttributeError):
+                                continue
+                            content = (choices[0].get("delta") or {}).get("content") if choices else None
+                            if content:
+                                started = True
+                                yield content
+                    self._timing("total", time.perf_counter() - t0)
+                    self._outcome("ok")
+                    return
+                except GeneratorExit:
+                    # the consumer had what it needed and cut the stream
+                    self._timing("total", time.perf_counter() - t0)
+                    self._outcome("ok")
+                    raise
+                except (httpx.TransportError, RetryableStatus):
+                    if started or attempt == self.attempts - 1:
+                        self._outcome("error")
+                        raise
+                    self._outcome("retry")
+                except Exception:
+                    self._outcome("error")
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+
+    def deadline(self):
+        # worst case: every attempt times out and every backoff hits its cap
+        return self.attempts * (self.attempt_timeout + self.connect_timeout + self.backoff_max)
+
+    def submit(self, coro):
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def post(self, payload):
+        # blocking entry point for WSGI worker threads
+        return self.submit(self.apost(payload)).result(timeout=self.deadline())
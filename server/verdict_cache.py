@@ -0,0 +1,161 @@
+# verdict_cache.py
+# Two-level cache for /check verdicts: bounded in-memory LRU in front of a
+# SQLite table, so repeated pages skip the OpenRouter round trip and the
+# cache survives server restarts.
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("FOCUS_DATA_DIR", os.path.join(BASE, "data"))
+
+CACHE_DB = os.path.join(DATA_DIR, "verdict_cache.sqlite3")
+CACHE_SIZE = 2048
+
+# seconds; a block verdict is stable, an allow may change as the page does
+ACTION_TTLS = {
+    "block": 7 * 24 * 3600,
+    "warn": 24 * 3600,
+    "allow": 6 * 3600,
+}
+DEFAULT_TTL = 3600
+# -----------------------------------
+
+
+def normalize_domain(domain):
+    domain = (domain or "").strip().lower().rstrip(".")
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain
+
+
+def make_key(domain, title, snippet):
+    # snippet is expected to be the clean_snippet() output
+    title = " ".join((title or "").lower().split())
+    snippet_hash = hashlib.sha1((snippet or "").encode("utf-8")).hexdigest()
+    raw = f"{normalize_domain(domain)}\n{title}\n{snippet_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    def __init__(self, db_path=CACHE_DB, max_entries=CACHE_SIZE, ttls=None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttls = dict(ACTION_TTLS if ttls is None else ttls)
+        self.lock = threading.Lock()
+        self._mem = OrderedDict()  # key -> (expires_at, domain, verdict)
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        if db_path:
+            self._open_db()
+
+    def _open_db(self):
+        folder = os.path.dirname(self.db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            " key TEXT PRIMARY KEY,"
+            " domain TEXT NOT NULL,"
+            " verdict TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_domain ON verdicts(domain)")
+        self._db.execute("DELETE FROM verdicts WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+
+    def ttl_for(self, verdict):
+        return self.ttls.get(str(verdict.get("action", "")).lower(), DEFAULT_TTL)
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[2])
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT domain, verdict, expires_at FROM verdicts WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+                if row:
+                    verdict = json.loads(row[1])
+                    self._remember(key, row[2], row[0], verdict)
+                    self.hits += 1
+                    return dict(verdict)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, domain, verdict):
+        now = time.time()
+        expires_at = now + self.ttl_for(verdict)
+        domain = normalize_domain(domain)
+        verdict = dict(verdict)
+        with self.lock:
+            self._remember(key, expires_at, domain, verdict)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, domain, verdict, created_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, domain, json.dumps(verdict), now, expires_at)
+                )
+                self._db.commit()
+
+    def _remember(self, key, expires_at, domain, verdict):
+        self._mem[key] = (expires_at, domain, verdict)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def invalidate_domain(self, domain):
+        # drops the domain and all of its subdomains
+        domain = normalize_domain(domain)
+        if not domain:
+            return 0
+        suffix = "." + domain
+        removed = 0
+        with self.lock:
+            for key in [k for k, e in self._mem.items() if e[1] == domain or e[1].endswith(suffix)]:
+                del self._mem[key]
+                removed += 1
+            if self._db is not None:
+                cur = self._db.execute(
+                    "DELETE FROM verdicts WHERE domain = ? OR domain LIKE ?",
+                    (domain, "%" + suffix)
+                )
+                self._db.commit()
+                removed = max(removed, cur.rowcount)
+        return removed
+
+    def stats(self):
+        with self.lock:
+            stored = None
+            if self._db is not None:
+                stored = self._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._mem),
+                "stored_entries": stored,
+            }
+
+    def close(self):
+        with self.lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None